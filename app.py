@@ -1,13 +1,40 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, g, abort, send_from_directory, has_request_context, Response, stream_with_context
+from flask.signals import before_render_template, template_rendered
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from flask_mail import Mail, Message
+from flask_mail import Mail
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
+from itertools import repeat
+import bisect
+import brotli
+import click
+import gzip
+import hashlib
+import heapq
+import json
+import math
+import mimetypes
+import re
 import secrets
+import shutil
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import csv
+import zlib
 from io import StringIO
 
 # Load environment variables
@@ -40,6 +67,44 @@ app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
 app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME', '')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD', '')
 
+# Outbound mail queue (delivered by mail_worker.py)
+app.config['MAIL_BATCH_SIZE'] = int(os.getenv('MAIL_BATCH_SIZE', 50))
+app.config['MAIL_MAX_ATTEMPTS'] = int(os.getenv('MAIL_MAX_ATTEMPTS', 6))
+app.config['MAIL_RETRY_BASE_SECONDS'] = int(os.getenv('MAIL_RETRY_BASE_SECONDS', 30))
+app.config['MAIL_RETRY_MAX_SECONDS'] = int(os.getenv('MAIL_RETRY_MAX_SECONDS', 3600))
+app.config['NOTIFICATION_EMAIL_CHUNK_SIZE'] = int(os.getenv('NOTIFICATION_EMAIL_CHUNK_SIZE', 200))
+
+# Password hashing; PASSWORD_HASH_WORKERS=0 hashes in the request worker itself
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_SALT_LENGTH'] = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
+# OTP storage: 'database' works across workers, 'memory' only within one process
+app.config['OTP_BACKEND'] = os.getenv('OTP_BACKEND', 'database')
+
+# Rate limiting of login and OTP routes; same backends as OTP storage
+app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'database')
+
+# Per-worker cache of logged-in users; writes made by other workers are
+# noticed within USER_CACHE_CHECK_INTERVAL seconds
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 1024))
+app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 300))
+app.config['USER_CACHE_CHECK_INTERVAL'] = float(os.getenv('USER_CACHE_CHECK_INTERVAL', 2))
+
+# Request metrics: Server-Timing headers, /metrics and logging of SQL
+# statements slower than SLOW_QUERY_MS. /metrics requires
+# 'Authorization: Bearer <METRICS_TOKEN>' and is not served without a token
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 200))
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')
+
+# Number of reverse proxies in front of the app (1 on Render), so that
+# rate limits see the client address rather than the proxy's
+PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+if PROXY_FIX_X_FOR:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_FIX_X_FOR)
+
 # Initialize extensions
 db = SQLAlchemy()
 mail = Mail()
@@ -61,6 +126,7 @@ class User(db.Model):
     password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    notifications_seen_at = db.Column(db.DateTime)  # notifications created after this are unread
     
     # Flask-Login required methods
     def is_authenticated(self):
@@ -86,6 +152,12 @@ class Student(db.Model):
     branch = db.Column(db.String(50), nullable=False)
     group_id = db.Column(db.Integer, db.ForeignKey('student_group.id'))
     
+    __table_args__ = (
+        db.Index('ix_student_year_branch_group', 'year', 'branch', 'group_id'),
+        db.Index('ix_student_user_id', 'user_id'),
+        db.Index('ix_student_group_id', 'group_id'),
+    )
+    
     user = db.relationship('User', backref=db.backref('student', uselist=False))
     group = db.relationship('StudentGroup', backref=db.backref('students', lazy=True))
 
@@ -96,6 +168,7 @@ class Supervisor(db.Model):
     name = db.Column(db.String(100), nullable=False)
     domain = db.Column(db.String(50), nullable=False)
     school = db.Column(db.String(100), nullable=False)
+    supervised_count = db.Column(db.Integer, nullable=False, default=0)  # maintained by reserve/release_supervisor_slot
     
     user = db.relationship('User', backref=db.backref('supervisor', uselist=False))
     supervised_groups = db.relationship('StudentGroup', backref='supervisor', lazy=True)
@@ -120,6 +193,14 @@ class StudentGroup(db.Model):
     branch = db.Column(db.String(50), nullable=False)
     year = db.Column(db.String(10), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    member_count = db.Column(db.Integer, nullable=False, default=0)  # maintained by reserve/release_group_slot
+    has_panel = db.Column(db.Boolean, nullable=False, default=False)  # set by claim_panel_groups
+
+class GroupNameCounter(db.Model):
+    __tablename__ = 'group_name_counter'
+    # Last number handed out for each branch's group names (CS01, CS02, ...)
+    branch = db.Column(db.String(50), primary_key=True)
+    last_number = db.Column(db.Integer, nullable=False, default=0)
 
 class GroupInvite(db.Model):
     __tablename__ = 'group_invite'
@@ -129,6 +210,11 @@ class GroupInvite(db.Model):
     status = db.Column(db.String(20), default='pending')
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_group_invite_receiver_status', 'receiver_id', 'status'),
+        db.Index('ix_group_invite_sender_receiver_status', 'sender_id', 'receiver_id', 'status'),
+    )
+    
     sender = db.relationship('Student', foreign_keys=[sender_id], backref='sent_invites')
     receiver = db.relationship('Student', foreign_keys=[receiver_id], backref='received_invites')
 
@@ -140,6 +226,11 @@ class SupervisorRequest(db.Model):
     status = db.Column(db.String(20), default='pending')
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_supervisor_request_supervisor_status', 'supervisor_id', 'status'),
+        db.Index('ix_supervisor_request_group_id', 'group_id'),
+    )
+    
     group = db.relationship('StudentGroup', backref='supervisor_requests')
     supervisor = db.relationship('Supervisor', backref='received_requests')
 
@@ -154,6 +245,10 @@ class SupervisorChangeRequest(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed_at = db.Column(db.DateTime)
     
+    __table_args__ = (
+        db.Index('ix_supervisor_change_request_group_status', 'group_id', 'status'),
+    )
+    
     group = db.relationship('StudentGroup', backref='supervisor_change_requests')
     current_supervisor = db.relationship('Supervisor', foreign_keys=[current_supervisor_id])
     new_supervisor = db.relationship('Supervisor', foreign_keys=[new_supervisor_id])
@@ -188,6 +283,10 @@ class Marks(db.Model):
     given_by = db.Column(db.Integer, db.ForeignKey('supervisor.id'), nullable=False)
     given_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_marks_student_given_by', 'student_id', 'given_by'),
+    )
+    
     student = db.relationship('Student', backref='marks')
     supervisor_given = db.relationship('Supervisor', backref='given_marks')
 
@@ -200,6 +299,12 @@ class OTP(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
     used = db.Column(db.Boolean, default=False)
+    
+    # At most one live OTP per email and purpose; issuing a new one replaces it
+    __table_args__ = (
+        db.UniqueConstraint('email', 'purpose', name='uq_otp_email_purpose'),
+        db.Index('ix_otp_expires_at', 'expires_at'),
+    )
 
 class Notification(db.Model):
     __tablename__ = 'notification'
@@ -211,11 +316,1873 @@ class Notification(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('fic.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Email delivery progress, only set when the FIC asked for email delivery
+    email_status = db.Column(db.String(20))  # pending, sending, sent
+    email_total = db.Column(db.Integer, default=0)
+    email_sent_count = db.Column(db.Integer, default=0)
+    email_failed_count = db.Column(db.Integer, default=0)
+    email_cursor = db.Column(db.Integer, default=0)  # id of the last user handled
+    email_claimed_at = db.Column(db.DateTime)
+    email_attempts = db.Column(db.Integer, default=0)  # failed runs since the last chunk sent
+    email_next_attempt_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_notification_target_created', 'target_type', 'created_at'),
+    )
+    
     fic = db.relationship('FIC', backref='sent_notifications')
 
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_email'
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_outbound_email_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_version'
+    # Bumped on every write that invalidates the in-process caches keyed by it,
+    # so each gunicorn worker can tell when its copy is stale
+    key = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class RateLimitBucket(db.Model):
+    __tablename__ = 'rate_limit_bucket'
+    key = db.Column(db.String(200), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    # Unix time of the last refill, so refills are plain arithmetic in SQL
+    updated_at = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_rate_limit_bucket_updated_at', 'updated_at'),
+    )
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    cached = user_cache.get(user_id)
+    if cached:
+        return cached
+    
+    # Load the role profile in the same query so handlers don't need a second round trip
+    user = User.query.options(
+        joinedload(User.student),
+        joinedload(User.supervisor),
+        joinedload(User.fic)
+    ).get(user_id)
+    if user:
+        user_cache.put(user)
+    return user
+
+def _get_current_profile():
+    """Return the Student, Supervisor or FIC profile of the logged-in user"""
+    # g outlives the request when the app context was pushed by the caller
+    # (as in tests), so the profile is kept together with its user
+    user = current_user._get_current_object()
+    if g.get('current_profile_user') is not user:
+        role = getattr(user, 'role', None)
+        g.current_profile = getattr(user, role) if role in ('student', 'supervisor', 'fic') else None
+        g.current_profile_user = user
+    return g.current_profile
+
+# Request-scoped profile of the logged-in user, loaded together with the user by
+# load_user; it can be a few seconds stale, so only read-only pages use it
+current_profile = LocalProxy(_get_current_profile)
+
+def locked_profile():
+    """Re-read the logged-in user's profile from the database, locking its row until the request commits.
+    
+    current_profile may come from the user cache and lag behind other workers'
+    writes, so handlers that change data start from this instead.
+    """
+    role = getattr(current_user, 'role', None)
+    if role not in PROFILE_MODELS:
+        return None
+    # populate_existing refreshes the cached copy already in the session
+    profile = PROFILE_MODELS[role].query.filter_by(user_id=current_user.id).with_for_update().populate_existing().first()
+    g.current_profile = profile
+    g.current_profile_user = current_user._get_current_object()
+    return profile
+
+def queue_email(subject, recipient, body):
+    """Add an email to the outbox; it is sent by mail_worker.py once the caller commits"""
+    email = OutboundEmail(recipient=recipient, subject=subject, body=body)
+    db.session.add(email)
+    return email
+
+def mail_queue_depth():
+    """Return the number of outbox messages per status"""
+    rows = db.session.query(
+        OutboundEmail.status,
+        db.func.count(OutboundEmail.id)
+    ).group_by(OutboundEmail.status).all()
+    return {status: count for status, count in rows}
+
+# One-time passwords, keyed by (email, purpose)
+OTP_TTL = timedelta(minutes=10)
+OTP_PURGE_BATCH_SIZE = 1000
+
+def generate_otp_code():
+    return ''.join(secrets.choice('0123456789') for _ in range(6))
+
+class DatabaseOTPStore:
+    """OTPs in the otp table, shared by every worker"""
+    
+    def issue(self, email, purpose):
+        """Replace the OTP for (email, purpose) with a new one and return its code.
+
+        Takes effect when the caller commits.
+        """
+        code = generate_otp_code()
+        now = datetime.utcnow()
+        values = {'otp': code, 'created_at': now, 'expires_at': now + OTP_TTL, 'used': False}
+        updated = OTP.query.filter_by(email=email, purpose=purpose).update(values, synchronize_session=False)
+        if not updated:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(OTP(email=email, purpose=purpose, **values))
+            except IntegrityError:
+                # Another request created the row first
+                OTP.query.filter_by(email=email, purpose=purpose).update(values, synchronize_session=False)
+        return code
+    
+    def consume(self, email, purpose, code):
+        """Use up the OTP if code matches a live one; returns whether it did.
+
+        A single conditional UPDATE on the (email, purpose) key, so a code can
+        only be used once even under concurrent requests. Expiring it now lets
+        the purge find it through the expiry index.
+        """
+        now = datetime.utcnow()
+        return bool(OTP.query.filter(
+            OTP.email == email,
+            OTP.purpose == purpose,
+            OTP.otp == code,
+            OTP.used == False,
+            OTP.expires_at >= now
+        ).update({'used': True, 'expires_at': now}, synchronize_session=False))
+    
+    def purge(self, batch_size=OTP_PURGE_BATCH_SIZE):
+        """Delete used and expired OTPs in batches; returns the number deleted"""
+        cutoff = datetime.utcnow()
+        deleted = 0
+        while True:
+            ids = [row[0] for row in db.session.query(OTP.id).filter(
+                OTP.expires_at < cutoff
+            ).limit(batch_size).all()]
+            if not ids:
+                break
+            OTP.query.filter(OTP.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+        return deleted
+
+class MemoryOTPStore:
+    """OTPs held in this process; only for single-worker deployments and development"""
+    
+    def __init__(self):
+        self._otps = {}
+        self._lock = threading.Lock()
+        self._next_purge = datetime.utcnow() + OTP_TTL
+    
+    def issue(self, email, purpose):
+        code = generate_otp_code()
+        now = datetime.utcnow()
+        with self._lock:
+            self._otps[(email, purpose)] = (code, now + OTP_TTL)
+        if now >= self._next_purge:
+            self.purge()
+        return code
+    
+    def consume(self, email, purpose, code):
+        with self._lock:
+            entry = self._otps.get((email, purpose))
+            if not entry or entry[0] != code or entry[1] < datetime.utcnow():
+                return False
+            del self._otps[(email, purpose)]
+            return True
+    
+    def purge(self, batch_size=None):
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._otps.items() if expires_at < now]
+            for key in expired:
+                del self._otps[key]
+            self._next_purge = now + OTP_TTL
+        return len(expired)
+
+otp_store = MemoryOTPStore() if app.config['OTP_BACKEND'] == 'memory' else DatabaseOTPStore()
+
+# Token buckets as {name: {'ip': (capacity, tokens per second), 'email': ...}}.
+# IP limits are generous because a campus may share a few addresses; the
+# email limits protect single accounts and the SMTP quota.
+RATE_LIMITS = {
+    'login': {'ip': (60, 1.0), 'email': (10, 1 / 30)},
+    'send_otp': {'ip': (20, 1 / 15), 'email': (3, 1 / 120)},
+    'verify_otp': {'ip': (30, 1 / 10), 'email': (5, 1 / 60)}
+}
+# Buckets idle this long have refilled completely and can be deleted
+RATE_LIMIT_IDLE_SECONDS = 24 * 3600
+
+class DatabaseRateLimiter:
+    """Token buckets in the rate_limit_bucket table, shared by every worker"""
+    
+    def take(self, key, capacity, rate):
+        """Take a token from the bucket; returns 0, or the seconds until a token is available"""
+        now = time.time()
+        refilled = RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * rate
+        available = db.case((refilled > capacity, capacity), else_=refilled)
+        # tokens is assigned before updated_at (table column order), which
+        # MySQL needs because it applies SET clauses left to right
+        taken = RateLimitBucket.query.filter(
+            RateLimitBucket.key == key,
+            available >= 1
+        ).update({'tokens': available - 1, 'updated_at': now}, synchronize_session=False)
+        
+        if not taken:
+            bucket = db.session.query(RateLimitBucket.tokens, RateLimitBucket.updated_at).filter_by(key=key).first()
+            if bucket:
+                db.session.commit()
+                tokens = min(capacity, bucket.tokens + (now - bucket.updated_at) * rate)
+                return (1 - tokens) / rate
+            try:
+                with db.session.begin_nested():
+                    db.session.add(RateLimitBucket(key=key, tokens=capacity - 1, updated_at=now))
+            except IntegrityError:
+                # Another request created the bucket first
+                db.session.commit()
+                return self.take(key, capacity, rate)
+        
+        db.session.commit()
+        return 0
+    
+    def purge(self):
+        """Delete buckets that have been idle long enough to be full again"""
+        deleted = RateLimitBucket.query.filter(
+            RateLimitBucket.updated_at < time.time() - RATE_LIMIT_IDLE_SECONDS
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+class MemoryRateLimiter:
+    """Token buckets held in this process; only for single-worker deployments and development"""
+    
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def take(self, key, capacity, rate):
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1, now)
+            return 0
+    
+    def purge(self):
+        cutoff = time.time() - RATE_LIMIT_IDLE_SECONDS
+        with self._lock:
+            idle = [key for key, (_, updated_at) in self._buckets.items() if updated_at < cutoff]
+            for key in idle:
+                del self._buckets[key]
+        return len(idle)
+
+rate_limiter = MemoryRateLimiter() if app.config['RATE_LIMIT_BACKEND'] == 'memory' else DatabaseRateLimiter()
+
+def rate_limited(name, template=None):
+    """Limit POSTs to a view per client IP and per email with the RATE_LIMITS[name] buckets.
+
+    Rejected requests get 429 with Retry-After: JSON for API routes, or
+    template re-rendered with a flash message for form routes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method != 'POST' or not app.config['RATE_LIMIT_ENABLED']:
+                return view(*args, **kwargs)
+            
+            limits = RATE_LIMITS[name]
+            email = kwargs.get('email') or request.form.get('email') or \
+                (request.get_json(silent=True) or {}).get('email')
+            waits = [rate_limiter.take(f'{name}:ip:{request.remote_addr}', *limits['ip'])]
+            if email:
+                waits.append(rate_limiter.take(f'{name}:email:{str(email).strip().lower()}', *limits['email']))
+            
+            retry_after = math.ceil(max(waits))
+            if not retry_after:
+                return view(*args, **kwargs)
+            
+            message = f'Too many attempts. Please try again in {retry_after} seconds.'
+            if template:
+                flash(message, 'error')
+                response = app.make_response((render_template(template, **kwargs), 429))
+            else:
+                response = app.make_response((jsonify({'success': False, 'message': message}), 429))
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        return wrapped
+    return decorator
+
+# pbkdf2 and scrypt are CPU bound, so hashing runs in a bounded process pool
+# that is started on first use in each worker. The pool caps the hashes running
+# at once, and a threaded worker keeps serving other requests while it waits.
+_password_pool = None
+_password_hash_prefix = None
+
+def _get_password_pool():
+    """This worker's hashing pool, or None when hashing runs inline"""
+    global _password_pool
+    if app.config['PASSWORD_HASH_WORKERS'] < 1:
+        return None
+    if _password_pool is None:
+        _password_pool = ProcessPoolExecutor(max_workers=app.config['PASSWORD_HASH_WORKERS'])
+    return _password_pool
+
+def _run_in_password_pool(fn, *args):
+    global _password_pool
+    pool = _get_password_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # A pool process died; finish this call inline and start a new pool next time
+        _password_pool = None
+        return fn(*args)
+
+def hash_password(password):
+    """Hash a password with the configured method and cost"""
+    return _run_in_password_pool(
+        generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_SALT_LENGTH']
+    )
+
+def hash_passwords(passwords):
+    """Hash many passwords, spread across the pool"""
+    global _password_pool
+    pool = _get_password_pool()
+    if pool is None or len(passwords) < 2:
+        return [hash_password(password) for password in passwords]
+    try:
+        return list(pool.map(
+            generate_password_hash, passwords,
+            repeat(app.config['PASSWORD_HASH_METHOD']), repeat(app.config['PASSWORD_SALT_LENGTH']),
+            chunksize=max(1, len(passwords) // (app.config['PASSWORD_HASH_WORKERS'] * 4))
+        ))
+    except BrokenProcessPool:
+        # A pool process died; hash the whole batch inline and start a new pool next time
+        _password_pool = None
+        return [generate_password_hash(password, app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_SALT_LENGTH'])
+                for password in passwords]
+
+def verify_password(pwhash, password):
+    """Check a password against a stored hash"""
+    return _run_in_password_pool(check_password_hash, pwhash, password)
+
+def password_needs_rehash(pwhash):
+    """True when pwhash was made with a different method or cost than configured"""
+    global _password_hash_prefix
+    if _password_hash_prefix is None:
+        # werkzeug expands short names such as 'scrypt' to their full parameters,
+        # so hash once to learn the prefix new hashes get
+        _password_hash_prefix = generate_password_hash('', app.config['PASSWORD_HASH_METHOD'], 1).split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != _password_hash_prefix
+
+# Keys per statement when many cache versions are read or bumped at once
+CACHE_VERSION_CHUNK_SIZE = 500
+
+def get_cache_versions(keys):
+    """Return {key: version} for the given cache keys, 0 for keys never bumped"""
+    versions = {key: 0 for key in keys}
+    keys = list(versions)
+    for start in range(0, len(keys), CACHE_VERSION_CHUNK_SIZE):
+        versions.update(db.session.query(CacheVersion.key, CacheVersion.version).filter(
+            CacheVersion.key.in_(keys[start:start + CACHE_VERSION_CHUNK_SIZE])
+        ).all())
+    return versions
+
+def bump_cache_version(key):
+    """Invalidate every cached copy of key; takes effect when the caller commits"""
+    updated = CacheVersion.query.filter_by(key=key).update(
+        {'version': CacheVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        try:
+            with db.session.begin_nested():
+                db.session.add(CacheVersion(key=key, version=1))
+        except IntegrityError:
+            # Another request created the row first
+            CacheVersion.query.filter_by(key=key).update(
+                {'version': CacheVersion.version + 1}, synchronize_session=False
+            )
+
+def bump_cache_versions(keys):
+    """bump_cache_version for many keys, with one UPDATE and one INSERT per chunk"""
+    keys = sorted(set(keys))
+    for start in range(0, len(keys), CACHE_VERSION_CHUNK_SIZE):
+        chunk = keys[start:start + CACHE_VERSION_CHUNK_SIZE]
+        CacheVersion.query.filter(CacheVersion.key.in_(chunk)).update(
+            {'version': CacheVersion.version + 1}, synchronize_session=False
+        )
+        existing = {row[0] for row in db.session.query(CacheVersion.key).filter(CacheVersion.key.in_(chunk)).all()}
+        missing = [key for key in chunk if key not in existing]
+        if not missing:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(CacheVersion), [{'key': key, 'version': 1} for key in missing])
+        except IntegrityError:
+            # Another request created some of the rows first
+            for key in missing:
+                bump_cache_version(key)
+
+PROFILE_MODELS = {'student': Student, 'supervisor': Supervisor, 'fic': FIC}
+PROFILE_ROLES = tuple(PROFILE_MODELS)
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+def profile_cache_key(role, profile_id):
+    return f'profile:{role}:{profile_id}'
+
+def invalidate_user_cache(key):
+    """Drop a user or profile from every worker's user cache; takes effect when the caller commits"""
+    bump_cache_version(key)
+    user_cache.discard(key)
+
+class UserCache:
+    """Bounded LRU cache of users and their role profiles for load_user.
+    
+    Entries hold column values rather than ORM objects, and are rebuilt into
+    the request's session without a query. An entry is dropped after ttl
+    seconds, or when the cache version of its user or profile row changes;
+    versions of all entries are checked together at most every check_interval
+    seconds. The password hash is not cached and is loaded on access.
+    """
+    
+    def __init__(self, size, ttl, check_interval):
+        self.size = size
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+    
+    def get(self, user_id):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._check_versions()
+        
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= now:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        
+        user = self._attach(User, entry['user'])
+        profile = self._attach(PROFILE_MODELS[entry['role']], entry['profile']) if entry['profile'] else None
+        for role in PROFILE_ROLES:
+            set_committed_value(user, role, profile if role == entry['role'] else None)
+        return user
+    
+    def put(self, user):
+        profile = getattr(user, user.role) if user.role in PROFILE_ROLES else None
+        keys = [user_cache_key(user.id)]
+        if profile:
+            keys.append(profile_cache_key(user.role, profile.id))
+        # Read in the same transaction as the user, so a concurrent write
+        # cannot leave newer versions paired with older values
+        versions = get_cache_versions(keys)
+        entry = {
+            'user': self._columns(user, exclude=('password',)),
+            'role': user.role,
+            'profile': self._columns(profile) if profile else None,
+            'versions': versions,
+            'expires_at': time.monotonic() + self.ttl
+        }
+        with self._lock:
+            self._entries[user.id] = entry
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, key):
+        with self._lock:
+            for user_id, entry in list(self._entries.items()):
+                if key in entry['versions']:
+                    del self._entries[user_id]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def _check_versions(self):
+        with self._lock:
+            keys = [key for entry in self._entries.values() for key in entry['versions']]
+        if not keys:
+            return
+        versions = get_cache_versions(keys)
+        with self._lock:
+            for user_id, entry in list(self._entries.items()):
+                if any(versions.get(key, version) != version for key, version in entry['versions'].items()):
+                    del self._entries[user_id]
+    
+    @staticmethod
+    def _columns(obj, exclude=()):
+        return {column.key: getattr(obj, column.key) for column in obj.__table__.columns if column.key not in exclude}
+    
+    @staticmethod
+    def _attach(model, values):
+        # Attach as though loaded by a query; columns left out are loaded on first access
+        obj = model(**values)
+        make_transient_to_detached(obj)
+        return db.session.merge(obj, load=False)
+
+user_cache = UserCache(
+    app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'], app.config['USER_CACHE_CHECK_INTERVAL']
+)
+
+# Request metrics; every request's SQL and template time goes into a
+# Server-Timing header and is summed per endpoint for /metrics
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _prometheus_labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+class RequestMetrics:
+    """Request latency histograms and SQL and render totals per endpoint.
+    
+    Numbers are kept per worker process, so /metrics reports the worker that
+    answered the scrape.
+    """
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.routes = {}  # (endpoint, method) -> totals
+        self.statuses = Counter()  # (endpoint, method, status) -> requests
+        self.slow_queries = Counter()  # endpoint -> queries slower than SLOW_QUERY_MS
+    
+    def observe(self, endpoint, method, status, seconds, timing):
+        """Add one finished request"""
+        bucket = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            route = self.routes.get((endpoint, method))
+            if route is None:
+                route = self.routes[(endpoint, method)] = {
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'count': 0,
+                    'seconds': 0.0,
+                    'sql_queries': 0,
+                    'sql_seconds': 0.0,
+                    'render_seconds': 0.0
+                }
+            route['buckets'][bucket] += 1
+            route['count'] += 1
+            route['seconds'] += seconds
+            route['sql_queries'] += timing['sql_queries']
+            route['sql_seconds'] += timing['sql_seconds']
+            route['render_seconds'] += timing['render_seconds']
+            self.statuses[(endpoint, method, status)] += 1
+    
+    def observe_slow_query(self, endpoint):
+        with self.lock:
+            self.slow_queries[endpoint] += 1
+    
+    def render(self):
+        """Prometheus text exposition of everything observed so far"""
+        with self.lock:
+            routes = {key: dict(route, buckets=list(route['buckets'])) for key, route in self.routes.items()}
+            statuses = dict(self.statuses)
+            slow_queries = dict(self.slow_queries)
+        
+        lines = [
+            '# HELP http_request_duration_seconds Time from the start of a request until its response is ready.',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        for (endpoint, method), route in sorted(routes.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), route['buckets']):
+                cumulative += count
+                lines.append(f"http_request_duration_seconds_bucket{_prometheus_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}")
+            labels = _prometheus_labels(endpoint=endpoint, method=method)
+            lines.append(f"http_request_duration_seconds_sum{labels} {route['seconds']:.6f}")
+            lines.append(f"http_request_duration_seconds_count{labels} {route['count']}")
+        
+        for name, key, help_text in (
+            ('http_request_sql_queries_total', 'sql_queries', 'SQL statements executed while handling requests.'),
+            ('http_request_sql_seconds_total', 'sql_seconds', 'Time spent in SQL statements while handling requests.'),
+            ('http_request_render_seconds_total', 'render_seconds', 'Time spent rendering templates while handling requests.')
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (endpoint, method), route in sorted(routes.items()):
+                lines.append(f"{name}{_prometheus_labels(endpoint=endpoint, method=method)} {route[key]}")
+        
+        lines.append('# HELP http_requests_total Requests handled, by response status.')
+        lines.append('# TYPE http_requests_total counter')
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f"http_requests_total{_prometheus_labels(endpoint=endpoint, method=method, status=status)} {count}")
+        
+        lines.append('# HELP sql_slow_queries_total SQL statements slower than SLOW_QUERY_MS.')
+        lines.append('# TYPE sql_slow_queries_total counter')
+        for endpoint, count in sorted(slow_queries.items()):
+            lines.append(f"sql_slow_queries_total{_prometheus_labels(endpoint=endpoint)} {count}")
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics(REQUEST_LATENCY_BUCKETS)
+
+def _request_timing():
+    """Timing totals of the current request, or None outside one"""
+    return g.get('request_timing') if has_request_context() else None
+
+def _request_endpoint():
+    if not has_request_context():
+        return 'none'
+    return request.url_rule.endpoint if request.url_rule else 'unmatched'
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    timing = _request_timing()
+    if timing is not None:
+        timing['sql_queries'] += 1
+        timing['sql_seconds'] += elapsed
+    if elapsed * 1000 >= app.config['SLOW_QUERY_MS']:
+        endpoint = _request_endpoint()
+        request_metrics.observe_slow_query(endpoint)
+        app.logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, endpoint, ' '.join(statement.split()))
+
+def _drop_query_timer(exception_context):
+    # after_cursor_execute does not run for a failed statement
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+def _start_render_timer(sender, template, context, **extra):
+    timing = _request_timing()
+    if timing is not None:
+        timing['render_started'] = time.perf_counter()
+
+def _record_render_time(sender, template, context, **extra):
+    timing = _request_timing()
+    if timing is not None and 'render_started' in timing:
+        timing['render_seconds'] += time.perf_counter() - timing.pop('render_started')
+
+if app.config['METRICS_ENABLED']:
+    event.listen(Engine, 'before_cursor_execute', _start_query_timer)
+    event.listen(Engine, 'after_cursor_execute', _record_query_time)
+    event.listen(Engine, 'handle_error', _drop_query_timer)
+    before_render_template.connect(_start_render_timer, app)
+    template_rendered.connect(_record_render_time, app)
+    
+    @app.before_request
+    def start_request_timer():
+        g.request_timing = {'started': time.perf_counter(), 'sql_queries': 0, 'sql_seconds': 0.0, 'render_seconds': 0.0}
+    
+    @app.after_request
+    def record_request_metrics(response):
+        timing = _request_timing()
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing['started']
+        request_metrics.observe(_request_endpoint(), request.method, response.status_code, total, timing)
+        
+        sql_ms, render_ms = timing['sql_seconds'] * 1000, timing['render_seconds'] * 1000
+        response.headers['Server-Timing'] = (
+            f'sql;dur={sql_ms:.1f};desc="{timing["sql_queries"]} queries", '
+            f'render;dur={render_ms:.1f}, '
+            f'app;dur={max(total * 1000 - sql_ms - render_ms, 0):.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        return response
+
+# Latest notifications per audience key ('all', 'students', 'supervisors',
+# 'branch:<branch>'), as {key: (version, [notification dicts])}
+NOTIFICATION_FEED_SIZE = 10
+_notification_feeds = {}
+
+def notification_feed_key(notification):
+    """Audience key a notification is published under"""
+    if notification.target_type == 'specific_branch':
+        return f'branch:{notification.target_branch}'
+    return notification.target_type
+
+def notification_audience_condition(key):
+    """SQL condition matching the notifications published under an audience key"""
+    if key.startswith('branch:'):
+        return (Notification.target_type == 'specific_branch') & (Notification.target_branch == key[len('branch:'):])
+    return Notification.target_type == key
+
+def _query_notification_feed(key):
+    notifications = Notification.query.filter(notification_audience_condition(key)).order_by(
+        Notification.created_at.desc()
+    ).limit(NOTIFICATION_FEED_SIZE).all()
+    return [{
+        'id': n.id,
+        'title': n.title,
+        'message': n.message,
+        'created_at': n.created_at
+    } for n in notifications]
+
+def load_notification_feed(keys, seen_at=None):
+    """Return the newest notifications across the audience keys and how many are unread.
+
+    Each key's feed is cached in-process and only re-queried after
+    send_notification bumps its version. Unread notifications are counted
+    in SQL, as there can be more of them than the feed holds.
+    """
+    versions = get_cache_versions([f'notifications:{key}' for key in keys])
+    notifications = []
+    for key in keys:
+        version = versions[f'notifications:{key}']
+        cached = _notification_feeds.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, _query_notification_feed(key))
+            _notification_feeds[key] = cached
+        notifications.extend(cached[1])
+    
+    notifications.sort(key=lambda n: (n['created_at'], n['id']), reverse=True)
+    notifications = notifications[:NOTIFICATION_FEED_SIZE]
+    
+    # Nothing is unread unless the newest notification is
+    unread_count = 0
+    if notifications and (seen_at is None or notifications[0]['created_at'] > seen_at):
+        unread = db.session.query(db.func.count(Notification.id)).filter(
+            db.or_(*[notification_audience_condition(key) for key in keys])
+        )
+        if seen_at is not None:
+            unread = unread.filter(Notification.created_at > seen_at)
+        unread_count = unread.scalar()
+    return notifications, unread_count
+
+def notification_recipients(notification):
+    """Query of (user id, email) for everyone a notification targets, ordered by user id"""
+    query = db.session.query(User.id, User.email)
+    if notification.target_type == 'students':
+        query = query.filter(User.role == 'student')
+    elif notification.target_type == 'supervisors':
+        query = query.filter(User.role == 'supervisor')
+    elif notification.target_type == 'specific_branch':
+        query = query.join(Student, Student.user_id == User.id).filter(
+            Student.branch == notification.target_branch
+        )
+    else:
+        query = query.filter(User.role.in_(['student', 'supervisor']))
+    return query.order_by(User.id)
+
+MAX_GROUP_MEMBERS = 4
+MAX_SUPERVISED_GROUPS = 3
+
+def reserve_group_slot(group_id):
+    """Add a member to the group's count unless it is full; returns False when full.
+
+    The check and the increment are one conditional UPDATE, so concurrent
+    accepts cannot push a group past MAX_GROUP_MEMBERS.
+    """
+    return StudentGroup.query.filter(
+        StudentGroup.id == group_id,
+        StudentGroup.member_count < MAX_GROUP_MEMBERS
+    ).update({'member_count': StudentGroup.member_count + 1}, synchronize_session=False) == 1
+
+def release_group_slot(group_id):
+    """Remove a member from the group's count"""
+    StudentGroup.query.filter(
+        StudentGroup.id == group_id,
+        StudentGroup.member_count > 0
+    ).update({'member_count': StudentGroup.member_count - 1}, synchronize_session=False)
+
+def remove_group_member(group, school):
+    """Release a place in the group after a student has moved out of it, deleting the group once it is empty.
+    
+    An empty group also gives back its supervisor's place and loses its
+    requests and panel. Returns True when the group was deleted.
+    """
+    release_group_slot(group.id)
+    bump_cache_version(f'group:{group.id}')
+    
+    # Check if this was the last member; the decrement above holds the row lock,
+    # so two members leaving at once cannot both see members remaining
+    remaining_members = db.session.query(StudentGroup.member_count).filter_by(id=group.id).scalar()
+    if remaining_members != 0 or db.session.query(Student.query.filter_by(group_id=group.id).exists()).scalar():
+        # Members remain, or the counter is behind the rows (sync-counters was
+        # not run); never delete a group with members
+        return False
+    
+    if group.supervisor_id:
+        release_supervisor_slot(group.supervisor_id, school)
+    SupervisorRequest.query.filter_by(group_id=group.id).delete()
+    SupervisorChangeRequest.query.filter_by(group_id=group.id).delete()
+    panel_ids = db.session.query(Panel.id).filter_by(group_id=group.id)
+    PanelMember.query.filter(PanelMember.panel_id.in_(panel_ids)).delete(synchronize_session=False)
+    Panel.query.filter_by(group_id=group.id).delete()
+    db.session.delete(group)
+    return True
+
+def reserve_supervisor_slot(supervisor_id, school):
+    """Add a group to the supervisor's count unless they are full; returns False when full"""
+    reserved = Supervisor.query.filter(
+        Supervisor.id == supervisor_id,
+        Supervisor.supervised_count < MAX_SUPERVISED_GROUPS
+    ).update({'supervised_count': Supervisor.supervised_count + 1}, synchronize_session=False) == 1
+    if reserved:
+        invalidate_user_cache(profile_cache_key('supervisor', supervisor_id))
+        bump_cache_version(f'supervisor_slots:{school}')
+    return reserved
+
+def release_supervisor_slot(supervisor_id, school):
+    """Remove a group from the supervisor's count"""
+    Supervisor.query.filter(
+        Supervisor.id == supervisor_id,
+        Supervisor.supervised_count > 0
+    ).update({'supervised_count': Supervisor.supervised_count - 1}, synchronize_session=False)
+    invalidate_user_cache(profile_cache_key('supervisor', supervisor_id))
+    bump_cache_version(f'supervisor_slots:{school}')
+
+def claim_panel_groups(group_ids):
+    """Mark the groups as having a panel; returns False when any of them already had one.
+
+    Like reserve_group_slot this is a conditional UPDATE, so two FICs creating
+    panels at the same time cannot both claim a group. The caller rolls back
+    when the claim fails.
+    """
+    claimed = 0
+    for start in range(0, len(group_ids), CACHE_VERSION_CHUNK_SIZE):
+        chunk = group_ids[start:start + CACHE_VERSION_CHUNK_SIZE]
+        claimed += StudentGroup.query.filter(
+            StudentGroup.id.in_(chunk),
+            StudentGroup.has_panel == False
+        ).update({'has_panel': True}, synchronize_session=False)
+    return claimed == len(group_ids)
+
+def allocate_group_name(branch):
+    """Return the next unused group name for the branch, e.g. CS07.
+
+    The per-branch counter is incremented with a single UPDATE, which holds
+    the row lock until the caller commits, so concurrent requests in any
+    worker never get the same name. Numbers of deleted groups are not reused.
+    """
+    increment = {'last_number': GroupNameCounter.last_number + 1}
+    updated = GroupNameCounter.query.filter_by(branch=branch).update(increment, synchronize_session=False)
+    if not updated:
+        # First group of the branch since the counter was introduced: start after existing names
+        suffixes = [name[len(branch):] for (name,) in db.session.query(StudentGroup.name).filter_by(branch=branch)]
+        last_number = max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+        try:
+            with db.session.begin_nested():
+                db.session.add(GroupNameCounter(branch=branch, last_number=last_number + 1))
+        except IntegrityError:
+            # Another request created the counter first
+            GroupNameCounter.query.filter_by(branch=branch).update(increment, synchronize_session=False)
+    
+    number = db.session.query(GroupNameCounter.last_number).filter_by(branch=branch).scalar()
+    return f"{branch}{number:02d}"
+
+def school_group_ids(school):
+    """Subquery of ids of groups that have at least one member from the school"""
+    return db.session.query(Student.group_id).filter(
+        Student.school == school,
+        Student.group_id.isnot(None)
+    )
+
+def render_block(template_name, block_name, **context):
+    """Render one {% block %} of a template, so a POST handler can return just the part of the page it changed"""
+    template = app.jinja_env.get_template(template_name)
+    app.update_template_context(context)
+    before_render_template.send(app, template=template, context=context)
+    html = ''.join(template.blocks[block_name](template.new_context(context)))
+    template_rendered.send(app, template=template, context=context)
+    return html
+
+# Static assets; `flask build-assets` writes minified copies named by content
+# hash, plus gzip and brotli versions, into static/dist
+ASSET_DIR = os.path.join(app.static_folder, 'dist')
+ASSET_MANIFEST_PATH = os.path.join(ASSET_DIR, 'manifest.json')
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+JS_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\')
+# Keywords after which a '/' starts a regular expression rather than a division
+JS_REGEX_KEYWORDS = frozenset(['return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else'])
+
+def minify_css(source):
+    """Drop comments and the whitespace CSS does not need, leaving strings alone"""
+    source = CSS_STRING_OR_COMMENT.sub(lambda match: match.group(1) or '', source)
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', source)
+    for i in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[i])
+        part = re.sub(r' ?([{};,>]) ?', r'\1', part)
+        parts[i] = part.replace(': ', ':').replace(';}', '}')
+    return ''.join(parts).strip() + '\n'
+
+def _js_word_char(char):
+    return char in JS_WORD_CHARS or char > '\x7f'
+
+def minify_js(source):
+    """Drop comments and indentation from JavaScript.
+    
+    Strings, template literals and regular expressions are copied as they are.
+    Line breaks are kept wherever automatic semicolon insertion could depend on them.
+    """
+    out = []
+    pending = ''  # whitespace seen since the last token: '', ' ' or '\n'
+    depth = 0  # open braces in code
+    templates = []  # brace depth at each ${ of the template literals we are inside
+    i, n = 0, len(source)
+    
+    def last_char():
+        return out[-1][-1] if out else ''
+    
+    def emit(token):
+        nonlocal pending
+        prev, first = last_char(), token[0]
+        if pending == '\n' and prev and prev not in '{;,([' and first not in '}]),.;':
+            out.append('\n')
+        elif pending and _js_word_char(prev) and _js_word_char(first):
+            out.append(' ')
+        elif pending and prev in '+-/.' and first in '+-/.':
+            out.append(' ')
+        pending = ''
+        out.append(token)
+    
+    def regex_allowed():
+        prev = last_char()
+        if not prev:
+            return True
+        if prev in ')]':
+            return False
+        if _js_word_char(prev):
+            # Words are emitted as whole tokens
+            return out[-1] in JS_REGEX_KEYWORDS
+        return True
+    
+    while i < n:
+        char = source[i]
+        if char in ' \t\r\n':
+            j = i
+            while j < n and source[j] in ' \t\r\n':
+                j += 1
+            if out:
+                pending = '\n' if '\n' in source[i:j] or pending == '\n' else ' '
+            i = j
+        elif source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j == -1 else j
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            j = n if j == -1 else j + 2
+            if out:
+                pending = '\n' if '\n' in source[i:j] or pending == '\n' else ' '
+            i = j
+        elif char in '\'"':
+            j = i + 1
+            while j < n and source[j] != char:
+                j += 2 if source[j] == '\\' else 1
+            emit(source[i:j + 1])
+            i = j + 1
+        elif char == '`' or (char == '}' and templates and templates[-1] == depth):
+            if char == '}':
+                templates.pop()
+            j = i + 1
+            while j < n and source[j] != '`' and not source.startswith('${', j):
+                j += 2 if source[j] == '\\' else 1
+            if source.startswith('${', j):
+                templates.append(depth)
+                j += 2
+            else:
+                j += 1
+            emit(source[i:j])
+            i = j
+        elif char == '/' and regex_allowed():
+            j, in_class = i + 1, False
+            while j < n and (source[j] != '/' or in_class):
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and _js_word_char(source[j]):
+                j += 1
+            emit(source[i:j])
+            i = j
+        else:
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            j = i + 1
+            if _js_word_char(char):
+                while j < n and _js_word_char(source[j]):
+                    j += 1
+            emit(source[i:j])
+            i = j
+    
+    return ''.join(out) + '\n'
+
+ASSET_MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def build_assets():
+    """Minify, fingerprint and precompress every stylesheet and script in static/, returning the manifest"""
+    sources = []
+    for folder, dirs, names in os.walk(app.static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(folder, d) != ASSET_DIR)
+        for name in sorted(names):
+            if os.path.splitext(name)[1] in ASSET_MINIFIERS:
+                sources.append(os.path.relpath(os.path.join(folder, name), app.static_folder).replace(os.sep, '/'))
+    
+    if os.path.isdir(ASSET_DIR):
+        shutil.rmtree(ASSET_DIR)
+    
+    manifest = {}
+    for source in sources:
+        stem, ext = os.path.splitext(source)
+        with open(os.path.join(app.static_folder, source), encoding='utf-8') as f:
+            content = ASSET_MINIFIERS[ext](f.read()).encode('utf-8')
+        built = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+        path = os.path.join(ASSET_DIR, built)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for suffix, data in (('', content),
+                             ('.gz', gzip.compress(content, compresslevel=9, mtime=0)),
+                             ('.br', brotli.compress(content, quality=11))):
+            with open(path + suffix, 'wb') as f:
+                f.write(data)
+        manifest[source] = built
+    
+    with open(ASSET_MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_asset_manifest():
+    """Map of static file name to fingerprinted name, empty until build-assets has run"""
+    try:
+        with open(ASSET_MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+ASSET_MANIFEST = load_asset_manifest()
+ASSET_FILES = frozenset(ASSET_MANIFEST.values())
+
+@app.template_global()
+def asset_url(filename):
+    """url_for('static') that links the fingerprinted build of the file when there is one"""
+    if filename in ASSET_MANIFEST:
+        return url_for('asset', filename=ASSET_MANIFEST[filename])
+    return url_for('static', filename=filename)
+
+def _dashboard_build():
+    digest = hashlib.sha1()
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    paths = [os.path.abspath(__file__)] + sorted(os.path.join(template_dir, name) for name in os.listdir(template_dir))
+    if os.path.exists(ASSET_MANIFEST_PATH):
+        # Pages link assets by content hash, so a rebuilt asset is a new page
+        paths.append(ASSET_MANIFEST_PATH)
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+# Part of every dashboard ETag, so pages rendered by an older deploy are not revalidated
+DASHBOARD_BUILD = _dashboard_build()
+
+def dashboard_etag(keys):
+    """Per-viewer version stamp of a dashboard, from the cache versions of everything it shows"""
+    versions = get_cache_versions(keys)
+    stamp = ';'.join(f'{key}={version}' for key, version in sorted(versions.items()))
+    return hashlib.sha1(f'{DASHBOARD_BUILD};{stamp}'.encode()).hexdigest()
+
+def dashboard_response(etag, body=None):
+    """Dashboard page tagged with its ETag, or 304 Not Modified when there is no body"""
+    response = app.make_response(body) if body is not None else app.response_class(status=304)
+    response.set_etag(etag)
+    # Browsers must revalidate every time and shared caches must not keep a copy
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def student_dashboard_keys(student):
+    keys = [
+        user_cache_key(student.user_id),
+        profile_cache_key('student', student.id),
+        f'invites:{student.id}',
+        f'supervisors:{student.school}',
+        f'supervisor_slots:{student.school}',
+        'notifications:all',
+        'notifications:students',
+        f'notifications:branch:{student.branch}'
+    ]
+    if student.group_id:
+        keys.append(f'group:{student.group_id}')
+    return keys
+
+def supervisor_dashboard_keys(supervisor):
+    # Every group the page shows: supervised, requesting, changing away and on a panel with
+    group_ids = db.session.query(StudentGroup.id).filter(
+        StudentGroup.supervisor_id == supervisor.id
+    ).union(
+        db.session.query(SupervisorRequest.group_id).filter_by(supervisor_id=supervisor.id, status='pending'),
+        db.session.query(SupervisorChangeRequest.group_id).filter_by(current_supervisor_id=supervisor.id, status='pending'),
+        db.session.query(Panel.group_id).join(PanelMember, PanelMember.panel_id == Panel.id).filter(
+            PanelMember.supervisor_id == supervisor.id
+        )
+    ).all()
+    return [
+        user_cache_key(supervisor.user_id),
+        profile_cache_key('supervisor', supervisor.id),
+        'notifications:all',
+        'notifications:supervisors'
+    ] + [f'group:{row[0]}' for row in group_ids]
+
+def fic_dashboard_keys(fic):
+    group_ids = school_group_ids(fic.school).distinct().all()
+    return [
+        user_cache_key(fic.user_id),
+        f'sent_notifications:{fic.id}',
+        f'supervisors:{fic.school}',
+        f'supervisor_slots:{fic.school}'
+    ] + [f'group:{row[0]}' for row in group_ids]
+
+def load_school_groups(group_ids):
+    """Load groups with their members, supervisor and panel members eagerly loaded"""
+    return StudentGroup.query.filter(
+        StudentGroup.id.in_(group_ids)
+    ).options(
+        selectinload(StudentGroup.students),
+        joinedload(StudentGroup.supervisor),
+        selectinload(StudentGroup.panels).selectinload(Panel.members).joinedload(PanelMember.supervisor)
+    ).order_by(StudentGroup.id).all()
+
+def load_school_supervisors(school):
+    """Return the school's supervisors and {supervisor id: {'supervised', 'panels'}} counts"""
+    panel_counts = db.session.query(
+        PanelMember.supervisor_id.label('supervisor_id'),
+        db.func.count(PanelMember.id).label('panel_count')
+    ).group_by(PanelMember.supervisor_id).subquery()
+    
+    supervisor_rows = db.session.query(
+        Supervisor,
+        db.func.coalesce(panel_counts.c.panel_count, 0)
+    ).outerjoin(
+        panel_counts, panel_counts.c.supervisor_id == Supervisor.id
+    ).filter(
+        Supervisor.school == school
+    ).options(
+        joinedload(Supervisor.user)
+    ).order_by(Supervisor.id).all()
+    
+    school_supervisors = [row[0] for row in supervisor_rows]
+    supervisor_counts = {
+        supervisor.id: {'supervised': supervisor.supervised_count, 'panels': panels}
+        for supervisor, panels in supervisor_rows
+    }
+    return school_supervisors, supervisor_counts
+
+def load_fic_change_requests(group_ids):
+    """Pending supervisor change requests of the given groups"""
+    return SupervisorChangeRequest.query.filter(
+        SupervisorChangeRequest.group_id.in_(group_ids),
+        SupervisorChangeRequest.status == 'pending'
+    ).options(
+        joinedload(SupervisorChangeRequest.group).selectinload(StudentGroup.students),
+        joinedload(SupervisorChangeRequest.current_supervisor),
+        joinedload(SupervisorChangeRequest.new_supervisor)
+    ).all()
+
+def load_fic_dashboard(fic):
+    """Load everything the FIC dashboard renders in a fixed number of queries.
+
+    Groups come with their members, supervisor and panel members eagerly
+    loaded, and per-supervisor panel counts are computed in SQL so the
+    template never triggers a lazy load.
+    """
+    group_ids = school_group_ids(fic.school)
+    school_groups = load_school_groups(group_ids)
+    school_supervisors, supervisor_counts = load_school_supervisors(fic.school)
+    branches = sorted({group.branch for group in school_groups})
+    
+    return {
+        'school_groups': school_groups,
+        'school_supervisors': school_supervisors,
+        'supervisor_counts': supervisor_counts,
+        'supervisor_change_requests': load_fic_change_requests(group_ids),
+        'branches': branches
+    }
+
+def load_sent_notifications(fic):
+    return Notification.query.filter_by(created_by=fic.id).order_by(Notification.created_at.desc()).limit(10).all()
+
+def render_fic_group_fragments(fic, group_id):
+    """Re-render a group's card and the supervisors table after the group's panel or supervisor changed"""
+    school_supervisors, supervisor_counts = load_school_supervisors(fic.school)
+    fragments = {
+        'school_supervisors': render_block(
+            'fic_dashboard.html', 'school_supervisors',
+            fic=fic, school_supervisors=school_supervisors, supervisor_counts=supervisor_counts
+        )
+    }
+    for group in load_school_groups([group_id]):
+        fragments[f'group_card_{group.id}'] = render_block(
+            'fic_dashboard.html', 'group_card', group=group, school_supervisors=school_supervisors
+        )
+    return fragments
+
+def load_supervised_groups(supervisor):
+    """Groups the supervisor supervises, with the marks they gave keyed by student id"""
+    supervised_groups = StudentGroup.query.filter_by(
+        supervisor_id=supervisor.id
+    ).options(
+        selectinload(StudentGroup.students)
+    ).order_by(StudentGroup.id).all()
+    
+    supervisor_marks = {
+        marks.student_id: marks
+        for marks in Marks.query.filter_by(given_by=supervisor.id).all()
+    }
+    return {'supervised_groups': supervised_groups, 'supervisor_marks': supervisor_marks}
+
+def load_pending_supervisor_requests(supervisor):
+    return SupervisorRequest.query.filter_by(
+        supervisor_id=supervisor.id,
+        status='pending'
+    ).options(
+        joinedload(SupervisorRequest.group).selectinload(StudentGroup.students)
+    ).all()
+
+def load_panel_memberships(supervisor):
+    return PanelMember.query.filter_by(
+        supervisor_id=supervisor.id
+    ).options(
+        joinedload(PanelMember.panel).joinedload(Panel.group),
+        joinedload(PanelMember.panel).joinedload(Panel.fic)
+    ).order_by(PanelMember.id).all()
+
+def load_supervisor_dashboard(supervisor):
+    """Load everything the supervisor dashboard renders in a fixed number of queries.
+
+    Marks are keyed by student id and restricted to the ones this supervisor
+    gave, so a student marked by several supervisors shows the right row.
+    """
+    # Get supervisor change requests where this supervisor is the current supervisor
+    supervisor_change_requests = SupervisorChangeRequest.query.filter_by(
+        current_supervisor_id=supervisor.id,
+        status='pending'
+    ).options(
+        joinedload(SupervisorChangeRequest.group),
+        joinedload(SupervisorChangeRequest.new_supervisor)
+    ).all()
+    
+    return {
+        'pending_requests': load_pending_supervisor_requests(supervisor),
+        'supervisor_change_requests': supervisor_change_requests,
+        'panel_memberships': load_panel_memberships(supervisor),
+        **load_supervised_groups(supervisor)
+    }
+
+def load_student_dashboard(student):
+    """Load the group, invites and supervisor choices the student dashboard renders"""
+    group = None
+    group_members = []
+    invites = GroupInvite.query.filter_by(receiver_id=student.id, status='pending').all()
+    
+    if student.group_id:
+        group = StudentGroup.query.get(student.group_id)
+        group_members = Student.query.filter_by(group_id=student.group_id).all()
+    
+    # Get available supervisors for the student's school
+    available_supervisors = Supervisor.query.filter_by(school=student.school).all()
+    
+    # Get supervisor change requests for the group
+    supervisor_change_requests = []
+    if group and group.supervisor_id:
+        supervisor_change_requests = SupervisorChangeRequest.query.filter_by(
+            group_id=group.id
+        ).all()
+    
+    return {
+        'student': student,
+        'group': group,
+        'group_members': group_members,
+        'invites': invites,
+        'available_supervisors': available_supervisors,
+        'max_supervised_groups': MAX_SUPERVISED_GROUPS,
+        'supervisor_change_requests': supervisor_change_requests
+    }
+
+def render_student_group_sections(student):
+    """Re-render every section that depends on the student's group, after they join or leave one"""
+    return {
+        'group_sections': render_block('student_dashboard.html', 'group_sections', **load_student_dashboard(student))
+    }
+
+# Automatic panel assignment
+PANEL_SIZE = 3
+# A panel member outside the group's domain counts as this many extra panels,
+# so domain matches win unless they are more than one panel busier
+PANEL_DOMAIN_MISMATCH_PENALTY = 1
+
+def assign_panels(groups, supervisors, loads, exclude_own_supervisor=False):
+    """Pick PANEL_SIZE supervisors for every group, balancing panel counts.
+    
+    groups is a list of (group id, supervisor id, domain), where domain is
+    the domain of the group's supervisor; supervisors maps supervisor id to
+    domain and loads maps supervisor id to existing panel count. Returns
+    {group id: [supervisor ids]}, or None when there are too few supervisors.
+    
+    Greedy over two heaps of (load, supervisor id): one for everybody and one
+    per domain. Entries are never updated in place; a supervisor's new load
+    is pushed as a fresh entry and outdated ones are dropped when popped, so
+    each group costs O(log n).
+    """
+    needed = PANEL_SIZE + (1 if exclude_own_supervisor else 0)
+    if len(supervisors) < needed:
+        return None
+    
+    loads = {supervisor_id: loads.get(supervisor_id, 0) for supervisor_id in supervisors}
+    everyone = [(load, supervisor_id) for supervisor_id, load in loads.items()]
+    by_domain = {}
+    for supervisor_id, domain in supervisors.items():
+        by_domain.setdefault(domain, []).append((loads[supervisor_id], supervisor_id))
+    heapq.heapify(everyone)
+    for heap in by_domain.values():
+        heapq.heapify(heap)
+    
+    def pop_least_loaded(heap, count, skip):
+        """Pop up to count current entries, leaving skipped supervisors in the heap"""
+        popped = []
+        skipped = []
+        while heap and len(popped) < count:
+            load, supervisor_id = heapq.heappop(heap)
+            if load != loads[supervisor_id]:
+                continue  # outdated entry
+            (skipped if supervisor_id in skip else popped).append((load, supervisor_id))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return popped
+    
+    assignments = {}
+    for group_id, group_supervisor_id, domain in groups:
+        skip = {group_supervisor_id} if exclude_own_supervisor else set()
+        matches = pop_least_loaded(by_domain.get(domain, []), PANEL_SIZE, skip)
+        others = pop_least_loaded(everyone, PANEL_SIZE + len(matches), skip)
+    
+        candidates = {supervisor_id: load for load, supervisor_id in matches}
+        for load, supervisor_id in others:
+            candidates.setdefault(supervisor_id, load + (
+                0 if supervisors[supervisor_id] == domain else PANEL_DOMAIN_MISMATCH_PENALTY
+            ))
+        chosen = sorted(candidates, key=lambda supervisor_id: (candidates[supervisor_id], supervisor_id))[:PANEL_SIZE]
+        assignments[group_id] = chosen
+    
+        for supervisor_id in chosen:
+            loads[supervisor_id] += 1
+        # Give every popped or chosen supervisor one entry with its current load
+        # in each heap it belongs to; the chosen ones' old entries are now outdated
+        for supervisor_id in {entry[1] for entry in others}.union(chosen):
+            heapq.heappush(everyone, (loads[supervisor_id], supervisor_id))
+        for supervisor_id in {entry[1] for entry in matches}.union(chosen):
+            heapq.heappush(by_domain[supervisors[supervisor_id]], (loads[supervisor_id], supervisor_id))
+    return assignments
+
+def auto_assign_panels(fic, exclude_own_supervisor=False):
+    """Create panels for every group in the FIC's school that has none.
+    
+    Returns the number of panels created, or None when the school has too
+    few supervisors.
+    """
+    groups = db.session.query(
+        StudentGroup.id, StudentGroup.supervisor_id, Supervisor.domain
+    ).outerjoin(
+        Supervisor, StudentGroup.supervisor_id == Supervisor.id
+    ).filter(
+        StudentGroup.id.in_(school_group_ids(fic.school)),
+        StudentGroup.has_panel == False
+    ).order_by(StudentGroup.id).all()
+    if not groups:
+        return 0
+    
+    supervisors = dict(db.session.query(Supervisor.id, Supervisor.domain).filter_by(school=fic.school).all())
+    loads = dict(db.session.query(
+        PanelMember.supervisor_id, db.func.count(PanelMember.id)
+    ).filter(
+        PanelMember.supervisor_id.in_(db.session.query(Supervisor.id).filter_by(school=fic.school))
+    ).group_by(PanelMember.supervisor_id).all())
+    
+    assignments = assign_panels(groups, supervisors, loads, exclude_own_supervisor)
+    if assignments is None:
+        return None
+    
+    group_ids = list(assignments)
+    if not claim_panel_groups(group_ids):
+        # Another assignment or a manual panel got to some of these groups
+        # first; start over with the groups that are still without one
+        db.session.rollback()
+        return auto_assign_panels(fic, exclude_own_supervisor)
+    
+    # Insert the panels, read back their ids and insert the members, all in one transaction
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Panel), [
+        {'group_id': group_id, 'created_by': fic.id, 'created_at': now} for group_id in group_ids
+    ])
+    panel_ids = dict(db.session.query(Panel.group_id, Panel.id).filter(
+        Panel.group_id.in_(school_group_ids(fic.school))
+    ).all())
+    db.session.execute(db.insert(PanelMember), [
+        {'panel_id': panel_ids[group_id], 'supervisor_id': supervisor_id}
+        for group_id, supervisor_ids in assignments.items()
+        for supervisor_id in supervisor_ids
+    ])
+    bump_cache_versions(f'group:{group_id}' for group_id in group_ids)
+    db.session.commit()
+    return len(assignments)
+
+# Supervisor recommendations from a per-school TF-IDF index of supervisor
+# domains, as {school: SupervisorIndex}; supervisor registrations bump the
+# 'supervisors:<school>' cache version
+RECOMMENDATION_LIMIT = 5
+# Keeps free capacity in the ranking when a project shares no words with any domain
+RECOMMENDATION_BASE_SIMILARITY = 0.1
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset('a an and based by for from in into of on or system the to using with'.split())
+ABBREVIATIONS = {
+    'ai': 'artificial intelligence',
+    'ml': 'machine learning',
+    'dl': 'deep learning',
+    'nlp': 'natural language processing',
+    'cv': 'computer vision',
+    'iot': 'internet of things'
+}
+_supervisor_indexes = {}
+_supervisor_index_lock = threading.Lock()
+
+def tokenize(text):
+    """Lowercase words with abbreviations expanded, stop words dropped and plurals folded"""
+    tokens = []
+    for word in TOKEN_PATTERN.findall((text or '').lower()):
+        for token in ABBREVIATIONS.get(word, word).split():
+            if token in STOP_WORDS:
+                continue
+            if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+                token = token[:-1]
+            tokens.append(token)
+    return tokens
+
+class SupervisorIndex:
+    """Term counts and postings for one school's supervisor domains.
+    
+    Weights are derived from the current document counts when queried and
+    memoized until the next supervisor is added, so adding one only touches
+    that supervisor's terms.
+    """
+    
+    def __init__(self):
+        self.version = None
+        self.last_id = 0
+        self.term_counts = {}  # supervisor id -> Counter of domain terms
+        self.postings = {}  # term -> ids of supervisors whose domain has it
+        self._idfs = {}
+        self._norms = {}
+    
+    def add(self, supervisor_id, domain):
+        counts = Counter(tokenize(domain))
+        self.term_counts[supervisor_id] = counts
+        for term in counts:
+            self.postings.setdefault(term, set()).add(supervisor_id)
+        self.last_id = max(self.last_id, supervisor_id)
+        # Document counts changed, so every weight may have
+        self._idfs = {}
+        self._norms = {}
+    
+    def idf(self, term):
+        if term not in self._idfs:
+            self._idfs[term] = math.log((1 + len(self.term_counts)) / (1 + len(self.postings.get(term, ())))) + 1
+        return self._idfs[term]
+    
+    def norm(self, supervisor_id):
+        if supervisor_id not in self._norms:
+            self._norms[supervisor_id] = math.sqrt(sum(
+                (count * self.idf(term)) ** 2 for term, count in self.term_counts[supervisor_id].items()
+            ))
+        return self._norms[supervisor_id]
+    
+    def similarities(self, text):
+        """Cosine similarity of text to every supervisor sharing a term with it"""
+        query = {term: count * self.idf(term) for term, count in Counter(tokenize(text)).items()}
+        scores = {}
+        for term, weight in query.items():
+            for supervisor_id in self.postings.get(term, ()):
+                scores[supervisor_id] = scores.get(supervisor_id, 0) + \
+                    weight * self.term_counts[supervisor_id][term] * self.idf(term)
+        if not scores:
+            return {}
+    
+        query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        return {supervisor_id: score / (query_norm * self.norm(supervisor_id))
+                for supervisor_id, score in scores.items()}
+
+def load_supervisor_index(school):
+    """The school's supervisor index, extended with supervisors registered since it was built"""
+    version = get_cache_versions([f'supervisors:{school}'])[f'supervisors:{school}']
+    with _supervisor_index_lock:
+        index = _supervisor_indexes.setdefault(school, SupervisorIndex())
+        if index.version != version:
+            # Supervisors are only ever added, so only rows past last_id are new
+            for supervisor_id, domain in db.session.query(Supervisor.id, Supervisor.domain).filter(
+                Supervisor.school == school,
+                Supervisor.id > index.last_id
+            ).order_by(Supervisor.id):
+                index.add(supervisor_id, domain)
+            index.version = version
+    return index
+
+def recommend_supervisors(group, school, limit=RECOMMENDATION_LIMIT):
+    """Rank supervisors with free capacity by how well their domain matches the project.
+    
+    Score is (similarity + RECOMMENDATION_BASE_SIMILARITY) times the share of
+    supervision slots still free. The group's current supervisor and the ones
+    it already sent requests to are left out.
+    """
+    index = load_supervisor_index(school)
+    similarities = index.similarities(f"{group.project_title or ''} {group.project_description or ''}")
+    
+    requested = {row[0] for row in db.session.query(SupervisorRequest.supervisor_id).filter_by(group_id=group.id)}
+    candidates = db.session.query(Supervisor.id, Supervisor.name, Supervisor.domain, Supervisor.supervised_count).filter(
+        Supervisor.school == school,
+        Supervisor.supervised_count < MAX_SUPERVISED_GROUPS
+    ).all()
+    
+    ranked = []
+    for supervisor_id, name, domain, supervised_count in candidates:
+        if supervisor_id == group.supervisor_id or supervisor_id in requested:
+            continue
+        similarity = similarities.get(supervisor_id, 0)
+        remaining = MAX_SUPERVISED_GROUPS - supervised_count
+        ranked.append({
+            'id': supervisor_id,
+            'name': name,
+            'domain': domain,
+            'remaining_slots': remaining,
+            'similarity': round(similarity, 3),
+            'score': round((similarity + RECOMMENDATION_BASE_SIMILARITY) * remaining / MAX_SUPERVISED_GROUPS, 3)
+        })
+    return heapq.nlargest(limit, ranked, key=lambda entry: (entry['score'], -entry['id']))
+
+# Marks analytics per school, as {school: (version, analytics)}; every marks
+# write bumps the 'marks' cache version
+MARKS_FIELDS = {'presentation': 10, 'documents': 10, 'collaboration': 10, 'total': 30}
+MARKS_HISTOGRAM_BUCKETS = 10
+MARKS_PERCENTILES = {'p25': 25, 'median': 50, 'p75': 75, 'p90': 90}
+_marks_analytics = {}
+
+def _marks_per_student(school):
+    """CTE of each marked student's marks in the school, averaged over the supervisors who marked them"""
+    return db.select(
+        Marks.student_id, Student.branch, Student.year,
+        *[db.func.avg(db.func.coalesce(getattr(Marks, field), 0)).label(field) for field in MARKS_FIELDS]
+    ).select_from(Marks).join(Student, Marks.student_id == Student.id).where(
+        Student.school == school
+    ).group_by(Marks.student_id, Student.branch, Student.year).cte('marks_per_student')
+
+def _marks_samples(school, per_student):
+    """Subquery of (dimension, group_key, *MARKS_FIELDS) rows that each distribution is computed over.
+
+    The school, branch and year distributions count every student once; a
+    supervisor's distribution has the marks that supervisor gave.
+    """
+    student_values = [per_student.c[field] for field in MARKS_FIELDS]
+    given_values = [db.func.coalesce(getattr(Marks, field), 0).label(field) for field in MARKS_FIELDS]
+    return db.union_all(
+        db.select(db.literal('overall').label('dimension'), db.literal('').label('group_key'), *student_values),
+        db.select(db.literal('branch'), per_student.c.branch, *student_values),
+        db.select(db.literal('year'), per_student.c.year, *student_values),
+        db.select(db.literal('supervisor'), db.cast(Marks.given_by, db.String(20)), *given_values).select_from(
+            Marks
+        ).join(Student, Marks.student_id == Student.id).where(Student.school == school)
+    ).subquery()
+
+def _query_marks_distributions(samples):
+    """Count, mean, min, max, histogram and percentiles of every field per (dimension, group_key), in one query.
+
+    Each sample is numbered within its distribution in order of every field,
+    so a percentile is interpolated between the two values either side of
+    its position, as numpy's default does. Histogram buckets are counted
+    from how many values reach each bucket's lower edge.
+    """
+    partition = (samples.c.dimension, samples.c.group_key)
+    ranked = db.select(
+        samples,
+        (db.func.count().over(partition_by=partition) - 1).label('last_position'),
+        *[(db.func.row_number().over(partition_by=partition, order_by=samples.c[field]) - 1).label(f'{field}_position')
+          for field in MARKS_FIELDS]
+    ).subquery()
+    
+    columns = [ranked.c.dimension, ranked.c.group_key, db.func.count()]
+    for field, maximum in MARKS_FIELDS.items():
+        value, position = ranked.c[field], ranked.c[f'{field}_position']
+        width = maximum / MARKS_HISTOGRAM_BUCKETS
+        columns += [db.func.avg(value), db.func.min(value), db.func.max(value)]
+        columns += [db.func.sum(db.case((value >= width * bucket, 1), else_=0)) for bucket in range(1, MARKS_HISTOGRAM_BUCKETS)]
+        # Integer comparisons, so positions never suffer from float rounding
+        for q in MARKS_PERCENTILES.values():
+            columns += [
+                db.func.max(db.case((position * 100 <= ranked.c.last_position * q, value))),
+                db.func.min(db.case((position * 100 >= ranked.c.last_position * q, value)))
+            ]
+    
+    distributions = {}
+    for dimension, group_key, count, *aggregates in db.session.execute(
+        db.select(*columns).group_by(ranked.c.dimension, ranked.c.group_key)
+    ):
+        aggregates = iter(float(value) for value in aggregates)
+        summaries = {}
+        for field, maximum in MARKS_FIELDS.items():
+            mean, minimum, maximum_value = next(aggregates), next(aggregates), next(aggregates)
+            reaching = [count] + [int(next(aggregates)) for _ in range(MARKS_HISTOGRAM_BUCKETS - 1)] + [0]
+            summary = {
+                'count': count,
+                'mean': round(mean, 2),
+                'min': minimum,
+                'max': maximum_value,
+                'histogram': {
+                    'bucket_width': maximum / MARKS_HISTOGRAM_BUCKETS,
+                    'counts': [reaching[bucket] - reaching[bucket + 1] for bucket in range(MARKS_HISTOGRAM_BUCKETS)]
+                }
+            }
+            for name, q in MARKS_PERCENTILES.items():
+                lower, upper = next(aggregates), next(aggregates)
+                summary[name] = round(lower + (upper - lower) * ((count - 1) * q % 100) / 100, 2)
+            summaries[field] = summary
+        distributions.setdefault(dimension, {})[group_key] = summaries
+    return distributions
+
+def _compute_marks_analytics(school):
+    per_student = _marks_per_student(school)
+    distributions = _query_marks_distributions(_marks_samples(school, per_student))
+    empty = {field: {'count': 0} for field in MARKS_FIELDS}
+    
+    by_supervisor = distributions.get('supervisor', {})
+    supervisor_names = dict(db.session.query(Supervisor.id, Supervisor.name).filter(
+        Supervisor.id.in_([int(supervisor_id) for supervisor_id in by_supervisor])
+    ).all()) if by_supervisor else {}
+    
+    # Competition ranks (1, 2, 2, 4) by total, across the school and within each branch
+    total = per_student.c.total
+    school_rank = db.func.rank().over(order_by=total.desc()).label('school_rank')
+    branch_rank = db.func.rank().over(partition_by=per_student.c.branch, order_by=total.desc()).label('branch_rank')
+    ranks = db.session.execute(db.select(
+        Student.id, Student.name, Student.roll_number, Student.branch, Student.year, StudentGroup.supervisor_id,
+        total, school_rank, branch_rank
+    ).select_from(per_student).join(
+        Student, Student.id == per_student.c.student_id
+    ).outerjoin(
+        StudentGroup, Student.group_id == StudentGroup.id
+    ).order_by(school_rank, Student.roll_number)).all()
+    
+    return {
+        'school': school,
+        'overall': distributions.get('overall', {}).get('', empty),
+        'by_branch': dict(sorted(distributions.get('branch', {}).items())),
+        'by_year': dict(sorted(distributions.get('year', {}).items())),
+        'by_supervisor': [{
+            'supervisor_id': supervisor_id,
+            'name': supervisor_names.get(supervisor_id),
+            'stats': by_supervisor[str(supervisor_id)]
+        } for supervisor_id in sorted(int(key) for key in by_supervisor)],
+        'ranks': [{
+            'student_id': row.id,
+            'name': row.name,
+            'roll_number': row.roll_number,
+            'branch': row.branch,
+            'year': row.year,
+            'supervisor_id': row.supervisor_id,
+            'total': float(row.total),
+            'rank': row.school_rank,
+            'branch_rank': row.branch_rank
+        } for row in ranks]
+    }
+
+def load_marks_analytics(school):
+    """Marks distributions for a school, recomputed only after marks change"""
+    version = get_cache_versions(['marks'])['marks']
+    cached = _marks_analytics.get(school)
+    if cached is None or cached[0] != version:
+        cached = (version, _compute_marks_analytics(school))
+        _marks_analytics[school] = cached
+    return cached[1]
+
+# Bulk account import from CSV
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_COLUMNS = {
+    'student': ('name', 'email', 'roll_number', 'year', 'branch'),
+    'supervisor': ('name', 'email', 'domain')
+}
+STUDENT_YEARS = ('Third', 'Fourth')
+STUDENT_BRANCHES = ('CS', 'ECS', 'IT', 'ETC', 'Civil', 'Mech', 'Aerospace', 'EE')
+# Stored instead of a hash for imported accounts without a password; it never
+# verifies, so the user sets a password through Forgot Password
+UNUSABLE_PASSWORD = '!'
+
+def validate_import_rows(reader, role):
+    """Split CSV rows into valid rows and per-row errors.
+    
+    Duplicate emails and roll numbers are checked within the file and, in
+    chunks, against the database with IN queries.
+    """
+    valid = []
+    errors = []
+    seen_emails = set()
+    seen_rolls = set()
+    for line, raw in enumerate(reader, start=2):
+        row = {key.strip().lower(): (value or '').strip() for key, value in raw.items() if key}
+        missing = [column for column in IMPORT_COLUMNS[role] if not row.get(column)]
+        error = None
+        if missing:
+            error = f"Missing {', '.join(missing)}"
+        elif '@' not in row['email']:
+            error = 'Invalid email'
+        elif row['email'] in seen_emails:
+            error = 'Duplicate email in file'
+        elif role == 'student' and row['year'] not in STUDENT_YEARS:
+            error = 'Invalid year'
+        elif role == 'student' and row['branch'] not in STUDENT_BRANCHES:
+            error = 'Invalid branch'
+        elif role == 'student' and row['roll_number'] in seen_rolls:
+            error = 'Duplicate roll number in file'
+    
+        if error:
+            errors.append({'line': line, 'email': row.get('email', ''), 'error': error})
+            continue
+        seen_emails.add(row['email'])
+        if role == 'student':
+            seen_rolls.add(row['roll_number'])
+        row['line'] = line
+        valid.append(row)
+    
+    registered_emails = set()
+    registered_rolls = set()
+    for start in range(0, len(valid), IMPORT_CHUNK_SIZE):
+        chunk = valid[start:start + IMPORT_CHUNK_SIZE]
+        registered_emails.update(row[0] for row in db.session.query(User.email).filter(
+            User.email.in_([row['email'] for row in chunk])
+        ))
+        if role == 'student':
+            registered_rolls.update(row[0] for row in db.session.query(Student.roll_number).filter(
+                Student.roll_number.in_([row['roll_number'] for row in chunk])
+            ))
+    
+    accepted = []
+    for row in valid:
+        if row['email'] in registered_emails:
+            errors.append({'line': row['line'], 'email': row['email'], 'error': 'Email already registered'})
+        elif role == 'student' and row['roll_number'] in registered_rolls:
+            errors.append({'line': row['line'], 'email': row['email'], 'error': 'Roll number already registered'})
+        else:
+            accepted.append(row)
+    return accepted, errors
+
+def _insert_accounts(rows, role, school):
+    """Bulk insert users, their profiles and welcome emails for validated rows"""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [
+        {'email': row['email'], 'password': row['password_hash'], 'role': role, 'created_at': now}
+        for row in rows
+    ])
+    user_ids = dict(db.session.query(User.email, User.id).filter(
+        User.email.in_([row['email'] for row in rows])
+    ).all())
+    
+    if role == 'student':
+        db.session.execute(db.insert(Student), [{
+            'user_id': user_ids[row['email']],
+            'name': row['name'],
+            'roll_number': row['roll_number'],
+            'year': row['year'],
+            'school': school,
+            'branch': row['branch']
+        } for row in rows])
+    else:
+        db.session.execute(db.insert(Supervisor), [{
+            'user_id': user_ids[row['email']],
+            'name': row['name'],
+            'domain': row['domain'],
+            'school': school
+        } for row in rows])
+        bump_cache_version(f'supervisors:{school}')
+    
+    welcome = [{
+        'recipient': row['email'],
+        'subject': 'Your account - Project Management System',
+        'body': f'''An account has been created for you on the Project Management System.
+
+Email: {row['email']}
+Role: {role.capitalize()}
+
+To sign in, set your password using "Forgot Password" on the login page.
+'''
+    } for row in rows if row['password_hash'] == UNUSABLE_PASSWORD]
+    if welcome:
+        db.session.execute(db.insert(OutboundEmail), welcome)
+
+def import_accounts(csv_file, role, school, progress=None):
+    """Create accounts from a CSV file for one school.
+    
+    Valid rows are inserted and committed IMPORT_CHUNK_SIZE at a time; rows
+    that fail validation are skipped and reported. Accounts without a
+    password column get a welcome email asking them to set one. progress is
+    called with (rows done, rows to import) after every chunk.
+    """
+    rows, errors = validate_import_rows(csv.DictReader(csv_file), role)
+    
+    passwords = [row['password'] for row in rows if row.get('password')]
+    hashes = iter(hash_passwords(passwords))
+    for row in rows:
+        row['password_hash'] = next(hashes) if row.get('password') else UNUSABLE_PASSWORD
+    
+    created = 0
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        try:
+            _insert_accounts(chunk, role, school)
+            db.session.commit()
+            created += len(chunk)
+        except IntegrityError:
+            # An email or roll number was registered since validation; retry
+            # the chunk one row at a time to find it
+            db.session.rollback()
+            for row in chunk:
+                try:
+                    with db.session.begin_nested():
+                        _insert_accounts([row], role, school)
+                    created += 1
+                except IntegrityError:
+                    errors.append({'line': row['line'], 'email': row['email'],
+                                   'error': 'Email or roll number already registered'})
+            db.session.commit()
+        if progress:
+            progress(start + len(chunk), len(rows))
+    
+    errors.sort(key=lambda error: error['line'])
+    return {'created': created, 'errors': errors}
 
 def init_db():
     """Initialize database and create tables"""
@@ -226,15 +2193,176 @@ def init_db():
         except Exception as e:
             print(f"❌ Database initialization error: {e}")
 
+def upgrade_db():
+    """Bring an existing database up to the models and return the changes made; safe to run repeatedly.
+    
+    db.create_all() only creates missing tables, so columns, indexes and
+    unique constraints added to existing tables are added here. The
+    member_count, supervised_count and has_panel columns are recomputed
+    afterwards, as they start at 0 when added and writes made by older code
+    running during a deploy do not maintain them.
+    """
+    db.create_all()
+    dialect = db.engine.dialect
+    preparer = dialect.identifier_preparer
+    changes = []
+    
+    with db.engine.begin() as connection:
+        inspector = db.inspect(connection)
+        for table in db.metadata.sorted_tables:
+            table_name = preparer.format_table(table)
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                ddl = f"ALTER TABLE {table_name} ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect)}"
+                if column.default is not None and column.default.is_scalar:
+                    default = db.literal(column.default.arg).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+                    ddl += f" DEFAULT {default}"
+                if not column.nullable and not column.primary_key:
+                    ddl += " NOT NULL"
+                connection.execute(db.text(ddl))
+                changes.append(f"added column {table.name}.{column.name}")
+            
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            existing_indexes.update(constraint['name'] for constraint in inspector.get_unique_constraints(table.name))
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing_indexes:
+                    index.create(connection)
+                    changes.append(f"added index {index.name}")
+            
+            # Column-level unique constraints are unnamed and date from the original schema
+            for constraint in table.constraints:
+                if not isinstance(constraint, db.UniqueConstraint) or constraint.name in existing_indexes | {None}:
+                    continue
+                columns = ', '.join(preparer.format_column(column) for column in constraint.columns)
+                # Keep only the newest row of each duplicate, which for otp is
+                # the code that was sent last; the derived table lets MySQL
+                # delete from the table it selects from
+                connection.execute(db.text(
+                    f"DELETE FROM {table_name} WHERE id NOT IN ("
+                    f"SELECT id FROM (SELECT MAX(id) AS id FROM {table_name} GROUP BY {columns}) AS newest)"
+                ))
+                connection.execute(db.text(
+                    f"CREATE UNIQUE INDEX {preparer.quote(constraint.name)} ON {table_name} ({columns})"
+                ))
+                changes.append(f"added unique constraint {constraint.name}")
+    
+    sync_counters()
+    return changes
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Add tables, columns, indexes and constraints missing from an existing database"""
+    changes = upgrade_db()
+    for change in changes:
+        print(change)
+    print(f"✅ Database is up to date ({len(changes)} changes), group member, panel and supervisor counts recomputed")
+
+def sync_counters():
+    """Recompute member_count, supervised_count and has_panel from the underlying rows"""
+    member_counts = db.session.query(db.func.count(Student.id)).filter(
+        Student.group_id == StudentGroup.id
+    ).scalar_subquery()
+    supervised_counts = db.session.query(db.func.count(StudentGroup.id)).filter(
+        StudentGroup.supervisor_id == Supervisor.id
+    ).scalar_subquery()
+    
+    has_panels = db.session.query(Panel.id).filter(Panel.group_id == StudentGroup.id).exists()
+    
+    StudentGroup.query.update({'member_count': member_counts, 'has_panel': has_panels}, synchronize_session=False)
+    Supervisor.query.update({'supervised_count': supervised_counts}, synchronize_session=False)
+    bump_cache_versions(f'supervisor_slots:{row[0]}' for row in db.session.query(Supervisor.school).distinct())
+    db.session.commit()
+
+@app.cli.command('sync-counters')
+def sync_counters_command():
+    """Recompute member_count, supervised_count and has_panel from the underlying rows"""
+    sync_counters()
+    print("✅ Group member, panel and supervisor counts recomputed")
+
+@app.cli.command('purge-otps')
+def purge_otps():
+    """Delete used and expired OTPs"""
+    print(f"✅ Purged {otp_store.purge()} OTPs")
+
+@app.cli.command('purge-rate-limits')
+def purge_rate_limits():
+    """Delete rate limit buckets that have refilled completely"""
+    print(f"✅ Purged {rate_limiter.purge()} rate limit buckets")
+
+@app.cli.command('import-accounts')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--role', type=click.Choice(['student', 'supervisor']), required=True)
+@click.option('--school', required=True)
+def import_accounts_command(csv_path, role, school):
+    """Create student or supervisor accounts from a CSV file"""
+    def report(done, total):
+        print(f"Imported {done}/{total} rows")
+    
+    with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+        result = import_accounts(csv_file, role, school, progress=report)
+    
+    for error in result['errors']:
+        print(f"Line {error['line']} ({error['email']}): {error['error']}")
+    print(f"✅ Created {result['created']} accounts, skipped {len(result['errors'])} rows")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Write minified, fingerprinted and precompressed copies of the static CSS and JS"""
+    manifest = build_assets()
+    for source, built in sorted(manifest.items()):
+        print(f"{source} -> {built}")
+    print(f"✅ Built {len(manifest)} assets into {os.path.relpath(ASSET_DIR, app.root_path)}")
+
 # Initialize database when app starts
 init_db()
 
 # Routes
+@app.route('/metrics')
+def metrics():
+    """Request metrics of this worker and the mail queue depth, in Prometheus text format"""
+    token = app.config['METRICS_TOKEN']
+    if not token:
+        # Only reachable once a token is configured
+        return Response('Not Found\n', status=404, mimetype='text/plain')
+    if not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    
+    lines = [
+        '# HELP outbound_email_messages Messages in the outbound email queue, by status.',
+        '# TYPE outbound_email_messages gauge'
+    ]
+    for status, count in sorted(mail_queue_depth().items()):
+        lines.append(f"outbound_email_messages{_prometheus_labels(status=status)} {count}")
+    return Response(request_metrics.render() + '\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Fingerprinted asset from build-assets, precompressed when the browser accepts it"""
+    if filename not in ASSET_FILES:
+        abort(404)
+    
+    mimetype = mimetypes.guess_type(filename)[0]
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding]:
+            response = send_from_directory(ASSET_DIR, filename + suffix, mimetype=mimetype)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(ASSET_DIR, filename, mimetype=mimetype)
+    
+    response.vary.add('Accept-Encoding')
+    # The name changes with the content, so the file can be cached for good
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', template='login.html')
 def login():
     if request.method == 'POST':
         email = request.form.get('email')
@@ -242,7 +2370,12 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
+            if password_needs_rehash(user.password):
+                # Upgrade hashes made with an older method or cost
+                user.password = hash_password(password)
+                invalidate_user_cache(user_cache_key(user.id))
+                db.session.commit()
             login_user(user)
             
             # Redirect based on role
@@ -258,6 +2391,7 @@ def login():
     return render_template('login.html')
 
 @app.route('/forgot_password', methods=['GET', 'POST'])
+@rate_limited('send_otp', template='forgot_password.html')
 def forgot_password():
     if request.method == 'POST':
         email = request.form.get('email')
@@ -269,45 +2403,27 @@ def forgot_password():
             return render_template('forgot_password.html')
         
         # Generate OTP for password reset
-        otp_code = ''.join(secrets.choice('0123456789') for _ in range(6))
-        expires_at = datetime.utcnow() + timedelta(minutes=10)
-        
-        # Save OTP to database with purpose 'password_reset'
-        otp = OTP(
-            email=email, 
-            otp=otp_code, 
-            purpose='password_reset',
-            expires_at=expires_at
-        )
-        db.session.add(otp)
-        db.session.commit()
+        otp_code = otp_store.issue(email, 'password_reset')
         
-        # Send OTP email
-        try:
-            msg = Message('Password Reset OTP - Project Management System', 
-                         sender=app.config['MAIL_USERNAME'], 
-                         recipients=[email])
-            msg.body = f'''You have requested to reset your password for the Project Management System.
+        # Queue OTP email
+        queue_email('Password Reset OTP - Project Management System', email, f'''You have requested to reset your password for the Project Management System.
 
 Your OTP for password reset is: {otp_code}
 
 This OTP will expire in 10 minutes.
 
 If you did not request a password reset, please ignore this email.
-'''
-            mail.send(msg)
-            flash('Password reset OTP has been sent to your email.', 'success')
-            # Redirect to reset password page with email
-            return redirect(url_for('reset_password_with_otp', email=email))
-        except Exception as e:
-            print(f"Email error: {e}")
-            flash('Failed to send OTP email. Please try again.', 'error')
+''')
+        db.session.commit()
         
-        return render_template('forgot_password.html')
+        flash('Password reset OTP has been sent to your email.', 'success')
+        # Redirect to reset password page with email
+        return redirect(url_for('reset_password_with_otp', email=email))
     
     return render_template('forgot_password.html')
 
 @app.route('/reset_password/<email>', methods=['GET', 'POST'])
+@rate_limited('verify_otp', template='reset_password_otp.html')
 def reset_password_with_otp(email):
     if request.method == 'POST':
         otp = request.form.get('otp')
@@ -319,20 +2435,14 @@ def reset_password_with_otp(email):
             return render_template('reset_password_otp.html', email=email)
         
         # Verify OTP
-        otp_record = OTP.query.filter_by(
-            email=email, 
-            purpose='password_reset', 
-            used=False
-        ).order_by(OTP.created_at.desc()).first()
-        
-        if not otp_record or otp_record.otp != otp or otp_record.expires_at < datetime.utcnow():
+        if not otp_store.consume(email, 'password_reset', otp):
             flash('Invalid or expired OTP', 'error')
             return render_template('reset_password_otp.html', email=email)
         
         user = User.query.filter_by(email=email).first()
         if user:
-            user.password = generate_password_hash(password)
-            otp_record.used = True
+            user.password = hash_password(password)
+            invalidate_user_cache(user_cache_key(user.id))
             db.session.commit()
             flash('Password has been reset successfully. Please login.', 'success')
             return redirect(url_for('login'))
@@ -342,6 +2452,7 @@ def reset_password_with_otp(email):
     return render_template('reset_password_otp.html', email=email)
 
 @app.route('/send_password_reset_otp', methods=['POST'])
+@rate_limited('send_otp')
 def send_password_reset_otp():
     email = request.json.get('email')
     
@@ -354,37 +2465,20 @@ def send_password_reset_otp():
         return jsonify({'success': True, 'message': 'If this email exists, a password reset OTP has been sent.'})
     
     # Generate OTP
-    otp_code = ''.join(secrets.choice('0123456789') for _ in range(6))
-    expires_at = datetime.utcnow() + timedelta(minutes=10)
-    
-    # Save OTP to database with password_reset purpose
-    otp = OTP(
-        email=email, 
-        otp=otp_code, 
-        purpose='password_reset',
-        expires_at=expires_at
-    )
-    db.session.add(otp)
-    db.session.commit()
+    otp_code = otp_store.issue(email, 'password_reset')
     
-    # Send email
-    try:
-        msg = Message('Password Reset OTP - Project Management System', 
-                     sender=app.config['MAIL_USERNAME'], 
-                     recipients=[email])
-        msg.body = f'''You have requested to reset your password for the Project Management System.
+    # Queue email
+    queue_email('Password Reset OTP - Project Management System', email, f'''You have requested to reset your password for the Project Management System.
 
 Your OTP for password reset is: {otp_code}
 
 This OTP will expire in 10 minutes.
 
 If you did not request a password reset, please ignore this email.
-'''
-        mail.send(msg)
-        return jsonify({'success': True, 'message': 'Password reset OTP sent successfully'})
-    except Exception as e:
-        print(f"Email error: {e}")
-        return jsonify({'success': False, 'message': 'Failed to send OTP'})
+''')
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Password reset OTP sent successfully'})
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -401,6 +2495,7 @@ def register():
     return render_template('register.html')
 
 @app.route('/register/student', methods=['GET', 'POST'])
+@rate_limited('verify_otp', template='student_registration.html')
 def student_registration():
     if request.method == 'POST':
         name = request.form.get('name')
@@ -427,13 +2522,12 @@ def student_registration():
             return render_template('student_registration.html')
         
         # Verify OTP
-        otp_record = OTP.query.filter_by(email=email, purpose='registration', used=False).order_by(OTP.created_at.desc()).first()
-        if not otp_record or otp_record.otp != otp or otp_record.expires_at < datetime.utcnow():
+        if not otp_store.consume(email, 'registration', otp):
             flash('Invalid or expired OTP', 'error')
             return render_template('student_registration.html')
         
         # Create user
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_password(password)
         user = User(email=email, password=hashed_password, role='student')
         db.session.add(user)
         db.session.flush()  # Get user ID without committing
@@ -449,8 +2543,6 @@ def student_registration():
         )
         db.session.add(student)
         
-        # Mark OTP as used
-        otp_record.used = True
         db.session.commit()
         
         flash('Registration successful! Please login.', 'success')
@@ -459,6 +2551,7 @@ def student_registration():
     return render_template('student_registration.html')
 
 @app.route('/register/supervisor', methods=['GET', 'POST'])
+@rate_limited('verify_otp', template='supervisor_registration.html')
 def supervisor_registration():
     if request.method == 'POST':
         name = request.form.get('name')
@@ -479,13 +2572,12 @@ def supervisor_registration():
             return render_template('supervisor_registration.html')
         
         # Verify OTP
-        otp_record = OTP.query.filter_by(email=email, purpose='registration', used=False).order_by(OTP.created_at.desc()).first()
-        if not otp_record or otp_record.otp != otp or otp_record.expires_at < datetime.utcnow():
+        if not otp_store.consume(email, 'registration', otp):
             flash('Invalid or expired OTP', 'error')
             return render_template('supervisor_registration.html')
         
         # Create user
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_password(password)
         user = User(email=email, password=hashed_password, role='supervisor')
         db.session.add(user)
         db.session.flush()
@@ -498,9 +2590,8 @@ def supervisor_registration():
             school=school
         )
         db.session.add(supervisor)
+        bump_cache_version(f'supervisors:{school}')
         
-        # Mark OTP as used
-        otp_record.used = True
         db.session.commit()
         
         flash('Registration successful! Please login.', 'success')
@@ -509,6 +2600,7 @@ def supervisor_registration():
     return render_template('supervisor_registration.html')
 
 @app.route('/register/fic', methods=['GET', 'POST'])
+@rate_limited('verify_otp', template='fic_registration.html')
 def fic_registration():
     if request.method == 'POST':
         name = request.form.get('name')
@@ -534,13 +2626,12 @@ def fic_registration():
             return render_template('fic_registration.html')
         
         # Verify OTP
-        otp_record = OTP.query.filter_by(email=email, purpose='registration', used=False).order_by(OTP.created_at.desc()).first()
-        if not otp_record or otp_record.otp != otp or otp_record.expires_at < datetime.utcnow():
+        if not otp_store.consume(email, 'registration', otp):
             flash('Invalid or expired OTP', 'error')
             return render_template('fic_registration.html')
         
         # Create user
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_password(password)
         user = User(email=email, password=hashed_password, role='fic')
         db.session.add(user)
         db.session.flush()
@@ -553,8 +2644,6 @@ def fic_registration():
         )
         db.session.add(fic)
         
-        # Mark OTP as used
-        otp_record.used = True
         db.session.commit()
         
         flash('Registration successful! Please login.', 'success')
@@ -563,6 +2652,7 @@ def fic_registration():
     return render_template('fic_registration.html')
 
 @app.route('/send_otp', methods=['POST'])
+@rate_limited('send_otp')
 def send_otp():
     try:
         data = request.get_json()
@@ -580,24 +2670,12 @@ def send_otp():
             return jsonify({'success': False, 'message': 'Invalid email format'})
         
         # Generate OTP
-        otp_code = ''.join(secrets.choice('0123456789') for _ in range(6))
-        expires_at = datetime.utcnow() + timedelta(minutes=10)
-        
-        # Save OTP to database
-        otp = OTP(
-            email=email, 
-            otp=otp_code, 
-            purpose=purpose,
-            expires_at=expires_at
-        )
-        db.session.add(otp)
-        db.session.commit()
+        otp_code = otp_store.issue(email, purpose)
         
-        # Send email
-        try:
-            if purpose == 'password_reset':
-                subject = 'Password Reset OTP - Project Management System'
-                body = f'''You have requested to reset your password for the Project Management System.
+        # Queue email
+        if purpose == 'password_reset':
+            subject = 'Password Reset OTP - Project Management System'
+            body = f'''You have requested to reset your password for the Project Management System.
 
 Your OTP for password reset is: {otp_code}
 
@@ -605,9 +2683,9 @@ This OTP will expire in 10 minutes.
 
 If you did not request a password reset, please ignore this email.
 '''
-            else:
-                subject = 'Your OTP for Registration - Project Management System'
-                body = f'''Your OTP for registration is: {otp_code}
+        else:
+            subject = 'Your OTP for Registration - Project Management System'
+            body = f'''Your OTP for registration is: {otp_code}
 
 This OTP will expire in 10 minutes.
 
@@ -615,18 +2693,13 @@ Please use this OTP to complete your registration.
 
 If you did not request this OTP, please ignore this email.
 '''
+        
+        queue_email(subject, email, body)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'OTP sent successfully'})
             
-            msg = Message(subject, sender=app.config['MAIL_USERNAME'], recipients=[email])
-            msg.body = body
-            mail.send(msg)
-            print(f"OTP sent successfully to {email}: {otp_code}")
-            return jsonify({'success': True, 'message': 'OTP sent successfully'})
-        except Exception as e:
-            print(f"Email sending error: {e}")
-            return jsonify({'success': False, 'message': f'Failed to send OTP: {str(e)}'})
-            
-    except Exception as e:
-        print(f"OTP generation error: {e}")
+    except Exception:
+        app.logger.exception("OTP generation error")
         return jsonify({'success': False, 'message': 'Server error occurred'})
 
 @app.route('/student/dashboard')
@@ -635,53 +2708,26 @@ def student_dashboard():
     if current_user.role != 'student':
         return redirect(url_for('index'))
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = current_profile
     if not student:
         flash('Student profile not found', 'error')
         return redirect(url_for('logout'))
     
-    group = None
-    group_members = []
-    invites = GroupInvite.query.filter_by(receiver_id=student.id, status='pending').all()
-    
-    if student.group_id:
-        group = StudentGroup.query.get(student.group_id)
-        group_members = Student.query.filter_by(group_id=student.group_id).all()
-    
-    # Get students for inviting (same year and branch, not in any group)
-    available_students = Student.query.filter(
-        Student.year == student.year,
-        Student.branch == student.branch,
-        Student.group_id.is_(None),
-        Student.id != student.id
-    ).all()
-    
-    # Get available supervisors for the student's school
-    available_supervisors = Supervisor.query.filter_by(school=student.school).all()
-    
-    # Get supervisor change requests for the group
-    supervisor_change_requests = []
-    if group and group.supervisor_id:
-        supervisor_change_requests = SupervisorChangeRequest.query.filter_by(
-            group_id=group.id
-        ).all()
+    etag = dashboard_etag(student_dashboard_keys(student))
+    if etag in request.if_none_match:
+        return dashboard_response(etag)
     
     # Get notifications
-    notifications = Notification.query.filter(
-        (Notification.target_type == 'all') |
-        (Notification.target_type == 'students') |
-        ((Notification.target_type == 'specific_branch') & (Notification.target_branch == student.branch))
-    ).order_by(Notification.created_at.desc()).limit(10).all()
-    
-    return render_template('student_dashboard.html', 
-                          student=student, 
-                          group=group, 
-                          group_members=group_members,
-                          invites=invites,
-                          available_students=available_students,
-                          available_supervisors=available_supervisors,
-                          supervisor_change_requests=supervisor_change_requests,
-                          notifications=notifications)
+    notifications, unread_count = load_notification_feed(
+        ['all', 'students', f'branch:{student.branch}'],
+        current_user.notifications_seen_at
+    )
+    
+    return dashboard_response(etag, render_template('student_dashboard.html', 
+                          notifications=notifications,
+                          unread_count=unread_count,
+                          notifications_seen_at=current_user.notifications_seen_at,
+                          **load_student_dashboard(student)))
 
 @app.route('/supervisor/dashboard')
 @login_required
@@ -689,32 +2735,29 @@ def supervisor_dashboard():
     if current_user.role != 'supervisor':
         return redirect(url_for('index'))
     
-    supervisor = Supervisor.query.filter_by(user_id=current_user.id).first()
+    supervisor = current_profile
     if not supervisor:
         flash('Supervisor profile not found', 'error')
         return redirect(url_for('logout'))
     
-    supervised_groups = StudentGroup.query.filter_by(supervisor_id=supervisor.id).all()
-    pending_requests = SupervisorRequest.query.filter_by(supervisor_id=supervisor.id, status='pending').all()
+    etag = dashboard_etag(supervisor_dashboard_keys(supervisor))
+    if etag in request.if_none_match:
+        return dashboard_response(etag)
     
-    # Get supervisor change requests where this supervisor is the current supervisor
-    supervisor_change_requests = SupervisorChangeRequest.query.filter_by(
-        current_supervisor_id=supervisor.id,
-        status='pending'
-    ).all()
+    dashboard = load_supervisor_dashboard(supervisor)
     
     # Get notifications
-    notifications = Notification.query.filter(
-        (Notification.target_type == 'all') |
-        (Notification.target_type == 'supervisors')
-    ).order_by(Notification.created_at.desc()).limit(10).all()
+    notifications, unread_count = load_notification_feed(
+        ['all', 'supervisors'],
+        current_user.notifications_seen_at
+    )
     
-    return render_template('supervisor_dashboard.html', 
+    return dashboard_response(etag, render_template('supervisor_dashboard.html', 
                           supervisor=supervisor,
-                          supervised_groups=supervised_groups,
-                          pending_requests=pending_requests,
-                          supervisor_change_requests=supervisor_change_requests,
-                          notifications=notifications)
+                          notifications=notifications,
+                          unread_count=unread_count,
+                          notifications_seen_at=current_user.notifications_seen_at,
+                          **dashboard))
 
 @app.route('/fic/dashboard')
 @login_required
@@ -722,41 +2765,67 @@ def fic_dashboard():
     if current_user.role != 'fic':
         return redirect(url_for('index'))
     
-    fic = FIC.query.filter_by(user_id=current_user.id).first()
+    fic = current_profile
     if not fic:
         flash('FIC profile not found', 'error')
         return redirect(url_for('logout'))
     
-    # Get all groups from the same school
-    school_groups = StudentGroup.query.join(Student).filter(Student.school == fic.school).distinct().all()
-    school_supervisors = Supervisor.query.filter_by(school=fic.school).all()
+    etag = dashboard_etag(fic_dashboard_keys(fic))
+    if etag in request.if_none_match:
+        return dashboard_response(etag)
     
-    # Get supervisor change requests for the school
-    supervisor_change_requests = SupervisorChangeRequest.query.join(
-        StudentGroup
-    ).join(
-        Student
-    ).filter(
-        Student.school == fic.school,
-        SupervisorChangeRequest.status == 'pending'
-    ).all()
+    dashboard = load_fic_dashboard(fic)
     
-    # Get sent notifications
-    notifications = Notification.query.filter_by(created_by=fic.id).order_by(Notification.created_at.desc()).limit(10).all()
+    return dashboard_response(etag, render_template('fic_dashboard.html', 
+                          fic=fic,
+                          notifications=load_sent_notifications(fic),
+                          **dashboard))
+
+@app.route('/available_students')
+@login_required
+def available_students():
+    if current_user.role != 'student':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    # Get all branches in the school for download
-    branches = db.session.query(StudentGroup.branch).filter(
-        StudentGroup.id.in_([g.id for g in school_groups])
-    ).distinct().all()
-    branches = [b[0] for b in branches]
+    student = current_profile
+    if not student:
+        return jsonify({'success': False, 'message': 'Student profile not found'})
     
-    return render_template('fic_dashboard.html', 
-                          fic=fic,
-                          school_groups=school_groups,
-                          school_supervisors=school_supervisors,
-                          supervisor_change_requests=supervisor_change_requests,
-                          notifications=notifications,
-                          branches=branches)
+    search = request.args.get('q', '').strip()
+    after = request.args.get('after', 0, type=int)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    
+    # Students for inviting (same year and branch, not in any group), served
+    # by ix_student_year_branch_group and paged by id
+    query = Student.query.filter(
+        Student.year == student.year,
+        Student.branch == student.branch,
+        Student.group_id.is_(None),
+        Student.id != student.id,
+        Student.id > after
+    )
+    if search:
+        pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        query = query.filter(
+            Student.name.ilike(pattern, escape='\\') |
+            Student.roll_number.ilike(pattern, escape='\\')
+        )
+    
+    # Fetch one extra row to know whether another page exists
+    students = query.order_by(Student.id).limit(limit + 1).all()
+    has_more = len(students) > limit
+    students = students[:limit]
+    
+    return jsonify({
+        'success': True,
+        'students': [{
+            'id': s.id,
+            'name': s.name,
+            'roll_number': s.roll_number,
+            'school': s.school
+        } for s in students],
+        'next_cursor': students[-1].id if has_more else None
+    })
 
 @app.route('/send_invite', methods=['POST'])
 @login_required
@@ -765,7 +2834,7 @@ def send_invite():
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     receiver_id = request.json.get('receiver_id')
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
@@ -773,8 +2842,7 @@ def send_invite():
     # Check if student is already in a group
     if student.group_id:
         # Check if group has less than 4 members
-        group_members_count = Student.query.filter_by(group_id=student.group_id).count()
-        if group_members_count >= 4:
+        if student.group.member_count >= MAX_GROUP_MEMBERS:
             return jsonify({'success': False, 'message': 'Your group already has maximum 4 members'})
     
     # Check if receiver exists and is available
@@ -795,6 +2863,7 @@ def send_invite():
     # Create invite
     invite = GroupInvite(sender_id=student.id, receiver_id=receiver_id)
     db.session.add(invite)
+    bump_cache_version(f'invites:{receiver.id}')
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Invite sent successfully'})
@@ -808,7 +2877,7 @@ def respond_invite():
     invite_id = request.json.get('invite_id')
     action = request.json.get('action')  # 'accept' or 'reject'
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
     
@@ -821,8 +2890,7 @@ def respond_invite():
         # Check if student is already in a group
         if student.group_id:
             # Check if group has less than 4 members
-            group_members_count = Student.query.filter_by(group_id=student.group_id).count()
-            if group_members_count >= 4:
+            if student.group.member_count >= MAX_GROUP_MEMBERS:
                 return jsonify({'success': False, 'message': 'Your group already has maximum 4 members'})
         
         # Check if sender is still available or in a group with less than 4 members
@@ -830,36 +2898,61 @@ def respond_invite():
         if not sender:
             return jsonify({'success': False, 'message': 'Sender not found'})
         
+        previous_group_id = student.group_id
+        
         # Create or join group
         if sender.group_id:
-            # Join existing group (check if group has less than 4 members)
-            group_members_count = Student.query.filter_by(group_id=sender.group_id).count()
-            if group_members_count >= 4:
+            # Join existing group, reserving a place only if it has less than 4 members
+            if not reserve_group_slot(sender.group_id):
                 return jsonify({'success': False, 'message': 'The group already has maximum 4 members'})
             
             student.group_id = sender.group_id
-            group = StudentGroup.query.get(sender.group_id)
         else:
             # Create new group
-            group_count = StudentGroup.query.filter_by(branch=student.branch).count()
-            group_name = f"{student.branch}{group_count + 1:02d}"
+            group_name = allocate_group_name(student.branch)
             
-            group = StudentGroup(name=group_name, branch=student.branch, year=student.year)
+            group = StudentGroup(name=group_name, branch=student.branch, year=student.year, member_count=2)
             db.session.add(group)
             db.session.flush()  # Get group ID
             
-            sender.group_id = group.id
+            # Claim the sender only if they have not joined another group meanwhile
+            claimed = Student.query.filter(
+                Student.id == sender.id,
+                Student.group_id.is_(None)
+            ).update({'group_id': group.id}, synchronize_session=False)
+            if not claimed:
+                db.session.rollback()
+                return jsonify({'success': False, 'message': 'The sender has just joined another group'})
+            invalidate_user_cache(profile_cache_key('student', sender.id))
+            
             student.group_id = group.id
         
+        if previous_group_id:
+            # Switching groups: the previous one is deleted if this was its last member
+            remove_group_member(StudentGroup.query.get(previous_group_id), student.school)
+        invalidate_user_cache(profile_cache_key('student', student.id))
+        bump_cache_version(f'group:{student.group_id}')
+        
         invite.status = 'accepted'
+        bump_cache_version(f'invites:{student.id}')
         db.session.commit()
         
-        return jsonify({'success': True, 'message': 'Invite accepted'})
+        return jsonify({
+            'success': True,
+            'message': 'Invite accepted',
+            'fragments': render_student_group_sections(student)
+        })
     
     elif action == 'reject':
         invite.status = 'rejected'
+        bump_cache_version(f'invites:{student.id}')
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Invite rejected'})
+        invites = GroupInvite.query.filter_by(receiver_id=student.id, status='pending').all()
+        return jsonify({
+            'success': True,
+            'message': 'Invite rejected',
+            'fragments': {'invitations': render_block('student_dashboard.html', 'invitations', invites=invites)}
+        })
     
     return jsonify({'success': False, 'message': 'Invalid action'})
 
@@ -869,7 +2962,7 @@ def leave_group():
     if current_user.role != 'student':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
     
@@ -878,24 +2971,18 @@ def leave_group():
     
     group = StudentGroup.query.get(student.group_id)
     
-    # Check if this is the last member
-    remaining_members = Student.query.filter_by(group_id=student.group_id).filter(Student.id != student.id).count()
-    
-    if remaining_members == 0:
-        # Last member leaving - delete the group and related data
-        # Delete supervisor requests
-        SupervisorRequest.query.filter_by(group_id=group.id).delete()
-        # Delete supervisor change requests
-        SupervisorChangeRequest.query.filter_by(group_id=group.id).delete()
-        # Delete the group
-        db.session.delete(group)
-    else:
-        # Remove student from group
-        student.group_id = None
+    # Remove student from group; the last member leaving deletes it
+    student.group_id = None
+    invalidate_user_cache(profile_cache_key('student', student.id))
+    remove_group_member(group, student.school)
     
     db.session.commit()
     
-    return jsonify({'success': True, 'message': 'You have left the group'})
+    return jsonify({
+        'success': True,
+        'message': 'You have left the group',
+        'fragments': render_student_group_sections(student)
+    })
 
 @app.route('/request_supervisor', methods=['POST'])
 @login_required
@@ -903,7 +2990,7 @@ def request_supervisor():
     if current_user.role != 'student':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
     
@@ -932,12 +3019,42 @@ def request_supervisor():
     if existing_request:
         return jsonify({'success': False, 'message': 'Request already sent to this supervisor'})
     
+    # Don't let the group spend a request on a supervisor who cannot accept it
+    supervisor = Supervisor.query.get(supervisor_id)
+    if not supervisor:
+        return jsonify({'success': False, 'message': 'Invalid supervisor'})
+    if supervisor.supervised_count >= MAX_SUPERVISED_GROUPS:
+        return jsonify({'success': False, 'message': 'This supervisor is not accepting more groups'})
+    
     # Create request
     request_obj = SupervisorRequest(group_id=group.id, supervisor_id=supervisor_id)
     db.session.add(request_obj)
+    bump_cache_version(f'group:{group.id}')
     db.session.commit()
     
-    return jsonify({'success': True, 'message': 'Request sent successfully'})
+    return jsonify({
+        'success': True,
+        'message': 'Request sent successfully',
+        'fragments': {'supervisor_requests': render_block('student_dashboard.html', 'supervisor_requests', group=group)}
+    })
+
+@app.route('/recommended_supervisors')
+@login_required
+def recommended_supervisors():
+    """Supervisors with free capacity ranked by fit with the group's project"""
+    if current_user.role != 'student':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    student = current_profile
+    if not student:
+        return jsonify({'success': False, 'message': 'Student profile not found'})
+    
+    group = StudentGroup.query.get(student.group_id) if student.group_id else None
+    if not group:
+        return jsonify({'success': False, 'message': 'You are not in a group'})
+    
+    limit = min(request.args.get('limit', RECOMMENDATION_LIMIT, type=int), 20)
+    return jsonify({'success': True, 'supervisors': recommend_supervisors(group, student.school, limit)})
 
 @app.route('/request_supervisor_change', methods=['POST'])
 @login_required
@@ -945,7 +3062,7 @@ def request_supervisor_change():
     if current_user.role != 'student':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
     
@@ -982,9 +3099,17 @@ def request_supervisor_change():
         reason=reason
     )
     db.session.add(change_request)
+    bump_cache_version(f'group:{group.id}')
     db.session.commit()
     
-    return jsonify({'success': True, 'message': 'Supervisor change request submitted to FIC'})
+    supervisor_change_requests = SupervisorChangeRequest.query.filter_by(group_id=group.id).all()
+    return jsonify({
+        'success': True,
+        'message': 'Supervisor change request submitted to FIC',
+        'fragments': {'change_requests': render_block(
+            'student_dashboard.html', 'change_requests', supervisor_change_requests=supervisor_change_requests
+        )}
+    })
 
 @app.route('/respond_supervisor_request', methods=['POST'])
 @login_required
@@ -995,7 +3120,7 @@ def respond_supervisor_request():
     request_id = request.json.get('request_id')
     action = request.json.get('action')  # 'accept' or 'reject'
     
-    supervisor = Supervisor.query.filter_by(user_id=current_user.id).first()
+    supervisor = locked_profile()
     if not supervisor:
         return jsonify({'success': False, 'message': 'Supervisor profile not found'})
     
@@ -1005,37 +3130,65 @@ def respond_supervisor_request():
         return jsonify({'success': False, 'message': 'Invalid request'})
     
     if action == 'accept':
-        # Check if supervisor can accept more groups (max 3)
-        supervised_groups = StudentGroup.query.filter_by(supervisor_id=supervisor.id).count()
-        if supervised_groups >= 3:
-            return jsonify({'success': False, 'message': 'You can only supervise up to 3 groups'})
-        
         # Check if group already has a supervisor
         group = StudentGroup.query.get(request_obj.group_id)
         if group.supervisor_id:
             return jsonify({'success': False, 'message': 'Group already has a supervisor'})
         
-        # Assign supervisor to group
-        group.supervisor_id = supervisor.id
+        # Take one of the supervisor's places only if they supervise less than 3 groups
+        if not reserve_supervisor_slot(supervisor.id, supervisor.school):
+            return jsonify({'success': False, 'message': 'You can only supervise up to 3 groups'})
+        
+        # Assign supervisor to group unless another supervisor accepted meanwhile
+        assigned = StudentGroup.query.filter(
+            StudentGroup.id == group.id,
+            StudentGroup.supervisor_id.is_(None)
+        ).update({'supervisor_id': supervisor.id}, synchronize_session=False)
+        if not assigned:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Group already has a supervisor'})
+        
         request_obj.status = 'accepted'
         
         # Reject other pending requests for this group
-        other_requests = SupervisorRequest.query.filter_by(
-            group_id=group.id, 
-            status='pending'
-        ).all()
-        
-        for req in other_requests:
-            if req.id != request_id:
-                req.status = 'rejected'
+        SupervisorRequest.query.filter(
+            SupervisorRequest.group_id == group.id,
+            SupervisorRequest.status == 'pending',
+            SupervisorRequest.id != request_obj.id
+        ).update({'status': 'rejected'}, synchronize_session=False)
         
+        bump_cache_version(f'group:{group.id}')
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Request accepted'})
+        return jsonify({
+            'success': True,
+            'message': 'Request accepted',
+            'fragments': {
+                'supervised_groups': render_block(
+                    'supervisor_dashboard.html', 'supervised_groups', **load_supervised_groups(supervisor)
+                ),
+                'pending_requests': render_block(
+                    'supervisor_dashboard.html', 'pending_requests',
+                    pending_requests=load_pending_supervisor_requests(supervisor)
+                ),
+                'panel_memberships': render_block(
+                    'supervisor_dashboard.html', 'panel_memberships',
+                    supervisor=supervisor, panel_memberships=load_panel_memberships(supervisor)
+                )
+            }
+        })
     
     elif action == 'reject':
         request_obj.status = 'rejected'
+        bump_cache_version(f'group:{request_obj.group_id}')
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Request rejected'})
+        return jsonify({
+            'success': True,
+            'message': 'Request rejected',
+            'fragments': {'pending_requests': render_block(
+                'supervisor_dashboard.html', 'pending_requests',
+                pending_requests=load_pending_supervisor_requests(supervisor)
+            )}
+        })
     
     return jsonify({'success': False, 'message': 'Invalid action'})
 
@@ -1045,7 +3198,7 @@ def respond_supervisor_change_request():
     if current_user.role != 'fic':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    fic = FIC.query.filter_by(user_id=current_user.id).first()
+    fic = locked_profile()
     if not fic:
         return jsonify({'success': False, 'message': 'FIC profile not found'})
     
@@ -1055,38 +3208,54 @@ def respond_supervisor_change_request():
     change_request = SupervisorChangeRequest.query.get(request_id)
     if not change_request:
         return jsonify({'success': False, 'message': 'Invalid request'})
+    if action not in ('approve', 'reject'):
+        return jsonify({'success': False, 'message': 'Invalid action'})
     
     # Verify the group belongs to FIC's school
     group = StudentGroup.query.get(change_request.group_id)
     if not group or not group.students or group.students[0].school != fic.school:
         return jsonify({'success': False, 'message': 'Invalid group'})
     
+    # Claim the request, so that two FICs responding at once cannot both process it
+    claimed = SupervisorChangeRequest.query.filter_by(id=change_request.id, status='pending').update(
+        {'status': 'approved' if action == 'approve' else 'rejected'}, synchronize_session=False
+    )
+    if not claimed:
+        return jsonify({'success': False, 'message': 'Request already processed'})
+    
     if action == 'approve':
-        # Check if new supervisor can accept more groups
-        supervised_groups = StudentGroup.query.filter_by(supervisor_id=change_request.new_supervisor_id).count()
-        if supervised_groups >= 3:
+        # Take one of the new supervisor's places only if they supervise less than 3 groups
+        if not reserve_supervisor_slot(change_request.new_supervisor_id, fic.school):
+            db.session.rollback()
             return jsonify({'success': False, 'message': 'New supervisor can only supervise up to 3 groups'})
         
-        # Update group supervisor
-        group.supervisor_id = change_request.new_supervisor_id
-        change_request.status = 'approved'
+        # Move the group only if it still has the supervisor the request was made against
+        moved = StudentGroup.query.filter_by(
+            id=group.id,
+            supervisor_id=change_request.current_supervisor_id
+        ).update({'supervisor_id': change_request.new_supervisor_id}, synchronize_session=False)
+        if not moved:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': "The group's supervisor has changed since the request was made"})
+        release_supervisor_slot(change_request.current_supervisor_id, fic.school)
         
         # Reject any other pending supervisor requests for this group
-        other_requests = SupervisorRequest.query.filter_by(
+        SupervisorRequest.query.filter_by(
             group_id=group.id,
             status='pending'
-        ).all()
-        
-        for req in other_requests:
-            req.status = 'rejected'
-        
-    elif action == 'reject':
-        change_request.status = 'rejected'
+        ).update({'status': 'rejected'}, synchronize_session=False)
     
     change_request.processed_at = datetime.utcnow()
+    bump_cache_version(f'group:{group.id}')
     db.session.commit()
     
-    return jsonify({'success': True, 'message': f'Supervisor change request {action}d'})
+    fragments = {'change_requests': render_block(
+        'fic_dashboard.html', 'change_requests',
+        supervisor_change_requests=load_fic_change_requests(school_group_ids(fic.school))
+    )}
+    if action == 'approve':
+        fragments.update(render_fic_group_fragments(fic, group.id))
+    return jsonify({'success': True, 'message': f'Supervisor change request {action}d', 'fragments': fragments})
 
 @app.route('/update_project_title', methods=['POST'])
 @login_required
@@ -1094,7 +3263,7 @@ def update_project_title():
     if current_user.role != 'student':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
     
@@ -1105,6 +3274,7 @@ def update_project_title():
     
     new_title = request.json.get('title')
     group.project_title = new_title
+    bump_cache_version(f'group:{group.id}')
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Project title updated'})
@@ -1115,7 +3285,7 @@ def update_document_link():
     if current_user.role != 'student':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = locked_profile()
     if not student:
         return jsonify({'success': False, 'message': 'Student profile not found'})
     
@@ -1126,6 +3296,7 @@ def update_document_link():
     
     new_link = request.json.get('link')
     group.document_link = new_link
+    bump_cache_version(f'group:{group.id}')
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Document link updated'})
@@ -1136,14 +3307,20 @@ def assign_marks():
     if current_user.role != 'supervisor':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    supervisor = Supervisor.query.filter_by(user_id=current_user.id).first()
+    supervisor = locked_profile()
     if not supervisor:
         return jsonify({'success': False, 'message': 'Supervisor profile not found'})
     
     student_id = request.json.get('student_id')
-    presentation = float(request.json.get('presentation', 0))
-    documents = float(request.json.get('documents', 0))
-    collaboration = float(request.json.get('collaboration', 0))
+    try:
+        presentation = float(request.json.get('presentation', 0))
+        documents = float(request.json.get('documents', 0))
+        collaboration = float(request.json.get('collaboration', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid marks data'})
+    # float() accepts 'nan' and 'inf', which would poison totals and analytics
+    if not all(math.isfinite(value) and 0 <= value <= 10 for value in (presentation, documents, collaboration)):
+        return jsonify({'success': False, 'message': 'Marks must be between 0 and 10'})
     
     student = Student.query.get(student_id)
     if not student or not student.group or student.group.supervisor_id != supervisor.id:
@@ -1169,16 +3346,86 @@ def assign_marks():
         )
         db.session.add(marks)
     
+    bump_cache_version('marks')
+    bump_cache_version(f'group:{student.group_id}')
     db.session.commit()
     return jsonify({'success': True, 'message': 'Marks assigned successfully'})
 
+@app.route('/assign_marks_bulk', methods=['POST'])
+@login_required
+def assign_marks_bulk():
+    """Save marks for many students in one transaction"""
+    if current_user.role != 'supervisor':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    supervisor = locked_profile()
+    if not supervisor:
+        return jsonify({'success': False, 'message': 'Supervisor profile not found'})
+    
+    entries = (request.json or {}).get('marks')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'success': False, 'message': 'No marks provided'})
+    
+    # Later entries for the same student win
+    marks_by_student = {}
+    try:
+        for entry in entries:
+            values = {field: float(entry.get(field, 0)) for field in ('presentation', 'documents', 'collaboration')}
+            # float() accepts 'nan' and 'inf'; NaN would pass a plain range check
+            if not all(math.isfinite(value) and 0 <= value <= 10 for value in values.values()):
+                return jsonify({'success': False, 'message': 'Marks must be between 0 and 10'})
+            marks_by_student[int(entry['student_id'])] = values
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid marks data'})
+    
+    # Check that every student is in a group this supervisor supervises, in one query
+    student_ids = list(marks_by_student)
+    owned_groups = dict(db.session.query(Student.id, Student.group_id).join(
+        StudentGroup, Student.group_id == StudentGroup.id
+    ).filter(
+        Student.id.in_(student_ids),
+        StudentGroup.supervisor_id == supervisor.id
+    ).all())
+    if len(owned_groups) != len(student_ids):
+        return jsonify({'success': False, 'message': 'Invalid student'})
+    
+    existing = dict(db.session.query(Marks.student_id, Marks.id).filter(
+        Marks.student_id.in_(student_ids),
+        Marks.given_by == supervisor.id
+    ).all())
+    
+    now = datetime.utcnow()
+    updates = []
+    inserts = []
+    for student_id, values in marks_by_student.items():
+        row = dict(values, total=sum(values.values()), given_at=now)
+        if student_id in existing:
+            updates.append(dict(row, id=existing[student_id]))
+        else:
+            inserts.append(dict(row, student_id=student_id, given_by=supervisor.id))
+    
+    # Bulk UPDATE by primary key and bulk INSERT, each a single executemany
+    if updates:
+        db.session.execute(db.update(Marks), updates)
+    if inserts:
+        db.session.execute(db.insert(Marks), inserts)
+    bump_cache_version('marks')
+    bump_cache_versions(f'group:{group_id}' for group_id in set(owned_groups.values()))
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'message': f'Marks saved for {len(marks_by_student)} students',
+        'totals': {student_id: sum(values.values()) for student_id, values in marks_by_student.items()}
+    })
+
 @app.route('/create_panel', methods=['POST'])
 @login_required
 def create_panel():
     if current_user.role != 'fic':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    fic = FIC.query.filter_by(user_id=current_user.id).first()
+    fic = locked_profile()
     if not fic:
         return jsonify({'success': False, 'message': 'FIC profile not found'})
     
@@ -1192,9 +3439,9 @@ def create_panel():
     if not group or not group.students or group.students[0].school != fic.school:
         return jsonify({'success': False, 'message': 'Invalid group'})
     
-    # Check if panel already exists
-    existing_panel = Panel.query.filter_by(group_id=group_id).first()
-    if existing_panel:
+    # Claim the group so a concurrent panel creation cannot add a second panel
+    if not claim_panel_groups([group.id]):
+        db.session.rollback()
         return jsonify({'success': False, 'message': 'Panel already exists for this group'})
     
     # Create panel
@@ -1207,8 +3454,49 @@ def create_panel():
         panel_member = PanelMember(panel_id=panel.id, supervisor_id=supervisor_id)
         db.session.add(panel_member)
     
+    bump_cache_version(f'group:{group.id}')
     db.session.commit()
-    return jsonify({'success': True, 'message': 'Panel created successfully'})
+    return jsonify({
+        'success': True,
+        'message': 'Panel created successfully',
+        'fragments': render_fic_group_fragments(fic, group_id)
+    })
+
+@app.route('/auto_assign_panels', methods=['POST'])
+@login_required
+def auto_assign_panels_route():
+    """Create balanced panels for every group in the FIC's school that has none"""
+    if current_user.role != 'fic':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    fic = locked_profile()
+    if not fic:
+        return jsonify({'success': False, 'message': 'FIC profile not found'})
+    
+    exclude_own_supervisor = bool((request.json or {}).get('exclude_own_supervisor'))
+    created = auto_assign_panels(fic, exclude_own_supervisor)
+    if created is None:
+        needed = PANEL_SIZE + (1 if exclude_own_supervisor else 0)
+        return jsonify({'success': False, 'message': f'At least {needed} supervisors are needed in your school'})
+    if not created:
+        return jsonify({'success': False, 'message': 'Every group already has a panel'})
+    
+    school_supervisors, supervisor_counts = load_school_supervisors(fic.school)
+    return jsonify({
+        'success': True,
+        'message': f'Created panels for {created} groups',
+        'created': created,
+        'fragments': {
+            'school_groups': render_block(
+                'fic_dashboard.html', 'school_groups',
+                school_groups=load_school_groups(school_group_ids(fic.school)), school_supervisors=school_supervisors
+            ),
+            'school_supervisors': render_block(
+                'fic_dashboard.html', 'school_supervisors',
+                fic=fic, school_supervisors=school_supervisors, supervisor_counts=supervisor_counts
+            )
+        }
+    })
 
 @app.route('/send_notification', methods=['POST'])
 @login_required
@@ -1216,7 +3504,7 @@ def send_notification():
     if current_user.role != 'fic':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    fic = FIC.query.filter_by(user_id=current_user.id).first()
+    fic = locked_profile()
     if not fic:
         return jsonify({'success': False, 'message': 'FIC profile not found'})
     
@@ -1224,6 +3512,7 @@ def send_notification():
     message = request.json.get('message')
     target_type = request.json.get('target_type')
     target_branch = request.json.get('target_branch')
+    send_email = bool(request.json.get('send_email'))
     
     if not title or not message:
         return jsonify({'success': False, 'message': 'Title and message are required'})
@@ -1236,10 +3525,42 @@ def send_notification():
         target_branch=target_branch if target_type == 'specific_branch' else None,
         created_by=fic.id
     )
+    
+    # Emails are sent in chunks by mail_worker.py
+    if send_email:
+        notification.email_status = 'pending'
+        notification.email_total = notification_recipients(notification).order_by(None).count()
+    
     db.session.add(notification)
+    bump_cache_version(f'notifications:{notification_feed_key(notification)}')
+    bump_cache_version(f'sent_notifications:{fic.id}')
+    db.session.commit()
+    
+    fragments = {
+        'sent_notifications': render_block('fic_dashboard.html', 'sent_notifications', notifications=load_sent_notifications(fic))
+    }
+    if send_email:
+        return jsonify({
+            'success': True,
+            'message': f'Notification sent; emailing {notification.email_total} recipients',
+            'fragments': fragments
+        })
+    return jsonify({'success': True, 'message': 'Notification sent successfully', 'fragments': fragments})
+
+@app.route('/mark_notifications_read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    if current_user.role not in ('student', 'supervisor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    current_user.notifications_seen_at = datetime.utcnow()
+    invalidate_user_cache(user_cache_key(current_user.id))
     db.session.commit()
     
-    return jsonify({'success': True, 'message': 'Notification sent successfully'})
+    return jsonify({'success': True, 'message': 'Notifications marked as read'})
+
+# Number of groups loaded and written per chunk of the CSV export
+CSV_EXPORT_CHUNK_SIZE = 500
 
 @app.route('/download_group_details')
 @login_required
@@ -1247,7 +3568,7 @@ def download_group_details():
     if current_user.role != 'fic':
         return redirect(url_for('index'))
     
-    fic = FIC.query.filter_by(user_id=current_user.id).first()
+    fic = current_profile
     if not fic:
         flash('FIC profile not found', 'error')
         return redirect(url_for('logout'))
@@ -1255,48 +3576,117 @@ def download_group_details():
     branch = request.args.get('branch', '')
     
     # Get groups from the same school, optionally filtered by branch
-    query = StudentGroup.query.join(Student).filter(Student.school == fic.school)
+    query = StudentGroup.query.filter(
+        StudentGroup.id.in_(school_group_ids(fic.school))
+    ).options(
+        selectinload(StudentGroup.students),
+        joinedload(StudentGroup.supervisor)
+    )
     if branch:
         query = query.filter(StudentGroup.branch == branch)
     
-    school_groups = query.order_by(StudentGroup.name).all()
-    
-    # Create CSV content
-    output = StringIO()
-    writer = csv.writer(output)
+    query = query.order_by(StudentGroup.name).yield_per(CSV_EXPORT_CHUNK_SIZE)
     
-    # Write header
-    writer.writerow(['Group Name', 'Branch', 'Year', 'Project Title', 'Supervisor', 'Member Names', 'Roll Numbers'])
+    # Compress on the fly when the client accepts it
+    use_gzip = request.accept_encodings['gzip'] > 0
     
-    # Write data
-    for group in school_groups:
-        member_names = ', '.join([student.name for student in group.students])
-        roll_numbers = ', '.join([student.roll_number for student in group.students])
-        supervisor_name = group.supervisor.name if group.supervisor else 'Not assigned'
+    def generate():
+        output = StringIO()
+        writer = csv.writer(output)
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if use_gzip else None
+        
+        def drain():
+            data = output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate(0)
+            return compressor.compress(data) if compressor else data
+        
+        # Write header
+        writer.writerow(['Group Name', 'Branch', 'Year', 'Project Title', 'Supervisor', 'Member Names', 'Roll Numbers'])
         
-        writer.writerow([
-            group.name,
-            group.branch,
-            group.year,
-            group.project_title or 'Not set',
-            supervisor_name,
-            member_names,
-            roll_numbers
-        ])
+        # Write data, sending each chunk of groups as soon as it has been loaded
+        for count, group in enumerate(query, 1):
+            member_names = ', '.join([student.name for student in group.students])
+            roll_numbers = ', '.join([student.roll_number for student in group.students])
+            supervisor_name = group.supervisor.name if group.supervisor else 'Not assigned'
+            
+            writer.writerow([
+                group.name,
+                group.branch,
+                group.year,
+                group.project_title or 'Not set',
+                supervisor_name,
+                member_names,
+                roll_numbers
+            ])
+            
+            if count % CSV_EXPORT_CHUNK_SIZE == 0:
+                chunk = drain()
+                if chunk:
+                    yield chunk
+        
+        chunk = drain()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
     
     # Prepare response
-    output.seek(0)
     filename = f"group_details_{fic.school.replace(' ', '_')}"
     if branch:
         filename += f"_{branch}"
     filename += ".csv"
     
-    return send_file(
-        output,
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
-    )
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.route('/marks_analytics')
+@login_required
+def marks_analytics():
+    """Marks distributions and ranks for the FIC's school"""
+    if current_user.role != 'fic':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    fic = current_profile
+    if not fic:
+        return jsonify({'success': False, 'message': 'FIC profile not found'})
+    
+    return jsonify({'success': True, 'analytics': load_marks_analytics(fic.school)})
+
+@app.route('/import_accounts', methods=['POST'])
+@login_required
+def import_accounts_upload():
+    """Create student or supervisor accounts in the FIC's school from an uploaded CSV"""
+    if current_user.role != 'fic':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    fic = locked_profile()
+    if not fic:
+        return jsonify({'success': False, 'message': 'FIC profile not found'})
+    
+    role = request.form.get('role')
+    upload = request.files.get('file')
+    if role not in IMPORT_COLUMNS:
+        return jsonify({'success': False, 'message': 'Invalid role'})
+    if not upload:
+        return jsonify({'success': False, 'message': 'CSV file is required'})
+    
+    try:
+        csv_file = StringIO(upload.read().decode('utf-8-sig'), newline='')
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'CSV file must be UTF-8 encoded'})
+    
+    result = import_accounts(csv_file, role, fic.school)
+    return jsonify({
+        'success': True,
+        'message': f"Created {result['created']} accounts, skipped {len(result['errors'])} rows",
+        'created': result['created'],
+        'errors': result['errors']
+    })
 
 @app.route('/logout')
 @login_required
@@ -0,0 +1,199 @@
+"""Seed a large dataset and compare query plans and timings with and without
+the hot-path indexes declared on the models in app.py.
+
+Usage:
+    python benchmarks/index_benchmark.py --students 50000
+
+By default a throwaway SQLite database is used. Set DATABASE_URL to run
+against another database; its tables will be dropped and recreated.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'index_benchmark.db')
+
+from app import (app, db, User, Student, Supervisor, FIC, StudentGroup, GroupInvite,  # noqa: E402
+                 SupervisorRequest, SupervisorChangeRequest, Marks, OTP, Notification)
+
+BRANCHES = ['CS', 'ECS', 'IT', 'ETC', 'Civil', 'Mech', 'Aerospace', 'EE']
+YEARS = ['Third', 'Fourth']
+SCHOOL = 'School of Computer Science'
+CHUNK = 5000
+
+# Indexes added for the hot filters; the primary keys and unique columns
+# are left in place for the "before" run
+HOT_INDEXES = [
+    index
+    for model in (Student, GroupInvite, SupervisorRequest, SupervisorChangeRequest, Marks, OTP, Notification)
+    for index in model.__table__.indexes
+]
+
+
+def insert_chunked(model, rows):
+    """Bulk insert rows in chunks of CHUNK"""
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(model.__table__.insert(), rows[start:start + CHUNK])
+    db.session.commit()
+
+
+def seed(n_students):
+    """Seed users, profiles, groups, invites, requests, marks, OTPs and notifications"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    n_supervisors = max(n_students // 40, 10)
+    n_groups = n_students // 4
+
+    print(f"Seeding {n_students} students, {n_supervisors} supervisors, {n_groups} groups...")
+    started = time.perf_counter()
+
+    users = [{'id': i, 'email': f'user{i}@example.edu', 'password': 'x', 'role': 'student', 'created_at': now}
+             for i in range(1, n_students + 1)]
+    users += [{'id': n_students + i, 'email': f'sup{i}@example.edu', 'password': 'x', 'role': 'supervisor',
+               'created_at': now} for i in range(1, n_supervisors + 1)]
+    users.append({'id': n_students + n_supervisors + 1, 'email': 'fic@example.edu', 'password': 'x',
+                  'role': 'fic', 'created_at': now})
+    insert_chunked(User, users)
+
+    insert_chunked(FIC, [{'id': 1, 'user_id': n_students + n_supervisors + 1, 'name': 'FIC', 'school': SCHOOL}])
+    insert_chunked(Supervisor, [{'id': i, 'user_id': n_students + i, 'name': f'Supervisor {i}', 'domain': 'ML',
+                                 'school': SCHOOL} for i in range(1, n_supervisors + 1)])
+
+    groups = []
+    for i in range(1, n_groups + 1):
+        groups.append({'id': i, 'name': f'G{i:06d}', 'branch': BRANCHES[i % len(BRANCHES)],
+                       'year': YEARS[i % 2], 'supervisor_id': rng.randint(1, n_supervisors)
+                       if rng.random() < 0.5 else None, 'created_at': now})
+    insert_chunked(StudentGroup, groups)
+
+    students = []
+    for i in range(1, n_students + 1):
+        # Three quarters of the students are in a group
+        group_id = (i - 1) // 3 + 1 if i <= n_groups * 3 else None
+        branch = groups[group_id - 1]['branch'] if group_id else BRANCHES[i % len(BRANCHES)]
+        year = groups[group_id - 1]['year'] if group_id else YEARS[i % 2]
+        students.append({'id': i, 'user_id': i, 'name': f'Student {i}', 'roll_number': f'R{i:07d}',
+                         'year': year, 'school': SCHOOL, 'branch': branch, 'group_id': group_id})
+    insert_chunked(Student, students)
+
+    insert_chunked(GroupInvite, [{'sender_id': rng.randint(1, n_students), 'receiver_id': rng.randint(1, n_students),
+                                  'status': rng.choice(['pending', 'accepted', 'rejected']), 'sent_at': now}
+                                 for _ in range(n_students * 2)])
+    insert_chunked(SupervisorRequest, [{'group_id': rng.randint(1, n_groups),
+                                        'supervisor_id': rng.randint(1, n_supervisors),
+                                        'status': rng.choice(['pending', 'accepted', 'rejected']), 'sent_at': now}
+                                       for _ in range(n_groups * 3)])
+    insert_chunked(SupervisorChangeRequest, [{'group_id': rng.randint(1, n_groups),
+                                              'current_supervisor_id': rng.randint(1, n_supervisors),
+                                              'new_supervisor_id': rng.randint(1, n_supervisors),
+                                              'status': rng.choice(['pending', 'approved', 'rejected']),
+                                              'created_at': now} for _ in range(n_groups // 4)])
+    insert_chunked(Marks, [{'student_id': i, 'presentation': 5, 'documents': 5, 'collaboration': 5, 'total': 15,
+                            'given_by': rng.randint(1, n_supervisors), 'given_at': now}
+                           for i in range(1, n_students + 1)])
+    # One OTP per (email, purpose), most of them used or expired
+    insert_chunked(OTP, [{'email': f'user{i}@example.edu', 'otp': '123456', 'purpose': purpose,
+                          'created_at': now - timedelta(minutes=rng.randint(0, 100000)),
+                          'expires_at': now + timedelta(minutes=rng.randint(-100000, 10)), 'used': rng.random() < 0.9}
+                         for i in range(1, n_students + 1) for purpose in ('registration', 'password_reset')])
+    insert_chunked(Notification, [{'title': f'Notice {i}', 'message': 'Message',
+                                   'target_type': rng.choice(['all', 'students', 'supervisors', 'specific_branch']),
+                                   'target_branch': rng.choice(BRANCHES), 'created_by': 1,
+                                   'created_at': now - timedelta(minutes=i)} for i in range(n_students // 5)])
+
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+
+def hot_queries(n_students):
+    """The filters the request handlers run most often, with representative values"""
+    student_id = n_students // 2
+    email = f'user{student_id}@example.edu'
+    return [
+        ('otp lookup', OTP.query.filter_by(email=email, purpose='registration')),
+        ('otp purge batch', OTP.query.filter(OTP.expires_at < datetime.utcnow() - timedelta(days=30))
+            .with_entities(OTP.id).limit(1000)),
+        ('pending invites', GroupInvite.query.filter_by(receiver_id=student_id, status='pending')),
+        ('existing invite', GroupInvite.query.filter_by(sender_id=student_id, receiver_id=student_id + 1,
+                                                       status='pending')),
+        ('pending supervisor requests', SupervisorRequest.query.filter_by(supervisor_id=3, status='pending')),
+        ('group supervisor requests', SupervisorRequest.query.filter_by(group_id=student_id // 4)),
+        ('pending change request', SupervisorChangeRequest.query.filter_by(group_id=student_id // 4,
+                                                                          status='pending')),
+        ('student by user', Student.query.filter_by(user_id=student_id)),
+        ('group members', Student.query.filter_by(group_id=student_id // 4)),
+        ('marks lookup', Marks.query.filter_by(student_id=student_id, given_by=3)),
+        ('notification feed', Notification.query.filter(
+            Notification.target_type.in_(['all', 'students'])
+        ).order_by(Notification.created_at.desc()).limit(10)),
+    ]
+
+
+def explain(query):
+    """Return the query plan as a single line"""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(db.text(prefix + sql)).fetchall()
+    return ' | '.join(str(row[-1]) for row in rows)
+
+
+def measure(n_students, repeat):
+    """Time each hot query and return {name: (ms per call, plan)}"""
+    results = {}
+    for name, query in hot_queries(n_students):
+        query.all()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            query.all()
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        results[name] = (elapsed, explain(query))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for index in HOT_INDEXES:
+            index.drop(db.engine)
+
+        seed(args.students)
+
+        print("\nMeasuring without hot-path indexes...")
+        before = measure(args.students, args.repeat)
+
+        for index in HOT_INDEXES:
+            index.create(db.engine)
+        if db.engine.dialect.name in ('sqlite', 'postgresql'):
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+
+        print("Measuring with hot-path indexes...\n")
+        after = measure(args.students, args.repeat)
+
+        print(f"{'query':<30}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+        for name in before:
+            speedup = before[name][0] / after[name][0] if after[name][0] else float('inf')
+            print(f"{name:<30}{before[name][0]:>14.3f}{after[name][0]:>14.3f}{speedup:>9.1f}x")
+
+        print("\nQuery plans:")
+        for name in before:
+            print(f"\n{name}")
+            print(f"  before: {before[name][1]}")
+            print(f"  after:  {after[name][1]}")
+
+
+if __name__ == '__main__':
+    main()
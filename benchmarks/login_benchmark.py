@@ -0,0 +1,148 @@
+"""Measure login throughput for different numbers of app workers and hashing pool sizes.
+
+For every value of --workers, that many single-threaded app workers are
+forked onto one listening socket, the way gunicorn runs sync workers, and
+concurrent logins are sent to them over HTTP. This is repeated for every
+value of --hash-workers (PASSWORD_HASH_WORKERS per app worker, 0 hashes
+inline in the app worker).
+
+Usage:
+    python benchmarks/login_benchmark.py --workers 1,2,4 --hash-workers 0,1,2 --clients 8 --logins 64
+
+By default a throwaway SQLite database is used. Set DATABASE_URL to run
+against another database; its tables will be dropped and recreated.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'login_benchmark.db')
+
+import app as app_module  # noqa: E402
+from app import app, db, User, hash_passwords  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def seed(n_users):
+    """Create users whose hashes already match the configured method, so no login rehashes"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        hashes = hash_passwords([PASSWORD] * n_users)
+        db.session.execute(db.insert(User), [
+            {'email': f'user{i}@example.edu', 'password': hashes[i], 'role': 'student'}
+            for i in range(n_users)
+        ])
+        db.session.commit()
+
+
+def shutdown_password_pool():
+    if app_module._password_pool is not None:
+        app_module._password_pool.shutdown()
+        app_module._password_pool = None
+
+
+def serve(listener):
+    """Run one app worker on the shared socket until it is terminated"""
+    with app.app_context():
+        # Connections opened before the fork belong to the parent
+        db.engine.dispose()
+    # Stop the hashing pool with the worker, as gunicorn's graceful shutdown would
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    try:
+        BaseWSGIServer('127.0.0.1', 0, app, handler=QuietHandler, fd=listener.fileno()).serve_forever()
+    finally:
+        shutdown_password_pool()
+
+
+def login(port, i, n_users):
+    """Log one user in over HTTP and return the request latency in seconds"""
+    body = urlencode({'email': f'user{i % n_users}@example.edu', 'password': PASSWORD})
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    started = time.perf_counter()
+    connection.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - started
+    connection.close()
+    # A successful login redirects to the dashboard
+    assert response.status == 302, response.status
+    return elapsed
+
+
+def measure(workers, hash_workers, clients, logins, n_users):
+    """Return (logins per second, median latency, p95 latency) for one configuration"""
+    shutdown_password_pool()
+    app.config['PASSWORD_HASH_WORKERS'] = hash_workers
+
+    listener = socket.create_server(('127.0.0.1', 0), backlog=clients * 2)
+    port = listener.getsockname()[1]
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=serve, args=(listener,)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            # Warm up every worker and its pool
+            list(executor.map(login, [port] * clients * workers, range(clients * workers), [n_users] * clients * workers))
+            started = time.perf_counter()
+            latencies = list(executor.map(login, [port] * logins, range(logins), [n_users] * logins))
+            elapsed = time.perf_counter() - started
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+        listener.close()
+
+    latencies.sort()
+    return logins / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma separated numbers of app workers')
+    parser.add_argument('--hash-workers', default='0,1,2', help='comma separated PASSWORD_HASH_WORKERS values')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent login requests')
+    parser.add_argument('--logins', type=int, default=64, help='logins per measurement')
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--method', help='override PASSWORD_HASH_METHOD, e.g. pbkdf2:sha256:100000')
+    args = parser.parse_args()
+
+    # Every login comes from the same client address
+    app.config['RATE_LIMIT_ENABLED'] = False
+    if args.method:
+        app.config['PASSWORD_HASH_METHOD'] = args.method
+    seed(args.users)
+
+    print(f"Method {app.config['PASSWORD_HASH_METHOD']}, {os.cpu_count()} CPUs, "
+          f"{args.clients} concurrent requests, {args.logins} logins per run\n")
+    print(f"{'app workers':<13}{'hash workers':<14}{'logins/s':>10}{'median (ms)':>14}{'p95 (ms)':>12}")
+    for workers in (int(value) for value in args.workers.split(',')):
+        for hash_workers in (int(value) for value in args.hash_workers.split(',')):
+            throughput, median, p95 = measure(workers, hash_workers, args.clients, args.logins, args.users)
+            print(f"{workers:<13}{hash_workers:<14}{throughput:>10.1f}{median * 1000:>14.1f}{p95 * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,669 @@
+"""Drive every route in app.py against a seeded dataset and report latency
+percentiles and SQL queries per request, failing on regressions against
+stored baselines.
+
+Each scenario sends --requests requests as the role it needs, from --threads
+concurrent clients. Routes that change state get a fresh target for every
+request, such as another invite, group or supervisor picked from the
+database beforehand, so that every request takes the success path. Queries
+per request are read from the Server-Timing header. Logins and target
+selection are not timed.
+
+Usage:
+    python benchmarks/route_benchmark.py
+    python benchmarks/route_benchmark.py --check
+    python benchmarks/route_benchmark.py --save-baseline
+    python benchmarks/route_benchmark.py --only dashboard,marks
+
+By default a throwaway SQLite database is seeded and requests go through the
+Flask test client. Set DATABASE_URL to use another database; its tables will
+be dropped and recreated. To measure a running server instead, seed its
+database with seed_data.py and start it with RATE_LIMIT_ENABLED=false and
+the same PASSWORD_HASH_METHOD and METRICS_TOKEN, then point --url at it with DATABASE_URL set
+to the same database:
+
+    python benchmarks/route_benchmark.py --url http://127.0.0.1:8000 --threads 8
+"""
+import argparse
+import gc
+import http.cookiejar
+import io
+import json
+import math
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'route_benchmark.db')
+
+from app import (app, db, User, Student, Supervisor, FIC, StudentGroup, GroupInvite,  # noqa: E402
+                 SupervisorRequest, SupervisorChangeRequest, Panel, otp_store, MAX_SUPERVISED_GROUPS, PANEL_SIZE)
+from seed_data import PASSWORD, SCHOOL_BRANCHES, seed  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'route_baselines.json')
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:1000'
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# One request of a scenario: who sends it and what. user is an email, or None
+# for an anonymous client
+Call = namedtuple('Call', 'user method path kwargs')
+
+
+def call(user, method, path, **kwargs):
+    return Call(user, method, path, kwargs)
+
+
+class TestClientSession:
+    """A browser session through the Flask test client"""
+
+    def __init__(self):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None, data=None, files=None, headers=None):
+        if files:
+            data = dict(data or {}, **{name: (io.BytesIO(content), filename) for name, (filename, content) in files.items()})
+        response = self.client.open(path, method=method, json=json, data=data, headers=headers)
+        body = response.get_data()
+        response.close()
+        return response.status_code, response.headers, body
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPSession:
+    """A browser session talking to a running server, with its own cookie jar"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                                  NoRedirect())
+
+    def request(self, method, path, data=None, files=None, headers=None, **kwargs):
+        headers = dict(headers or {})
+        body = None
+        if kwargs.get('json') is not None:
+            body = json.dumps(kwargs['json']).encode()
+            headers['Content-Type'] = 'application/json'
+        elif files:
+            boundary = secrets.token_hex(16)
+            parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+                     for name, value in (data or {}).items()]
+            parts += [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                      f'Content-Type: text/csv\r\n\r\n'.encode() + content + b'\r\n'
+                      for name, (filename, content) in files.items()]
+            body = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers, error.read()
+
+
+class Sessions:
+    """Logged-in sessions per user and thread, so concurrent requests never share a cookie jar"""
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+        self.local = threading.local()
+
+    def get(self, user):
+        sessions = self.local.__dict__.setdefault('sessions', {})
+        if user not in sessions:
+            session = HTTPSession(self.base_url) if self.base_url else TestClientSession()
+            if user:
+                status, _, _ = session.request('POST', '/login', data={'email': user, 'password': PASSWORD})
+                assert status == 302, f'login as {user} failed with {status}'
+            sessions[user] = session
+        return sessions[user]
+
+    def discard(self, user):
+        self.local.__dict__.setdefault('sessions', {}).pop(user, None)
+
+
+class Picker:
+    """Chooses benchmark actors and targets, never handing the same row to two scenarios"""
+
+    def __init__(self):
+        self.taken = set()
+
+    def take(self, kind, ids, n=None):
+        """Claim up to n of the ids for kind, skipping ones already claimed"""
+        picked = []
+        for row_id in ids:
+            if (kind, row_id) not in self.taken:
+                self.taken.add((kind, row_id))
+                picked.append(row_id)
+                if n is not None and len(picked) == n:
+                    break
+        return picked
+
+    def one(self, kind, query):
+        picked = self.take(kind, (row_id for (row_id,) in query.limit(1000)), 1)
+        assert picked, f'no {kind} available for the benchmark; seed more students'
+        return picked[0]
+
+
+def email_of(model, row_id):
+    return db.session.query(User.email).join(model, model.user_id == User.id).filter(model.id == row_id).scalar()
+
+
+def school_of_group(group_id):
+    return db.session.query(Student.school).filter_by(group_id=group_id).limit(1).scalar()
+
+
+def fic_email(school):
+    return db.session.query(User.email).join(FIC, FIC.user_id == User.id).filter(FIC.school == school).order_by(FIC.id).limit(1).scalar()
+
+
+def member_email(group_id):
+    return db.session.query(User.email).join(Student, Student.user_id == User.id).filter(
+        Student.group_id == group_id).order_by(Student.id).limit(1).scalar()
+
+
+def new_email(prefix):
+    return f'{prefix}-{secrets.token_hex(6)}@example.edu'
+
+
+class Scenarios:
+    """Every scenario, as a method returning the calls for n requests"""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.pick = Picker()
+        school = list(SCHOOL_BRANCHES)[0]
+        self.school = school
+
+        # A student in a supervised group with a panel and marks, for the richest dashboard
+        self.student = self.pick.one('student', db.session.query(Student.id).join(
+            StudentGroup, Student.group_id == StudentGroup.id).join(Panel, Panel.group_id == StudentGroup.id).filter(
+            Student.school == school, StudentGroup.supervisor_id.isnot(None)).order_by(Student.id))
+        self.student_email = email_of(Student, self.student)
+        self.pick.take('group', [db.session.get(Student, self.student).group_id])
+
+        # A student without a group, with classmates to invite
+        self.loner = self.pick.one('student', db.session.query(Student.id).filter(
+            Student.school == school, Student.group_id.is_(None)).order_by(Student.id))
+        self.loner_email = email_of(Student, self.loner)
+
+        # A supervisor with a full set of groups
+        self.supervisor = self.pick.one('supervisor', db.session.query(Supervisor.id).filter(
+            Supervisor.school == school, Supervisor.supervised_count == MAX_SUPERVISED_GROUPS).order_by(Supervisor.id))
+        self.supervisor_email = email_of(Supervisor, self.supervisor)
+        self.pick.take('group', [row[0] for row in db.session.query(StudentGroup.id).filter_by(supervisor_id=self.supervisor)])
+
+        self.fic_email = fic_email(school)
+
+    # Anonymous pages and authentication
+
+    def index(self, n):
+        return [call(None, 'GET', '/')] * n
+
+    def login_page(self, n):
+        return [call(None, 'GET', '/login')] * n
+
+    def login(self, n):
+        students = self.pick.take('login', (row[0] for row in db.session.query(User.email).filter_by(role='student').limit(n * 2)), n)
+        return [call(None, 'POST', '/login', data={'email': email, 'password': PASSWORD}) for email in students]
+
+    def register(self, n):
+        return [call(None, 'POST', '/register', data={'role': 'student'})] * n
+
+    def send_otp(self, n):
+        return [call(None, 'POST', '/send_otp', json={'email': new_email('otp'), 'purpose': 'registration'}) for _ in range(n)]
+
+    def student_registration(self, n):
+        calls = []
+        for _ in range(n):
+            email = new_email('new-student')
+            calls.append(call(None, 'POST', '/register/student', data={
+                'name': 'New Student', 'email': email, 'roll_number': 'N' + secrets.token_hex(6), 'year': 'Third',
+                'school': self.school, 'branch': SCHOOL_BRANCHES[self.school][0], 'password': PASSWORD,
+                'confirm_password': PASSWORD, 'otp': otp_store.issue(email, 'registration')}))
+        db.session.commit()
+        return calls
+
+    def supervisor_registration(self, n):
+        calls = []
+        for _ in range(n):
+            email = new_email('new-supervisor')
+            calls.append(call(None, 'POST', '/register/supervisor', data={
+                'name': 'New Supervisor', 'email': email, 'domain': 'ML', 'school': self.school, 'password': PASSWORD,
+                'confirm_password': PASSWORD, 'otp': otp_store.issue(email, 'registration')}))
+        db.session.commit()
+        return calls
+
+    def fic_registration(self, n):
+        # Schools take at most 6 FICs, so this runs once per free place
+        calls = []
+        for school in SCHOOL_BRANCHES:
+            for _ in range(max(6 - FIC.query.filter_by(school=school).count(), 0)):
+                email = new_email('new-fic')
+                calls.append(call(None, 'POST', '/register/fic', data={
+                    'name': 'New FIC', 'email': email, 'school': school, 'password': PASSWORD,
+                    'confirm_password': PASSWORD, 'otp': otp_store.issue(email, 'registration')}))
+        db.session.commit()
+        return calls[:n]
+
+    def forgot_password(self, n):
+        emails = self.pick.take('reset', (row[0] for row in db.session.query(User.email).filter_by(role='supervisor').limit(n * 2)), n)
+        return [call(None, 'POST', '/forgot_password', data={'email': email}) for email in emails]
+
+    def send_password_reset_otp(self, n):
+        emails = self.pick.take('reset', (row[0] for row in db.session.query(User.email).filter_by(role='supervisor').limit(n * 4)), n)
+        return [call(None, 'POST', '/send_password_reset_otp', json={'email': email}) for email in emails]
+
+    def reset_password(self, n):
+        emails = self.pick.take('reset', (row[0] for row in db.session.query(User.email).filter_by(role='supervisor').limit(n * 6)), n)
+        calls = [call(None, 'POST', f'/reset_password/{email}', data={
+            'otp': otp_store.issue(email, 'password_reset'), 'password': PASSWORD, 'confirm_password': PASSWORD
+        }) for email in emails]
+        db.session.commit()
+        return calls
+
+    def metrics(self, n):
+        headers = {'Authorization': f"Bearer {app.config['METRICS_TOKEN']}"}
+        return [call(None, 'GET', '/metrics', headers=headers)] * n
+
+    # Students
+
+    def student_dashboard(self, n):
+        return [call(self.student_email, 'GET', '/student/dashboard')] * n
+
+    def student_dashboard_not_modified(self, n):
+        _, headers, _ = self.sessions.get(self.student_email).request('GET', '/student/dashboard')
+        return [call(self.student_email, 'GET', '/student/dashboard', headers={'If-None-Match': headers['ETag']})] * n
+
+    def available_students(self, n):
+        return [call(self.loner_email, 'GET', '/available_students')] * n
+
+    def available_students_search(self, n):
+        return [call(self.loner_email, 'GET', '/available_students?q=Student%201')] * n
+
+    def recommended_supervisors(self, n):
+        group_id = self.pick.one('group', db.session.query(StudentGroup.id).join(Student).filter(
+            Student.school == self.school, StudentGroup.supervisor_id.is_(None),
+            StudentGroup.project_title.isnot(None)).order_by(StudentGroup.id))
+        return [call(member_email(group_id), 'GET', '/recommended_supervisors')] * n
+
+    def send_invite(self, n):
+        loner = db.session.get(Student, self.loner)
+        invited = {row[0] for row in db.session.query(GroupInvite.receiver_id).filter_by(sender_id=loner.id, status='pending')}
+        receivers = self.pick.take('student', (row[0] for row in db.session.query(Student.id).filter(
+            Student.year == loner.year, Student.branch == loner.branch, Student.group_id.is_(None),
+            Student.id != loner.id).order_by(Student.id).limit(n * 4) if row[0] not in invited), n)
+        return [call(self.loner_email, 'POST', '/send_invite', json={'receiver_id': receiver}) for receiver in receivers]
+
+    def respond_invite_accept(self, n):
+        # Both sides without a group, so every accept forms a new group
+        calls = []
+        invites = db.session.query(GroupInvite.id, GroupInvite.sender_id, GroupInvite.receiver_id).join(
+            Student, Student.id == GroupInvite.sender_id).filter(
+            GroupInvite.status == 'pending', Student.group_id.is_(None)).order_by(GroupInvite.id).limit(n * 10)
+        for invite_id, sender_id, receiver_id in invites:
+            if len(calls) < n and self.pick.take('student', [sender_id, receiver_id]) == [sender_id, receiver_id]:
+                calls.append(call(email_of(Student, receiver_id), 'POST', '/respond_invite',
+                                  json={'invite_id': invite_id, 'action': 'accept'}))
+        return calls
+
+    def respond_invite_reject(self, n):
+        invites = db.session.query(GroupInvite.id, GroupInvite.receiver_id).filter_by(status='pending').order_by(
+            GroupInvite.id.desc()).limit(n * 10)
+        calls = []
+        for invite_id, receiver_id in invites:
+            if len(calls) < n and self.pick.take('student', [receiver_id]):
+                calls.append(call(email_of(Student, receiver_id), 'POST', '/respond_invite',
+                                  json={'invite_id': invite_id, 'action': 'reject'}))
+        return calls
+
+    def leave_group(self, n):
+        groups = self.pick.take('group', (row[0] for row in db.session.query(StudentGroup.id).filter(
+            StudentGroup.member_count >= 3).order_by(StudentGroup.id.desc()).limit(n * 4)), n)
+        return [call(member_email(group_id), 'POST', '/leave_group') for group_id in groups]
+
+    def request_supervisor(self, n):
+        calls = []
+        groups = db.session.query(StudentGroup.id).filter(StudentGroup.supervisor_id.is_(None)).order_by(StudentGroup.id).limit(n * 4)
+        for group_id in self.pick.take('group', (row[0] for row in groups), n):
+            school = school_of_group(group_id)
+            requested = {row[0] for row in db.session.query(SupervisorRequest.supervisor_id).filter_by(group_id=group_id)}
+            if len(requested) >= 5:
+                continue
+            supervisor_id = db.session.query(Supervisor.id).filter(
+                Supervisor.school == school, Supervisor.supervised_count < MAX_SUPERVISED_GROUPS,
+                Supervisor.id.notin_(requested or [0])).order_by(Supervisor.id.desc()).limit(1).scalar()
+            calls.append(call(member_email(group_id), 'POST', '/request_supervisor', json={'supervisor_id': supervisor_id}))
+        return calls
+
+    def request_supervisor_change(self, n):
+        pending = db.session.query(SupervisorChangeRequest.group_id).filter_by(status='pending')
+        groups = db.session.query(StudentGroup.id, StudentGroup.supervisor_id).filter(
+            StudentGroup.supervisor_id.isnot(None), StudentGroup.id.notin_(pending)).order_by(StudentGroup.id).limit(n * 4)
+        calls = []
+        for group_id, supervisor_id in groups:
+            if len(calls) < n and self.pick.take('group', [group_id]):
+                new_supervisor_id = db.session.query(Supervisor.id).filter(
+                    Supervisor.school == school_of_group(group_id), Supervisor.id != supervisor_id).limit(1).scalar()
+                calls.append(call(member_email(group_id), 'POST', '/request_supervisor_change',
+                                  json={'new_supervisor_id': new_supervisor_id, 'reason': 'Closer to our domain'}))
+        return calls
+
+    def update_project_title(self, n):
+        return [call(self.student_email, 'POST', '/update_project_title', json={'title': f'Project revision {i}'})
+                for i in range(n)]
+
+    def update_document_link(self, n):
+        return [call(self.student_email, 'POST', '/update_document_link',
+                     json={'link': f'https://docs.example.edu/revision-{i}'}) for i in range(n)]
+
+    def mark_notifications_read(self, n):
+        return [call(self.student_email, 'POST', '/mark_notifications_read')] * n
+
+    # Supervisors
+
+    def supervisor_dashboard(self, n):
+        return [call(self.supervisor_email, 'GET', '/supervisor/dashboard')] * n
+
+    def respond_supervisor_request_accept(self, n):
+        requests = db.session.query(SupervisorRequest.id, SupervisorRequest.supervisor_id, SupervisorRequest.group_id).join(
+            Supervisor, Supervisor.id == SupervisorRequest.supervisor_id).join(
+            StudentGroup, StudentGroup.id == SupervisorRequest.group_id).filter(
+            SupervisorRequest.status == 'pending', StudentGroup.supervisor_id.is_(None),
+            Supervisor.supervised_count < MAX_SUPERVISED_GROUPS).order_by(SupervisorRequest.id).limit(n * 10)
+        calls = []
+        for request_id, supervisor_id, group_id in requests:
+            if len(calls) < n and self.pick.take('supervisor', [supervisor_id]) and self.pick.take('group', [group_id]):
+                calls.append(call(email_of(Supervisor, supervisor_id), 'POST', '/respond_supervisor_request',
+                                  json={'request_id': request_id, 'action': 'accept'}))
+        return calls
+
+    def respond_supervisor_request_reject(self, n):
+        requests = db.session.query(SupervisorRequest.id, SupervisorRequest.supervisor_id).filter_by(
+            status='pending').order_by(SupervisorRequest.id.desc()).limit(n * 10)
+        calls = []
+        for request_id, supervisor_id in requests:
+            if len(calls) < n and self.pick.take('request', [request_id]):
+                calls.append(call(email_of(Supervisor, supervisor_id), 'POST', '/respond_supervisor_request',
+                                  json={'request_id': request_id, 'action': 'reject'}))
+        return calls
+
+    def supervised_students(self):
+        return [row[0] for row in db.session.query(Student.id).join(StudentGroup).filter(
+            StudentGroup.supervisor_id == self.supervisor).order_by(Student.id)]
+
+    def assign_marks(self, n):
+        students = self.supervised_students()
+        return [call(self.supervisor_email, 'POST', '/assign_marks', json={
+            'student_id': students[i % len(students)], 'presentation': 8, 'documents': 7, 'collaboration': i % 10
+        }) for i in range(n)]
+
+    def assign_marks_bulk(self, n):
+        marks = [{'student_id': student_id, 'presentation': 8, 'documents': 7, 'collaboration': 9}
+                 for student_id in self.supervised_students()]
+        return [call(self.supervisor_email, 'POST', '/assign_marks_bulk', json={'marks': marks})] * n
+
+    # FICs
+
+    def fic_dashboard(self, n):
+        return [call(self.fic_email, 'GET', '/fic/dashboard')] * n
+
+    def respond_supervisor_change_request_approve(self, n):
+        # An approval needs a new supervisor with a free place, which few seeded
+        # requests still have once other scenarios have run, so file fresh
+        # requests to supervisors that do, up to their free places. All in the
+        # school with the most free places, so the warmup requests warm the
+        # caches of the FIC that sends the timed ones
+        free_places = db.func.sum(MAX_SUPERVISED_GROUPS - Supervisor.supervised_count)
+        school = db.session.query(Supervisor.school).group_by(Supervisor.school).order_by(
+            free_places.desc(), Supervisor.school).limit(1).scalar()
+        supervisors = db.session.query(Supervisor.id, Supervisor.supervised_count).filter(
+            Supervisor.school == school,
+            Supervisor.supervised_count < MAX_SUPERVISED_GROUPS).order_by(Supervisor.id.desc()).limit(n * 4)
+        pending = db.session.query(SupervisorChangeRequest.group_id).filter_by(status='pending')
+        calls = []
+        for supervisor_id, supervised_count in supervisors:
+            if len(calls) >= n or not self.pick.take('supervisor', [supervisor_id]):
+                continue
+            free = min(MAX_SUPERVISED_GROUPS - supervised_count, n - len(calls))
+            groups = dict(db.session.query(StudentGroup.id, StudentGroup.supervisor_id).join(Student).filter(
+                Student.school == school, StudentGroup.supervisor_id.isnot(None),
+                StudentGroup.supervisor_id != supervisor_id, StudentGroup.id.notin_(pending)
+            ).distinct().order_by(StudentGroup.id).limit(free * 4).all())
+            for group_id in self.pick.take('group', groups, free):
+                change_request = SupervisorChangeRequest(group_id=group_id, current_supervisor_id=groups[group_id],
+                                                         new_supervisor_id=supervisor_id, reason='Closer to our domain')
+                db.session.add(change_request)
+                db.session.flush()
+                calls.append(call(fic_email(school), 'POST', '/respond_supervisor_change_request',
+                                  json={'request_id': change_request.id, 'action': 'approve'}))
+        return calls
+
+    def respond_supervisor_change_request_reject(self, n):
+        requests = db.session.query(SupervisorChangeRequest.id, SupervisorChangeRequest.group_id).filter_by(
+            status='pending').order_by(SupervisorChangeRequest.id.desc()).limit(n * 2)
+        calls = []
+        for request_id, group_id in requests:
+            if len(calls) < n and self.pick.take('change', [request_id]):
+                calls.append(call(fic_email(school_of_group(group_id)), 'POST', '/respond_supervisor_change_request',
+                                  json={'request_id': request_id, 'action': 'reject'}))
+        return calls
+
+    def create_panel(self, n):
+        supervisors = [row[0] for row in db.session.query(Supervisor.id).filter_by(school=self.school).order_by(Supervisor.id).limit(PANEL_SIZE + 1)]
+        groups = db.session.query(StudentGroup.id, StudentGroup.supervisor_id).join(Student).filter(
+            Student.school == self.school, StudentGroup.id.notin_(db.session.query(Panel.group_id))
+        ).distinct().order_by(StudentGroup.id).limit(n * 4)
+        calls = []
+        for group_id, supervisor_id in groups:
+            if len(calls) < n and self.pick.take('group', [group_id]):
+                members = [s for s in supervisors if s != supervisor_id][:PANEL_SIZE]
+                calls.append(call(self.fic_email, 'POST', '/create_panel', json={'group_id': group_id, 'supervisor_ids': members}))
+        return calls
+
+    def send_notification(self, n):
+        return [call(self.fic_email, 'POST', '/send_notification', json={
+            'title': f'Review {i}', 'message': 'Reviews start next week.', 'target_type': 'students'
+        }) for i in range(n)]
+
+    def download_group_details(self, n):
+        return [call(self.fic_email, 'GET', '/download_group_details')] * n
+
+    def marks_analytics(self, n):
+        return [call(self.fic_email, 'GET', '/marks_analytics')] * n
+
+    def import_accounts(self, n):
+        calls = []
+        for _ in range(n):
+            rows = ['name,email,roll_number,year,branch'] + [
+                f"Imported Student,{new_email('import')},I{secrets.token_hex(6)},Third,{SCHOOL_BRANCHES[self.school][0]}"
+                for _ in range(10)
+            ]
+            calls.append(call(self.fic_email, 'POST', '/import_accounts', data={'role': 'student'},
+                              files={'file': ('students.csv', '\n'.join(rows).encode())}))
+        return calls
+
+    def auto_assign_panels(self, n):
+        # Assigns every group of the school at once, so this runs once per school
+        return [call(fic_email(school), 'POST', '/auto_assign_panels', json={}) for school in list(SCHOOL_BRANCHES)[:n]]
+
+    def logout(self, n):
+        emails = self.pick.take('login', (row[0] for row in db.session.query(User.email).filter_by(role='supervisor').order_by(User.id.desc()).limit(n * 2)), n)
+        return [call(email, 'GET', '/logout') for email in emails]
+
+
+# Run in this order: scenarios that use up targets (panels, supervisor places)
+# come after the ones that need them, and logout comes last
+SCENARIOS = [
+    'index', 'login_page', 'login', 'register', 'send_otp', 'student_registration', 'supervisor_registration',
+    'fic_registration', 'forgot_password', 'send_password_reset_otp', 'reset_password', 'metrics',
+    'student_dashboard', 'student_dashboard_not_modified', 'available_students', 'available_students_search',
+    'recommended_supervisors', 'send_invite', 'respond_invite_accept', 'respond_invite_reject', 'leave_group',
+    'request_supervisor', 'request_supervisor_change', 'update_project_title', 'update_document_link',
+    'mark_notifications_read', 'supervisor_dashboard', 'respond_supervisor_request_accept',
+    'respond_supervisor_request_reject', 'assign_marks', 'assign_marks_bulk', 'fic_dashboard',
+    'respond_supervisor_change_request_approve', 'respond_supervisor_change_request_reject', 'create_panel',
+    'send_notification', 'download_group_details', 'marks_analytics', 'import_accounts', 'auto_assign_panels',
+    'logout',
+]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values"""
+    return values[max(math.ceil(p * len(values)) - 1, 0)]
+
+
+def expected(status, body):
+    """Whether a response took the success path: a page, a redirect or a successful JSON reply"""
+    if status not in (200, 302, 304):
+        return False
+    if body[:1] == b'{':
+        return json.loads(body).get('success', True)
+    return True
+
+
+def run_scenario(name, calls, sessions, threads, warmup):
+    """Send the calls and return latency percentiles, mean queries and failures"""
+    def send(c):
+        # Logs in on first use, before the timer starts
+        session = sessions.get(c.user)
+        started = time.perf_counter()
+        status, headers, body = session.request(c.method, c.path, **c.kwargs)
+        elapsed = time.perf_counter() - started
+        if c.path == '/logout':
+            sessions.discard(c.user)
+        match = SERVER_TIMING_QUERIES.search(headers.get('Server-Timing', ''))
+        return elapsed, int(match.group(1)) if match else None, expected(status, body)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, calls[:warmup]))
+        results = list(executor.map(send, calls[warmup:]))
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in results)
+    queries = [count for _, count, _ in results if count is not None]
+    return {
+        'requests': len(results),
+        'failed': sum(1 for _, _, ok in results if not ok),
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+def compare(results, baseline, latency_tolerance, query_tolerance, latency_slack_ms=0):
+    """Return a list of regressions of results against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline['routes'].get(name)
+        if not base:
+            continue
+        # A real regression adds a query to every request; the slack absorbs
+        # occasional ones such as the periodic user cache check
+        if result['queries'] is not None and base['queries'] is not None \
+                and result['queries'] > max(base['queries'] * (1 + query_tolerance), base['queries'] + 0.5):
+            regressions.append(f"{name}: {result['queries']} queries per request, baseline {base['queries']}")
+        if result['p95_ms'] > max(base['p95_ms'] * (1 + latency_tolerance), base['p95_ms'] + latency_slack_ms):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f} ms, baseline {base['p95_ms']:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed requests before each scenario')
+    parser.add_argument('--threads', type=int, default=1, help='concurrent clients')
+    parser.add_argument('--only', help='comma separated substrings of the scenarios to run')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client; skips seeding')
+    parser.add_argument('--no-seed', action='store_true', help='use the data already in DATABASE_URL')
+    parser.add_argument('--method', default=DEFAULT_HASH_METHOD, help='PASSWORD_HASH_METHOD for seeded and new users')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 on regressions against the baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--latency-tolerance', type=float, default=1.0, help='allowed p95 increase, 1.0 is 100%%')
+    parser.add_argument('--latency-slack-ms', type=float, default=25,
+                        help='p95 increase in ms always allowed, as timings of fast routes are noisy')
+    parser.add_argument('--query-tolerance', type=float, default=0.1, help='allowed increase of queries per request')
+    args = parser.parse_args()
+
+    app.config['PASSWORD_HASH_METHOD'] = args.method
+    app.config['RATE_LIMIT_ENABLED'] = False
+    app.config['METRICS_TOKEN'] = app.config['METRICS_TOKEN'] or secrets.token_hex(16)
+
+    names = [name for name in SCENARIOS if not args.only or any(part in name for part in args.only.split(','))]
+    results = {}
+    with app.app_context():
+        if not args.url and not args.no_seed:
+            db.drop_all()
+            db.create_all()
+            seed(args.students)
+
+        sessions = Sessions(args.url)
+        scenarios = Scenarios(sessions)
+        # Leave the objects created so far out of garbage collection, so that
+        # full collections during timed requests do not scan them
+        gc.collect()
+        gc.freeze()
+        print(f"\n{'scenario':<44}{'requests':>9}{'failed':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'queries':>9}")
+        for name in names:
+            calls = getattr(scenarios, name)(args.requests + args.warmup)
+            db.session.commit()
+            if len(calls) <= args.warmup:
+                print(f"{name:<44}{'skipped, no targets left':>56}")
+                continue
+            result = results[name] = run_scenario(name, calls, sessions, args.threads, min(args.warmup, len(calls) - 1))
+            queries = '-' if result['queries'] is None else f"{result['queries']:.1f}"
+            print(f"{name:<44}{result['requests']:>9}{result['failed']:>8}{result['p50_ms']:>10.1f}"
+                  f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{queries:>9}")
+            db.session.remove()
+
+    failed = [name for name, result in results.items() if result['failed']]
+    if failed:
+        print(f"\nRequests that did not succeed in: {', '.join(failed)}")
+
+    if args.save_baseline:
+        baseline = {'students': args.students, 'requests': args.requests, 'threads': args.threads, 'routes': results}
+        if os.path.exists(args.baseline) and args.only:
+            with open(args.baseline) as f:
+                baseline['routes'] = dict(json.load(f)['routes'], **results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline saved to {os.path.relpath(args.baseline)}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline['students'], baseline['threads']) != (args.students, args.threads):
+            print(f"\nWarning: baseline was measured with {baseline['students']} students and "
+                  f"{baseline['threads']} threads")
+        regressions = compare(results, baseline, args.latency_tolerance, args.query_tolerance, args.latency_slack_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions or failed:
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Bulk seed a realistic dataset: schools and branches, students in groups,
+supervisors, FICs, panels, marks, invites, requests and notifications.
+
+Rows are generated in memory and written with chunked multi-row inserts, so
+a few hundred thousand students take seconds rather than hours. Every user's
+password is PASSWORD.
+
+Usage:
+    python benchmarks/seed_data.py --students 200000
+
+DATABASE_URL selects the database (SQLite by default, or a local Postgres);
+its tables will be dropped and recreated.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'seed_data.db')
+
+from app import (app, db, User, Student, Supervisor, FIC, StudentGroup, GroupNameCounter,  # noqa: E402
+                 GroupInvite, SupervisorRequest, SupervisorChangeRequest, Panel, PanelMember, Marks,
+                 Notification, hash_password, MAX_GROUP_MEMBERS, MAX_SUPERVISED_GROUPS, PANEL_SIZE)
+
+PASSWORD = 'benchmark-password'
+CHUNK = 5000
+
+SCHOOL_BRANCHES = {
+    'School of Computer Science': ['CS', 'ECS'],
+    'School of IT': ['IT'],
+    'School of Electronics': ['ETC'],
+    'School of Electrical': ['EE'],
+    'School of Mechanical': ['Mech', 'Aerospace'],
+    'School of Civil': ['Civil'],
+}
+YEARS = ['Third', 'Fourth']
+DOMAIN_TOPICS = {
+    'ML': ['neural', 'network', 'classification', 'prediction', 'learning', 'vision', 'language', 'recommendation'],
+    'IOT': ['sensor', 'smart', 'monitoring', 'wireless', 'embedded', 'home', 'agriculture', 'tracking'],
+    'ML & IOT': ['edge', 'anomaly', 'sensor', 'learning', 'predictive', 'maintenance', 'smart', 'energy'],
+    'Signals': ['filter', 'audio', 'radar', 'spectrum', 'denoising', 'modulation', 'speech', 'image'],
+    'VLSI': ['chip', 'low', 'power', 'adder', 'fpga', 'verilog', 'cache', 'processor'],
+}
+
+# Shares of the population; tuned to resemble a final-year project cycle
+GROUPED_SHARE = 0.8
+STUDENTS_PER_SUPERVISOR = 20
+FICS_PER_SCHOOL = 2
+SUPERVISED_SHARE = 0.45  # of groups, as far as supervisor places allow
+TITLED_SHARE = 0.7  # of groups
+PANEL_SHARE = 0.3  # of supervised groups
+MARKED_SHARE = 0.7  # of students in supervised groups
+CHANGE_REQUEST_SHARE = 0.05  # of supervised groups
+NOTIFICATIONS_PER_STUDENT = 0.02
+
+
+def insert_chunked(model, rows):
+    """Bulk insert rows in chunks of CHUNK"""
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(model.__table__.insert(), rows[start:start + CHUNK])
+    db.session.commit()
+
+
+def reset_sequences(models):
+    """Move Postgres id sequences past the explicit ids used by the seeder"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__table__.name
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM \"{table}\""
+        ))
+    db.session.commit()
+
+
+def project_title(rng, domain):
+    words = rng.sample(DOMAIN_TOPICS[domain], 3)
+    return ' '.join(words).capitalize() + ' system'
+
+
+def seed(n_students, n_schools=len(SCHOOL_BRANCHES), rng_seed=42, progress=print):
+    """Seed the dataset into the current app's database and return the row counts"""
+    rng = random.Random(rng_seed)
+    now = datetime.utcnow()
+    schools = list(SCHOOL_BRANCHES)[:n_schools]
+    password = hash_password(PASSWORD)
+    started = time.perf_counter()
+
+    users, fics, supervisors, students, groups = [], [], [], [], []
+    supervisors_by_school = {school: [] for school in schools}
+
+    def add_user(email, role):
+        users.append({'id': len(users) + 1, 'email': email, 'password': password, 'role': role, 'created_at': now})
+        return len(users)
+
+    for school in schools:
+        for _ in range(FICS_PER_SCHOOL):
+            fic_id = len(fics) + 1
+            fics.append({'id': fic_id, 'user_id': add_user(f'fic{fic_id}@example.edu', 'fic'),
+                         'name': f'FIC {fic_id}', 'school': school})
+
+    # Every school needs enough supervisors to form a panel
+    n_supervisors = max(n_students // STUDENTS_PER_SUPERVISOR, (PANEL_SIZE + 1) * len(schools))
+    for i in range(n_supervisors):
+        supervisor_id = i + 1
+        school = schools[i % len(schools)]
+        supervisors.append({'id': supervisor_id, 'user_id': add_user(f'supervisor{supervisor_id}@example.edu', 'supervisor'),
+                            'name': f'Supervisor {supervisor_id}', 'domain': rng.choice(list(DOMAIN_TOPICS)),
+                            'school': school, 'supervised_count': 0})
+        supervisors_by_school[school].append(supervisors[-1])
+
+    # Students are dealt out to (school, branch, year) cohorts; groups form inside a cohort
+    cohorts = [(school, branch, year) for school in schools for branch in SCHOOL_BRANCHES[school] for year in YEARS]
+    cohort_members = {cohort: [] for cohort in cohorts}
+    for i in range(n_students):
+        student_id = i + 1
+        school, branch, year = cohorts[rng.randrange(len(cohorts))]
+        students.append({'id': student_id, 'user_id': add_user(f'student{student_id}@example.edu', 'student'),
+                         'name': f'Student {student_id}', 'roll_number': f'R{student_id:07d}', 'year': year,
+                         'school': school, 'branch': branch, 'group_id': None})
+        cohort_members[(school, branch, year)].append(students[-1])
+
+    group_numbers = {}
+    group_schools = []
+    for (school, branch, year), members in cohort_members.items():
+        grouped = members[:int(len(members) * GROUPED_SHARE)]
+        position = 0
+        while len(grouped) - position >= 2:
+            size = min(rng.randint(2, MAX_GROUP_MEMBERS), len(grouped) - position)
+            group_numbers[branch] = group_numbers.get(branch, 0) + 1
+            group_id = len(groups) + 1
+            groups.append({'id': group_id, 'name': f'{branch}{group_numbers[branch]:02d}', 'supervisor_id': None,
+                           'project_title': None, 'project_description': None, 'document_link': None,
+                           'branch': branch, 'year': year, 'created_at': now - timedelta(days=rng.randint(1, 90)),
+                           'member_count': size})
+            group_schools.append(school)
+            for member in grouped[position:position + size]:
+                member['group_id'] = group_id
+            position += size
+
+    for group, school in zip(groups, group_schools):
+        domain = rng.choice(list(DOMAIN_TOPICS))
+        if rng.random() < TITLED_SHARE:
+            group['project_title'] = project_title(rng, domain)
+            group['project_description'] = f"A {domain} project on {' and '.join(rng.sample(DOMAIN_TOPICS[domain], 2))}."
+            group['document_link'] = f"https://docs.example.edu/{group['name']}"
+        if rng.random() < SUPERVISED_SHARE:
+            candidates = rng.sample(supervisors_by_school[school], min(5, len(supervisors_by_school[school])))
+            supervisor = next((s for s in candidates if s['supervised_count'] < MAX_SUPERVISED_GROUPS), None)
+            if supervisor:
+                supervisor['supervised_count'] += 1
+                group['supervisor_id'] = supervisor['id']
+
+    progress(f"Generated {len(students)} students, {len(groups)} groups, {len(supervisors)} supervisors, "
+             f"{len(fics)} FICs in {len(schools)} schools")
+
+    insert_chunked(User, users)
+    insert_chunked(FIC, fics)
+    insert_chunked(Supervisor, supervisors)
+    insert_chunked(StudentGroup, groups)
+    insert_chunked(Student, students)
+    insert_chunked(GroupNameCounter, [{'branch': branch, 'last_number': number} for branch, number in group_numbers.items()])
+
+    fics_by_school = {}
+    for fic in fics:
+        fics_by_school.setdefault(fic['school'], []).append(fic['id'])
+    members_by_group = {}
+    for student in students:
+        if student['group_id']:
+            members_by_group.setdefault(student['group_id'], []).append(student['id'])
+
+    panels, panel_members, marks, supervisor_requests, change_requests = [], [], [], [], []
+    for group, school in zip(groups, group_schools):
+        school_supervisors = supervisors_by_school[school]
+        if group['supervisor_id']:
+            supervisor_requests.append({'group_id': group['id'], 'supervisor_id': group['supervisor_id'],
+                                        'status': 'accepted', 'sent_at': group['created_at']})
+            for student_id in members_by_group[group['id']]:
+                if rng.random() < MARKED_SHARE:
+                    presentation, documents, collaboration = (rng.randint(3, 10) for _ in range(3))
+                    marks.append({'student_id': student_id, 'presentation': presentation, 'documents': documents,
+                                  'collaboration': collaboration, 'total': presentation + documents + collaboration,
+                                  'given_by': group['supervisor_id'], 'given_at': now - timedelta(days=rng.randint(0, 30))})
+            if rng.random() < PANEL_SHARE:
+                panel_id = len(panels) + 1
+                panels.append({'id': panel_id, 'group_id': group['id'], 'created_by': rng.choice(fics_by_school[school]),
+                               'created_at': now})
+                others = [s['id'] for s in rng.sample(school_supervisors, PANEL_SIZE + 1) if s['id'] != group['supervisor_id']]
+                panel_members.extend({'panel_id': panel_id, 'supervisor_id': supervisor_id}
+                                     for supervisor_id in others[:PANEL_SIZE])
+            if rng.random() < CHANGE_REQUEST_SHARE:
+                new_supervisor = rng.choice(school_supervisors)
+                if new_supervisor['id'] != group['supervisor_id']:
+                    change_requests.append({'group_id': group['id'], 'current_supervisor_id': group['supervisor_id'],
+                                            'new_supervisor_id': new_supervisor['id'], 'status': 'pending',
+                                            'reason': 'Closer match to our project domain', 'created_at': now})
+        else:
+            # Unsupervised groups are waiting on up to three requests
+            for supervisor in rng.sample(school_supervisors, min(rng.randint(0, 3), len(school_supervisors))):
+                supervisor_requests.append({'group_id': group['id'], 'supervisor_id': supervisor['id'],
+                                            'status': 'pending', 'sent_at': now - timedelta(hours=rng.randint(1, 200))})
+
+    # Students without a group have pending invites from their cohort
+    invites = []
+    for members in cohort_members.values():
+        for receiver in members:
+            if receiver['group_id'] or len(members) < 2:
+                continue
+            for _ in range(rng.randint(0, 3)):
+                sender = rng.choice(members)
+                if sender['id'] != receiver['id']:
+                    invites.append({'sender_id': sender['id'], 'receiver_id': receiver['id'], 'status': 'pending',
+                                    'sent_at': now - timedelta(hours=rng.randint(1, 200))})
+            if rng.random() < 0.5:
+                sender = rng.choice(members)
+                if sender['id'] != receiver['id']:
+                    invites.append({'sender_id': sender['id'], 'receiver_id': receiver['id'], 'status': 'rejected',
+                                    'sent_at': now - timedelta(days=rng.randint(1, 60))})
+
+    notifications = []
+    for i in range(max(int(n_students * NOTIFICATIONS_PER_STUDENT), len(schools))):
+        school = schools[i % len(schools)]
+        target_type = rng.choice(['all', 'students', 'supervisors', 'specific_branch'])
+        notifications.append({'title': f'Notice {i + 1}', 'message': 'Submission deadlines and review schedule.',
+                              'target_type': target_type,
+                              'target_branch': rng.choice(SCHOOL_BRANCHES[school]) if target_type == 'specific_branch' else None,
+                              'created_by': rng.choice(fics_by_school[school]),
+                              'created_at': now - timedelta(minutes=rng.randint(1, 60 * 24 * 90))})
+
+    insert_chunked(Panel, panels)
+    insert_chunked(PanelMember, panel_members)
+    StudentGroup.query.filter(StudentGroup.id.in_(db.session.query(Panel.group_id))).update(
+        {'has_panel': True}, synchronize_session=False)
+    insert_chunked(Marks, marks)
+    insert_chunked(SupervisorRequest, supervisor_requests)
+    insert_chunked(SupervisorChangeRequest, change_requests)
+    insert_chunked(GroupInvite, invites)
+    insert_chunked(Notification, notifications)
+    reset_sequences([User, FIC, Supervisor, StudentGroup, Student, Panel, PanelMember, Marks, SupervisorRequest,
+                     SupervisorChangeRequest, GroupInvite, Notification])
+    if db.engine.dialect.name in ('sqlite', 'postgresql'):
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+
+    counts = {'users': len(users), 'students': len(students), 'groups': len(groups), 'supervisors': len(supervisors),
+              'fics': len(fics), 'panels': len(panels), 'marks': len(marks), 'invites': len(invites),
+              'supervisor_requests': len(supervisor_requests), 'change_requests': len(change_requests),
+              'notifications': len(notifications)}
+    progress(f"Seeded {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--schools', type=int, default=len(SCHOOL_BRANCHES), choices=range(1, len(SCHOOL_BRANCHES) + 1))
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    parser.add_argument('--method', help='override PASSWORD_HASH_METHOD, e.g. pbkdf2:sha256:1000')
+    args = parser.parse_args()
+
+    if args.method:
+        app.config['PASSWORD_HASH_METHOD'] = args.method
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        counts = seed(args.students, args.schools, args.seed)
+
+    for table, count in counts.items():
+        print(f"{table:<22}{count:>10}")
+    print(f"\nDatabase: {app.config['SQLALCHEMY_DATABASE_URI']}")
+
+
+if __name__ == '__main__':
+    main()
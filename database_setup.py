@@ -58,7 +58,8 @@ class DatabaseSetup:
                     email VARCHAR(120) UNIQUE NOT NULL,
                     password VARCHAR(255) NOT NULL,
                     role ENUM('student', 'supervisor', 'fic') NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    notifications_seen_at TIMESTAMP NULL
                 )
             """)
             print("Table 'user' created successfully")
@@ -77,7 +78,9 @@ class DatabaseSetup:
                         'Civil', 'Mech', 'Aerospace', 'EE'
                     ) NOT NULL,
                     year ENUM('Third', 'Fourth') NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    member_count INT NOT NULL DEFAULT 0,
+                    has_panel BOOLEAN NOT NULL DEFAULT FALSE
                 )
             """)
             print("Table 'student_group' created successfully")
@@ -104,7 +107,10 @@ class DatabaseSetup:
                     ) NOT NULL,
                     group_id INT,
                     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
-                    FOREIGN KEY (group_id) REFERENCES student_group(id) ON DELETE SET NULL
+                    FOREIGN KEY (group_id) REFERENCES student_group(id) ON DELETE SET NULL,
+                    INDEX ix_student_year_branch_group (year, branch, group_id),
+                    INDEX ix_student_user_id (user_id),
+                    INDEX ix_student_group_id (group_id)
                 )
             """)
             print("Table 'student' created successfully")
@@ -124,6 +130,7 @@ class DatabaseSetup:
                         'School of Mechanical',
                         'School of IT'
                     ) NOT NULL,
+                    supervised_count INT NOT NULL DEFAULT 0,
                     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
                 )
             """)
@@ -156,6 +163,15 @@ class DatabaseSetup:
             """)
             print("Foreign key constraint added to student_group")
             
+            # Group name counters (one row per branch)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS group_name_counter (
+                    branch VARCHAR(50) PRIMARY KEY,
+                    last_number INT NOT NULL DEFAULT 0
+                )
+            """)
+            print("Table 'group_name_counter' created successfully")
+            
             # Group invites table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS group_invite (
@@ -165,7 +181,9 @@ class DatabaseSetup:
                     status ENUM('pending', 'accepted', 'rejected') DEFAULT 'pending',
                     sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (sender_id) REFERENCES student(id) ON DELETE CASCADE,
-                    FOREIGN KEY (receiver_id) REFERENCES student(id) ON DELETE CASCADE
+                    FOREIGN KEY (receiver_id) REFERENCES student(id) ON DELETE CASCADE,
+                    INDEX ix_group_invite_receiver_status (receiver_id, status),
+                    INDEX ix_group_invite_sender_receiver_status (sender_id, receiver_id, status)
                 )
             """)
             print("Table 'group_invite' created successfully")
@@ -179,7 +197,9 @@ class DatabaseSetup:
                     status ENUM('pending', 'accepted', 'rejected') DEFAULT 'pending',
                     sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (group_id) REFERENCES student_group(id) ON DELETE CASCADE,
-                    FOREIGN KEY (supervisor_id) REFERENCES supervisor(id) ON DELETE CASCADE
+                    FOREIGN KEY (supervisor_id) REFERENCES supervisor(id) ON DELETE CASCADE,
+                    INDEX ix_supervisor_request_supervisor_status (supervisor_id, status),
+                    INDEX ix_supervisor_request_group_id (group_id)
                 )
             """)
             print("Table 'supervisor_request' created successfully")
@@ -197,7 +217,8 @@ class DatabaseSetup:
                     processed_at TIMESTAMP NULL,
                     FOREIGN KEY (group_id) REFERENCES student_group(id) ON DELETE CASCADE,
                     FOREIGN KEY (current_supervisor_id) REFERENCES supervisor(id) ON DELETE CASCADE,
-                    FOREIGN KEY (new_supervisor_id) REFERENCES supervisor(id) ON DELETE CASCADE
+                    FOREIGN KEY (new_supervisor_id) REFERENCES supervisor(id) ON DELETE CASCADE,
+                    INDEX ix_supervisor_change_request_group_status (group_id, status)
                 )
             """)
             print("Table 'supervisor_change_request' created successfully")
@@ -239,12 +260,13 @@ class DatabaseSetup:
                     given_by INT NOT NULL,
                     given_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (student_id) REFERENCES student(id) ON DELETE CASCADE,
-                    FOREIGN KEY (given_by) REFERENCES supervisor(id) ON DELETE CASCADE
+                    FOREIGN KEY (given_by) REFERENCES supervisor(id) ON DELETE CASCADE,
+                    INDEX ix_marks_student_given_by (student_id, given_by)
                 )
             """)
             print("Table 'marks' created successfully")
             
-            # OTP table (updated with purpose field)
+            # OTP table (one live OTP per email and purpose)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS otp (
                     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -253,7 +275,9 @@ class DatabaseSetup:
                     purpose ENUM('registration', 'password_reset') DEFAULT 'registration',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     expires_at TIMESTAMP NOT NULL,
-                    used BOOLEAN DEFAULT FALSE
+                    used BOOLEAN DEFAULT FALSE,
+                    UNIQUE KEY uq_otp_email_purpose (email, purpose),
+                    INDEX ix_otp_expires_at (expires_at)
                 )
             """)
             print("Table 'otp' created successfully")
@@ -268,11 +292,59 @@ class DatabaseSetup:
                     target_branch VARCHAR(50),
                     created_by INT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES fic(id) ON DELETE CASCADE
+                    email_status ENUM('pending', 'sending', 'sent') NULL,
+                    email_total INT DEFAULT 0,
+                    email_sent_count INT DEFAULT 0,
+                    email_failed_count INT DEFAULT 0,
+                    email_cursor INT DEFAULT 0,
+                    email_claimed_at TIMESTAMP NULL,
+                    email_attempts INT DEFAULT 0,
+                    email_next_attempt_at TIMESTAMP NULL,
+                    FOREIGN KEY (created_by) REFERENCES fic(id) ON DELETE CASCADE,
+                    INDEX ix_notification_target_created (target_type, created_at)
                 )
             """)
             print("Table 'notification' created successfully")
             
+            # Outbound email queue (delivered by mail_worker.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS outbound_email (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    recipient VARCHAR(120) NOT NULL,
+                    subject VARCHAR(255) NOT NULL,
+                    body TEXT NOT NULL,
+                    status ENUM('pending', 'sending', 'sent', 'failed') DEFAULT 'pending',
+                    attempts INT DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    claimed_at TIMESTAMP NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    sent_at TIMESTAMP NULL,
+                    INDEX ix_outbound_email_status_next_attempt (status, next_attempt_at)
+                )
+            """)
+            print("Table 'outbound_email' created successfully")
+            
+            # Cache versions (bumped to invalidate per-worker caches)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cache_version (
+                    `key` VARCHAR(100) PRIMARY KEY,
+                    version INT NOT NULL DEFAULT 0
+                )
+            """)
+            print("Table 'cache_version' created successfully")
+            
+            # Rate limit token buckets (shared by all app workers)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_bucket (
+                    `key` VARCHAR(200) PRIMARY KEY,
+                    tokens DOUBLE NOT NULL,
+                    updated_at DOUBLE NOT NULL,
+                    INDEX ix_rate_limit_bucket_updated_at (updated_at)
+                )
+            """)
+            print("Table 'rate_limit_bucket' created successfully")
+            
             # Remove password_reset_token table since we're using OTP method
             
             connection.commit()
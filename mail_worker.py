@@ -0,0 +1,256 @@
+"""Background delivery worker for the outbound mail queue.
+
+Request handlers only add rows to the outbound_email table (see queue_email in
+app.py). This worker claims due messages in batches, sends each batch over a
+single SMTP connection and retries failures with exponential backoff.
+
+Notifications sent with email delivery are fanned out to their audience in
+chunks over one persistent connection, recording progress after every chunk
+so an interrupted fan-out resumes where it stopped, after the same backoff.
+
+While idle, the worker also purges used and expired OTPs and idle rate
+limit buckets every PURGE_INTERVAL.
+
+Usage:
+    python mail_worker.py            # run forever
+    python mail_worker.py --once     # deliver one batch and one notification, then exit
+    python mail_worker.py --stats    # print queue depth and exit
+"""
+import argparse
+import smtplib
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+
+from app import app, db, mail, OutboundEmail, Notification, User, bump_cache_version, mail_queue_depth, notification_recipients, otp_store, rate_limiter
+
+# Errors the server returns for a single message; anything else is treated as
+# a connection failure and ends the batch
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+PURGE_INTERVAL = timedelta(minutes=10)
+
+
+def is_permanent(error):
+    """True for 5xx rejections of a single message; 4xx replies are retried"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return error.smtp_code >= 500
+
+
+def retry_delay(attempts):
+    """Exponential backoff for the given number of failed attempts"""
+    delay = app.config['MAIL_RETRY_BASE_SECONDS'] * (2 ** (attempts - 1))
+    return timedelta(seconds=min(delay, app.config['MAIL_RETRY_MAX_SECONDS']))
+
+
+def release_stale_claims(lease=timedelta(minutes=10)):
+    """Put messages and fan-outs claimed by a worker that died mid-batch back in the queue"""
+    stale = datetime.utcnow() - lease
+    OutboundEmail.query.filter(
+        OutboundEmail.status == 'sending',
+        OutboundEmail.claimed_at < stale
+    ).update({'status': 'pending', 'claimed_at': None}, synchronize_session=False)
+    Notification.query.filter(
+        Notification.email_status == 'sending',
+        Notification.email_claimed_at < stale
+    ).update({'email_status': 'pending', 'email_claimed_at': None}, synchronize_session=False)
+    db.session.commit()
+
+
+def claim_batch(batch_size):
+    """Claim up to batch_size due messages so that concurrent workers never send the same one"""
+    now = datetime.utcnow()
+    candidate_ids = [row[0] for row in db.session.query(OutboundEmail.id).filter(
+        OutboundEmail.status == 'pending',
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(batch_size).all()]
+
+    claimed_ids = []
+    for email_id in candidate_ids:
+        claimed = OutboundEmail.query.filter_by(id=email_id, status='pending').update(
+            {'status': 'sending', 'claimed_at': now}, synchronize_session=False
+        )
+        if claimed:
+            claimed_ids.append(email_id)
+    db.session.commit()
+
+    if not claimed_ids:
+        return []
+    return OutboundEmail.query.filter(OutboundEmail.id.in_(claimed_ids)).order_by(OutboundEmail.id).all()
+
+
+def record_failure(email, error):
+    """Schedule a retry, or give up once MAIL_MAX_ATTEMPTS is reached"""
+    email.attempts = (email.attempts or 0) + 1
+    email.last_error = str(error)[:1000]
+    email.claimed_at = None
+    if email.attempts >= app.config['MAIL_MAX_ATTEMPTS']:
+        email.status = 'failed'
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = datetime.utcnow() + retry_delay(email.attempts)
+
+
+def deliver_batch(batch_size=None, connection=None):
+    """Send one batch of due messages over a single SMTP connection.
+
+    Opens a connection unless one is given. Returns the number of messages sent.
+    """
+    batch = claim_batch(batch_size or app.config['MAIL_BATCH_SIZE'])
+    if not batch:
+        return 0
+
+    sent = 0
+    pending = list(batch)
+    try:
+        with (nullcontext(connection) if connection else mail.connect()) as connection:
+            while pending:
+                email = pending[0]
+                msg = Message(email.subject, sender=app.config['MAIL_USERNAME'], recipients=[email.recipient])
+                msg.body = email.body
+                try:
+                    connection.send(msg)
+                except MESSAGE_ERRORS as e:
+                    if not is_permanent(e):
+                        raise
+                    print(f"Email error for outbox message {email.id}: {e}")
+                    record_failure(email, e)
+                else:
+                    email.status = 'sent'
+                    email.sent_at = datetime.utcnow()
+                    email.claimed_at = None
+                    sent += 1
+                pending.pop(0)
+    except Exception as e:
+        print(f"SMTP connection error: {e}")
+        for email in pending:
+            record_failure(email, e)
+
+    db.session.commit()
+    return sent
+
+
+def claim_notification():
+    """Claim the oldest notification waiting for email delivery whose retry is due"""
+    candidate = db.session.query(Notification.id).filter(
+        Notification.email_status == 'pending',
+        db.or_(Notification.email_next_attempt_at.is_(None), Notification.email_next_attempt_at <= datetime.utcnow())
+    ).order_by(Notification.id).first()
+    if not candidate:
+        return None
+
+    claimed = Notification.query.filter_by(id=candidate[0], email_status='pending').update(
+        {'email_status': 'sending', 'email_claimed_at': datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+    return Notification.query.get(candidate[0]) if claimed else None
+
+
+def deliver_notification_emails(chunk_size=None):
+    """Email one notification to its whole audience over a single SMTP connection.
+
+    Recipients are read in user id order, one chunk at a time, and the id of
+    the last handled user is committed after every chunk. Queued messages
+    such as OTPs are sent between chunks so a large fan-out does not hold
+    them up. Returns the number of notification emails sent.
+    """
+    notification = claim_notification()
+    if not notification:
+        return 0
+
+    chunk_size = chunk_size or app.config['NOTIFICATION_EMAIL_CHUNK_SIZE']
+    subject = f"{notification.title} - Project Management System"
+    sent = 0
+    try:
+        with mail.connect() as connection:
+            while True:
+                recipients = notification_recipients(notification).filter(
+                    User.id > notification.email_cursor
+                ).limit(chunk_size).all()
+                if not recipients:
+                    notification.email_status = 'sent'
+                    notification.email_claimed_at = None
+                    bump_cache_version(f'sent_notifications:{notification.created_by}')
+                    db.session.commit()
+                    break
+
+                for user_id, email in recipients:
+                    msg = Message(subject, sender=app.config['MAIL_USERNAME'], recipients=[email])
+                    msg.body = notification.message
+                    try:
+                        connection.send(msg)
+                    except MESSAGE_ERRORS as e:
+                        if not is_permanent(e):
+                            raise
+                        print(f"Email error for notification {notification.id} to {email}: {e}")
+                        notification.email_failed_count += 1
+                    else:
+                        notification.email_sent_count += 1
+                        sent += 1
+                    notification.email_cursor = user_id
+
+                # Record progress and renew the claim; the FIC dashboard shows the counts
+                notification.email_claimed_at = datetime.utcnow()
+                notification.email_attempts = 0
+                bump_cache_version(f'sent_notifications:{notification.created_by}')
+                db.session.commit()
+
+                deliver_batch(connection=connection)
+    except Exception as e:
+        # Keep the progress made so far and resume from the cursor after a backoff,
+        # so a server that is down is not retried on every poll
+        print(f"SMTP connection error during notification {notification.id}: {e}")
+        notification.email_attempts = (notification.email_attempts or 0) + 1
+        notification.email_next_attempt_at = datetime.utcnow() + retry_delay(notification.email_attempts)
+        notification.email_status = 'pending'
+        notification.email_claimed_at = None
+        bump_cache_version(f'sent_notifications:{notification.created_by}')
+        db.session.commit()
+
+    return sent
+
+
+def run(poll_interval, batch_size):
+    """Deliver messages until interrupted"""
+    print("Mail worker started")
+    release_stale_claims()
+    next_purge = datetime.utcnow()
+    while True:
+        sent = deliver_batch(batch_size) + deliver_notification_emails()
+        if sent:
+            print(f"Sent {sent} emails, queue depth: {mail_queue_depth()}")
+        else:
+            if datetime.utcnow() >= next_purge:
+                purged_otps = otp_store.purge()
+                purged_buckets = rate_limiter.purge()
+                if purged_otps or purged_buckets:
+                    print(f"Purged {purged_otps} OTPs and {purged_buckets} rate limit buckets")
+                next_purge = datetime.utcnow() + PURGE_INTERVAL
+            # Only sleep when there is nothing left to send
+            db.session.remove()
+            time.sleep(poll_interval)
+            release_stale_claims()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deliver queued outbound emails')
+    parser.add_argument('--once', action='store_true', help='deliver one batch and exit')
+    parser.add_argument('--stats', action='store_true', help='print queue depth and exit')
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.stats:
+            print(mail_queue_depth())
+        elif args.once:
+            print(f"Sent {deliver_batch(args.batch_size) + deliver_notification_emails()} emails")
+        else:
+            run(args.poll_interval, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,517 @@
+// Initialize dashboard functionality
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('FIC dashboard initialized');
+    
+    // Show/hide branch selection based on target type
+    const targetSelect = document.getElementById('notification-target');
+    const branchSelection = document.getElementById('branch-selection');
+    
+    targetSelect.addEventListener('change', function() {
+        if (this.value === 'specific_branch') {
+            branchSelection.style.display = 'block';
+        } else {
+            branchSelection.style.display = 'none';
+        }
+    });
+    
+    // Set up supervisor change request buttons; delegated so re-rendered requests keep working
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('.respond-change-request');
+        if (button) {
+            respondToSupervisorChangeRequest(button.dataset.requestId, button.dataset.action, button);
+        }
+    });
+});
+
+function sendNotification() {
+    const title = document.getElementById('notification-title').value.trim();
+    const message = document.getElementById('notification-message').value.trim();
+    const targetType = document.getElementById('notification-target').value;
+    const targetBranch = document.getElementById('notification-branch').value;
+    const sendEmail = document.getElementById('notification-email').checked;
+    
+    if (!title || !message) {
+        showNotification('Title and message are required', 'error');
+        return;
+    }
+    
+    if (targetType === 'specific_branch' && !targetBranch) {
+        showNotification('Please select a branch for specific branch notification', 'error');
+        return;
+    }
+    
+    const button = document.querySelector('button[onclick="sendNotification()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/send_notification', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            title: title,
+            message: message,
+            target_type: targetType,
+            target_branch: targetBranch,
+            send_email: sendEmail
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Clear form
+            document.getElementById('notification-title').value = '';
+            document.getElementById('notification-message').value = '';
+            document.getElementById('notification-target').value = 'all';
+            document.getElementById('notification-email').checked = false;
+            document.getElementById('branch-selection').style.display = 'none';
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function respondToSupervisorChangeRequest(requestId, action, button) {
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/respond_supervisor_change_request', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            request_id: requestId,
+            action: action
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(data.message, 'success');
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+            btnText.classList.remove('hidden');
+            btnLoading.classList.add('hidden');
+            button.disabled = false;
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function createPanel(groupId) {
+    const checkboxes = document.querySelectorAll(`.panel-checkbox-${groupId}:checked`);
+    const supervisorIds = Array.from(checkboxes).map(checkbox => checkbox.value);
+    
+    if (supervisorIds.length !== 3) {
+        showNotification('Please select exactly 3 panel members', 'error');
+        return;
+    }
+    
+    const button = document.querySelector(`button[onclick="createPanel(${groupId})"]`);
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/create_panel', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            group_id: groupId,
+            supervisor_ids: supervisorIds
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function autoAssignPanels() {
+    const button = document.querySelector('button[onclick="autoAssignPanels()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/auto_assign_panels', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            exclude_own_supervisor: document.getElementById('exclude-own-supervisor').checked
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function downloadGroupDetails() {
+    const branch = document.getElementById('download-branch').value;
+    
+    const button = document.querySelector('button[onclick="downloadGroupDetails()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    // Construct download URL
+    let url = '/download_group_details';
+    if (branch) {
+        url += `?branch=${encodeURIComponent(branch)}`;
+    }
+    
+    // Trigger download
+    window.location.href = url;
+    
+    // Hide loading state after a delay
+    setTimeout(() => {
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+    }, 2000);
+}
+
+function importAccounts() {
+    const fileInput = document.getElementById('import-file');
+    if (!fileInput.files.length) {
+        showNotification('Please choose a CSV file', 'error');
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('role', document.getElementById('import-role').value);
+    formData.append('file', fileInput.files[0]);
+    
+    const button = document.querySelector('button[onclick="importAccounts()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    const errorsContainer = document.getElementById('import-errors');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    errorsContainer.innerHTML = '';
+    
+    fetch('/import_accounts', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // List the rows that were skipped
+            const list = document.createElement('ul');
+            data.errors.forEach(error => {
+                const item = document.createElement('li');
+                item.textContent = `Line ${error.line} (${error.email}): ${error.error}`;
+                list.appendChild(item);
+            });
+            errorsContainer.appendChild(list);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function loadMarksAnalytics() {
+    const button = document.querySelector('button[onclick="loadMarksAnalytics()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/marks_analytics')
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            renderMarksAnalytics(data.analytics);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function renderMarksAnalytics(analytics) {
+    const container = document.getElementById('marks-analytics');
+    if (!analytics.overall.total.count) {
+        container.innerHTML = '<p>No marks have been assigned yet.</p>';
+        return;
+    }
+    
+    // Summary of total marks (out of 30) per branch, year and supervisor
+    const rows = [['All students', analytics.overall]];
+    Object.entries(analytics.by_branch).forEach(([branch, stats]) => rows.push([`Branch: ${branch}`, stats]));
+    Object.entries(analytics.by_year).forEach(([year, stats]) => rows.push([`Year: ${year}`, stats]));
+    analytics.by_supervisor.forEach(entry => rows.push([`Supervisor: ${entry.name}`, entry.stats]));
+    
+    const table = document.createElement('table');
+    table.innerHTML = `
+        <thead>
+            <tr>
+                <th>Group</th>
+                <th>Count</th>
+                <th>Mean</th>
+                <th>Median</th>
+                <th>25th</th>
+                <th>75th</th>
+                <th>90th</th>
+            </tr>
+        </thead>
+        <tbody></tbody>
+    `;
+    const tbody = table.querySelector('tbody');
+    rows.forEach(([label, stats]) => {
+        const total = stats.total;
+        const row = document.createElement('tr');
+        [label, total.count, total.mean, total.median, total.p25, total.p75, total.p90].forEach(value => {
+            const cell = document.createElement('td');
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        tbody.appendChild(row);
+    });
+    
+    container.innerHTML = '';
+    container.appendChild(table);
+}
+
+function showNotification(message, type = 'info') {
+    // Remove existing notifications
+    const existingNotifications = document.querySelectorAll('.notification');
+    existingNotifications.forEach(notification => notification.remove());
+    
+    // Create new notification
+    const notification = document.createElement('div');
+    notification.className = `notification alert alert-${type}`;
+    notification.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        z-index: 10000;
+        min-width: 300px;
+        max-width: 500px;
+        animation: slideIn 0.3s ease;
+    `;
+    
+    notification.innerHTML = `
+        <div style="display: flex; justify-content: space-between; align-items: center;">
+            <span>${message}</span>
+            <button onclick="this.parentElement.parentElement.remove()" 
+                    style="background: none; border: none; font-size: 18px; cursor: pointer; color: inherit;">
+                ×
+            </button>
+        </div>
+    `;
+    
+    document.body.appendChild(notification);
+    
+    // Auto remove after 5 seconds
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.remove();
+        }
+    }, 5000);
+}
+
+// Add CSS for animations
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideIn {
+        from { transform: translateX(100%); opacity: 0; }
+        to { transform: translateX(0); opacity: 1; }
+    }
+    
+    .hidden { display: none; }
+    
+    .notification-card {
+        margin-bottom: 1rem;
+        border-left: 4px solid #3498db;
+    }
+    
+    .notification-header {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        margin-bottom: 0.5rem;
+    }
+    
+    .notification-date {
+        color: #7f8c8d;
+        font-size: 0.9em;
+    }
+    
+    .notification-target {
+        margin-top: 0.5rem;
+        color: #7f8c8d;
+        font-style: italic;
+    }
+    
+    .change-request-details {
+        margin-bottom: 1rem;
+    }
+    
+    .info-row {
+        margin-bottom: 0.5rem;
+        display: flex;
+        align-items: center;
+    }
+    
+    .info-row strong {
+        min-width: 150px;
+    }
+    
+    .badge-supervisor {
+        background: #27ae60;
+        color: white;
+        padding: 2px 6px;
+        border-radius: 8px;
+        font-size: 0.8em;
+        margin-left: 0.5rem;
+    }
+    
+    .panel-members-selection {
+        max-height: 200px;
+        overflow-y: auto;
+        border: 1px solid #ddd;
+        padding: 0.5rem;
+        border-radius: 4px;
+        margin-top: 0.5rem;
+    }
+    
+    .download-section {
+        background: #f8f9fa;
+        padding: 1rem;
+        border-radius: 6px;
+        margin-bottom: 1rem;
+    }
+    
+    @media (max-width: 768px) {
+        .info-row {
+            flex-direction: column;
+            align-items: flex-start;
+        }
+        
+        .info-row strong {
+            min-width: auto;
+            margin-bottom: 0.25rem;
+        }
+        
+        .notification-header {
+            flex-direction: column;
+            align-items: flex-start;
+            gap: 0.5rem;
+        }
+    }
+`;
+document.head.appendChild(style);
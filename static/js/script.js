@@ -128,7 +128,7 @@ function sendInvite(receiverId) {
         hideLoading();
         showNotification(data.message, data.success ? 'success' : 'error');
         if (data.success) {
-            setTimeout(() => location.reload(), 1000);
+            applyFragments(data.fragments);
         }
     })
     .catch(error => {
@@ -157,7 +157,7 @@ function respondToInvite(inviteId, action) {
         hideLoading();
         showNotification(data.message, data.success ? 'success' : 'error');
         if (data.success) {
-            setTimeout(() => location.reload(), 1000);
+            applyFragments(data.fragments);
         }
     })
     .catch(error => {
@@ -191,7 +191,7 @@ function requestSupervisor() {
         hideLoading();
         showNotification(data.message, data.success ? 'success' : 'error');
         if (data.success) {
-            setTimeout(() => location.reload(), 1000);
+            applyFragments(data.fragments);
         }
     })
     .catch(error => {
@@ -220,7 +220,7 @@ function respondToSupervisorRequest(requestId, action) {
         hideLoading();
         showNotification(data.message, data.success ? 'success' : 'error');
         if (data.success) {
-            setTimeout(() => location.reload(), 1000);
+            applyFragments(data.fragments);
         }
     })
     .catch(error => {
@@ -373,7 +373,7 @@ function createPanel(groupId) {
         hideLoading();
         showNotification(data.message, data.success ? 'success' : 'error');
         if (data.success) {
-            setTimeout(() => location.reload(), 1000);
+            applyFragments(data.fragments);
         }
     })
     .catch(error => {
@@ -383,6 +383,33 @@ function createPanel(groupId) {
     });
 }
 
+// Mark notifications as read
+function markNotificationsRead() {
+    fetch('/mark_notifications_read', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            document.querySelectorAll('.notification-unread').forEach(card => {
+                card.classList.remove('notification-unread');
+            });
+            document.querySelectorAll('.unread-count, .mark-notifications-read').forEach(element => {
+                element.remove();
+            });
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Network error occurred', 'error');
+    });
+}
+
 // Search student functionality
 function searchStudent() {
     const searchTerm = document.getElementById('search-student').value.trim();
@@ -467,6 +494,26 @@ function debounce(func, wait) {
     };
 }
 
+// Swap page sections for the fragments a POST handler re-rendered, keyed by
+// their data-fragment attribute, then let page scripts rebind the new content
+function applyFragments(fragments) {
+    if (!fragments) {
+        return;
+    }
+    
+    Object.entries(fragments).forEach(([name, html]) => {
+        const element = document.querySelector(`[data-fragment="${name}"]`);
+        if (!element) {
+            return;
+        }
+        const template = document.createElement('template');
+        template.innerHTML = html.trim();
+        element.replaceWith(template.content.firstElementChild);
+    });
+    
+    document.dispatchEvent(new CustomEvent('fragments:updated', { detail: Object.keys(fragments) }));
+}
+
 function showLoading(message = 'Loading...') {
     // Create or show loading overlay
     let loadingOverlay = document.getElementById('loading-overlay');
@@ -595,6 +642,7 @@ document.addEventListener('keydown', function(event) {
 
 // Export functions for global access
 window.sendOTP = sendOTP;
+window.applyFragments = applyFragments;
 window.sendInvite = sendInvite;
 window.respondToInvite = respondToInvite;
 window.requestSupervisor = requestSupervisor;
@@ -0,0 +1,896 @@
+// Initialize dashboard functionality
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('Student dashboard initialized');
+    initGroupSections();
+    
+    // Set up invite response buttons; delegated so re-rendered invitations keep working
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('.respond-invite');
+        if (button) {
+            respondToInvite(button.dataset.inviteId, button.dataset.action, button);
+        }
+    });
+});
+
+// Sections re-rendered by a POST handler need their listeners and data again
+document.addEventListener('fragments:updated', function(e) {
+    if (e.detail.includes('group_sections')) {
+        initGroupSections();
+    }
+});
+
+function initGroupSections() {
+    // Load supervisor recommendations when the group can send requests
+    if (document.getElementById('recommended-supervisors-list')) {
+        loadRecommendedSupervisors();
+    }
+    
+    // Set up search functionality
+    const searchInput = document.getElementById('search-student');
+    if (searchInput) {
+        searchInput.addEventListener('input', debounce(searchStudent, 300));
+        searchInput.addEventListener('keypress', function(e) {
+            if (e.key === 'Enter') {
+                searchStudent();
+            }
+        });
+        
+        // Load the first page of available students
+        loadAvailableStudents(true);
+    }
+    
+    // Add real-time validation for project title and document link
+    const projectTitleInput = document.getElementById('project-title');
+    if (projectTitleInput) {
+        projectTitleInput.addEventListener('input', function() {
+            validateProjectTitle(this.value);
+        });
+    }
+    
+    const documentLinkInput = document.getElementById('document-link');
+    if (documentLinkInput) {
+        documentLinkInput.addEventListener('input', function() {
+            validateDocumentLink(this.value);
+        });
+    }
+}
+
+function validateProjectTitle(title) {
+    const button = document.querySelector('button[onclick="updateProjectTitle()"]');
+    if (title.trim().length < 5) {
+        button.disabled = true;
+        button.title = 'Project title must be at least 5 characters long';
+    } else {
+        button.disabled = false;
+        button.title = '';
+    }
+}
+
+function validateDocumentLink(link) {
+    const button = document.querySelector('button[onclick="updateDocumentLink()"]');
+    if (link && !isValidUrl(link)) {
+        button.disabled = true;
+        button.title = 'Please enter a valid URL';
+    } else {
+        button.disabled = false;
+        button.title = '';
+    }
+}
+
+function isValidUrl(string) {
+    try {
+        new URL(string);
+        return true;
+    } catch (_) {
+        return false;
+    }
+}
+
+let availableStudentsCursor = null;
+let availableStudentsRequest = 0;
+
+function searchStudent() {
+    loadAvailableStudents(true);
+}
+
+function loadAvailableStudents(reset) {
+    const searchTerm = document.getElementById('search-student').value.trim();
+    const tableBody = document.querySelector('.students-table tbody');
+    const noStudents = document.querySelector('.available-students .no-students');
+    const loadMoreButton = document.querySelector('.load-more-students');
+    
+    const params = new URLSearchParams({ q: searchTerm });
+    if (!reset && availableStudentsCursor) {
+        params.set('after', availableStudentsCursor);
+    }
+    
+    // Ignore responses from searches that have since been replaced
+    const requestNumber = ++availableStudentsRequest;
+    loadMoreButton.disabled = true;
+    
+    fetch(`/available_students?${params.toString()}`)
+    .then(response => response.json())
+    .then(data => {
+        if (requestNumber !== availableStudentsRequest) {
+            return;
+        }
+        loadMoreButton.disabled = false;
+        
+        if (!data.success) {
+            showNotification(data.message, 'error');
+            return;
+        }
+        
+        if (reset) {
+            tableBody.innerHTML = '';
+        }
+        
+        data.students.forEach(student => {
+            tableBody.appendChild(createAvailableStudentRow(student));
+        });
+        
+        availableStudentsCursor = data.next_cursor;
+        loadMoreButton.classList.toggle('hidden', !data.next_cursor);
+        noStudents.classList.toggle('hidden', tableBody.rows.length > 0);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        loadMoreButton.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function createAvailableStudentRow(student) {
+    const row = document.createElement('tr');
+    [student.name, student.roll_number, student.school].forEach(value => {
+        const cell = document.createElement('td');
+        cell.textContent = value;
+        row.appendChild(cell);
+    });
+    
+    const actionCell = document.createElement('td');
+    const button = document.createElement('button');
+    button.className = 'btn btn-primary send-invite';
+    button.dataset.receiverId = student.id;
+    button.dataset.receiverName = student.name;
+    button.innerHTML = '<span class="btn-text">Send Invite</span><span class="btn-loading hidden">Sending...</span>';
+    button.addEventListener('click', function() {
+        sendInvite(this.dataset.receiverId, this.dataset.receiverName);
+    });
+    actionCell.appendChild(button);
+    row.appendChild(actionCell);
+    
+    return row;
+}
+
+function sendInvite(receiverId, receiverName) {
+    const button = document.querySelector(`.send-invite[data-receiver-id="${receiverId}"]`);
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/send_invite', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ receiver_id: receiverId })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(`Invite sent to ${receiverName} successfully!`, 'success');
+            // Remove the row or disable the button
+            button.textContent = 'Invite Sent';
+            button.disabled = true;
+            button.classList.remove('btn-primary');
+            button.classList.add('btn-secondary');
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function respondToInvite(inviteId, action, button) {
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/respond_invite', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            invite_id: inviteId,
+            action: action
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(data.message, 'success');
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+            btnText.classList.remove('hidden');
+            btnLoading.classList.add('hidden');
+            button.disabled = false;
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function leaveGroup() {
+    if (!confirm('Are you sure you want to leave the group? This action cannot be undone.')) {
+        return;
+    }
+    
+    const button = document.querySelector('button[onclick="leaveGroup()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/leave_group', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(data.message, 'success');
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+            btnText.classList.remove('hidden');
+            btnLoading.classList.add('hidden');
+            button.disabled = false;
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function requestSupervisorChange() {
+    const newSupervisorId = document.getElementById('new-supervisor-select').value;
+    const reason = document.getElementById('change-reason').value.trim();
+    
+    if (!newSupervisorId) {
+        showNotification('Please select a new supervisor', 'error');
+        return;
+    }
+    
+    if (!reason) {
+        showNotification('Please provide a reason for changing supervisor', 'error');
+        return;
+    }
+    
+    const button = document.querySelector('button[onclick="requestSupervisorChange()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/request_supervisor_change', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            new_supervisor_id: newSupervisorId,
+            reason: reason
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Reset form
+            document.getElementById('new-supervisor-select').value = '';
+            document.getElementById('change-reason').value = '';
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function updateProjectTitle() {
+    const titleInput = document.getElementById('project-title');
+    const title = titleInput.value.trim();
+    const button = document.querySelector('button[onclick="updateProjectTitle()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    if (!title) {
+        showNotification('Please enter a project title', 'error');
+        return;
+    }
+    
+    if (title.length < 5) {
+        showNotification('Project title must be at least 5 characters long', 'error');
+        return;
+    }
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/update_project_title', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            },
+        body: JSON.stringify({ title: title })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Update the display
+            document.getElementById('project-title-display').textContent = title;
+            document.getElementById('project-title-display').classList.remove('not-set');
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function updateDocumentLink() {
+    const linkInput = document.getElementById('document-link');
+    const link = linkInput.value.trim();
+    const button = document.querySelector('button[onclick="updateDocumentLink()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    if (!link) {
+        showNotification('Please enter a document link', 'error');
+        return;
+    }
+    
+    if (!isValidUrl(link)) {
+        showNotification('Please enter a valid URL', 'error');
+        return;
+    }
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/update_document_link', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ link: link })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Update the display
+            const displayElement = document.querySelector('.document-link');
+            if (displayElement) {
+                displayElement.textContent = link;
+                displayElement.href = link;
+            }
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function loadRecommendedSupervisors() {
+    const container = document.getElementById('recommended-supervisors-list');
+    
+    fetch('/recommended_supervisors')
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            container.innerHTML = '';
+            return;
+        }
+        if (!data.supervisors.length) {
+            container.innerHTML = '<p>No supervisors with free slots right now.</p>';
+            return;
+        }
+        
+        container.innerHTML = '';
+        data.supervisors.forEach(supervisor => {
+            const item = document.createElement('div');
+            item.className = 'request-item';
+            
+            const info = document.createElement('div');
+            info.className = 'request-info';
+            const name = document.createElement('strong');
+            name.textContent = supervisor.name;
+            const domain = document.createElement('span');
+            domain.className = 'request-domain';
+            domain.textContent = `(${supervisor.domain})`;
+            const slots = document.createElement('span');
+            slots.className = 'request-date';
+            slots.textContent = `${supervisor.remaining_slots} slot${supervisor.remaining_slots === 1 ? '' : 's'} free`;
+            info.append(name, ' ', domain, ' ', slots);
+            
+            // Pick the supervisor in the select above
+            const selectButton = document.createElement('button');
+            selectButton.type = 'button';
+            selectButton.className = 'btn btn-secondary';
+            selectButton.textContent = 'Select';
+            selectButton.addEventListener('click', () => {
+                document.getElementById('supervisor-select').value = supervisor.id;
+            });
+            
+            item.append(info, selectButton);
+            container.appendChild(item);
+        });
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        container.innerHTML = '';
+    });
+}
+
+function requestSupervisor() {
+    const supervisorSelect = document.getElementById('supervisor-select');
+    const supervisorId = supervisorSelect.value;
+    const button = document.querySelector('button[onclick="requestSupervisor()"]');
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    if (!supervisorId) {
+        showNotification('Please select a supervisor', 'error');
+        return;
+    }
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/request_supervisor', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ supervisor_id: supervisorId })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Reset select
+            supervisorSelect.value = '';
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function debounce(func, wait) {
+    let timeout;
+    return function executedFunction(...args) {
+        const later = () => {
+            clearTimeout(timeout);
+            func(...args);
+        };
+        clearTimeout(timeout);
+        timeout = setTimeout(later, wait);
+    };
+}
+
+function showNotification(message, type = 'info') {
+    // Remove existing notifications
+    const existingNotifications = document.querySelectorAll('.notification');
+    existingNotifications.forEach(notification => notification.remove());
+    
+    // Create new notification
+    const notification = document.createElement('div');
+    notification.className = `notification alert alert-${type}`;
+    notification.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        z-index: 10000;
+        min-width: 300px;
+        max-width: 500px;
+        animation: slideIn 0.3s ease;
+    `;
+    
+    notification.innerHTML = `
+        <div style="display: flex; justify-content: space-between; align-items: center;">
+            <span>${message}</span>
+            <button onclick="this.parentElement.parentElement.remove()" 
+                    style="background: none; border: none; font-size: 18px; cursor: pointer; color: inherit;">
+                ×
+            </button>
+        </div>
+    `;
+    
+    document.body.appendChild(notification);
+    
+    // Auto remove after 5 seconds
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.remove();
+        }
+    }, 5000);
+}
+
+// Add CSS for animations
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideIn {
+        from { transform: translateX(100%); opacity: 0; }
+        to { transform: translateX(0); opacity: 1; }
+    }
+    
+    .hidden { display: none; }
+    
+    .notification-card {
+        margin-bottom: 1rem;
+        border-left: 4px solid #3498db;
+    }
+    
+    .notification-unread {
+        border-left-color: #e67e22;
+    }
+    
+    .notification-header {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        margin-bottom: 0.5rem;
+    }
+    
+    .notification-date {
+        color: #7f8c8d;
+        font-size: 0.9em;
+    }
+    
+    .group-name { 
+        font-weight: bold; 
+        color: #2c3e50;
+        font-size: 1.1em;
+    }
+    
+    .not-set { 
+        color: #7f8c8d; 
+        font-style: italic;
+    }
+    
+    .info-row { 
+        margin-bottom: 0.5rem; 
+        display: flex;
+        align-items: center;
+    }
+    
+    .info-row strong { 
+        min-width: 120px; 
+    }
+    
+    .members-list {
+        display: flex;
+        flex-direction: column;
+        gap: 0.5rem;
+    }
+    
+    .member-item {
+        padding: 0.75rem;
+        border: 1px solid #ecf0f1;
+        border-radius: 6px;
+        background: #f8f9fa;
+    }
+    
+    .member-item.current-user {
+        background: #e3f2fd;
+        border-color: #2196f3;
+    }
+    
+    .member-info {
+        display: flex;
+        align-items: center;
+        gap: 0.5rem;
+    }
+    
+    .roll-number {
+        color: #7f8c8d;
+        font-size: 0.9em;
+    }
+    
+    .badge-you {
+        background: #2196f3;
+        color: white;
+        padding: 2px 8px;
+        border-radius: 12px;
+        font-size: 0.8em;
+        font-weight: bold;
+    }
+    
+    .search-container {
+        display: flex;
+        gap: 0.5rem;
+    }
+    
+    .search-container input {
+        flex: 1;
+    }
+    
+    .students-table-container {
+        overflow-x: auto;
+    }
+    
+    .students-table {
+        width: 100%;
+        margin-top: 1rem;
+    }
+    
+    .invitation-card {
+        margin-bottom: 1rem;
+    }
+    
+    .invitation-header {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        margin-bottom: 0.5rem;
+    }
+    
+    .invitation-date {
+        color: #7f8c8d;
+        font-size: 0.9em;
+    }
+    
+    .invitation-details {
+        margin-bottom: 1rem;
+    }
+    
+    .invite-actions {
+        display: flex;
+        gap: 0.5rem;
+    }
+    
+    .request-item {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        padding: 0.75rem;
+        border: 1px solid #ecf0f1;
+        border-radius: 6px;
+        margin-bottom: 0.5rem;
+    }
+    
+    .request-info {
+        display: flex;
+        flex-direction: column;
+        gap: 0.25rem;
+    }
+    
+    .request-domain {
+        color: #7f8c8d;
+        font-size: 0.9em;
+    }
+    
+    .request-date {
+        color: #95a5a6;
+        font-size: 0.8em;
+    }
+    
+    .marks-grid {
+        display: grid;
+        grid-template-columns: repeat(2, 1fr);
+        gap: 1rem;
+        margin-bottom: 1rem;
+    }
+    
+    .marks-item {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        padding: 0.5rem;
+        background: #f8f9fa;
+        border-radius: 4px;
+    }
+    
+    .total-marks {
+        grid-column: span 2;
+        background: #e3f2fd;
+        font-weight: bold;
+    }
+    
+    .marks-label {
+        font-weight: 500;
+    }
+    
+    .marks-value {
+        font-weight: bold;
+        color: #2c3e50;
+    }
+    
+    .marks-giver {
+        text-align: center;
+        color: #7f8c8d;
+        font-style: italic;
+    }
+    
+    .no-group-message, .no-invitations, .no-students, .no-marks {
+        text-align: center;
+        color: #7f8c8d;
+        padding: 2rem;
+    }
+    
+    .group-rules {
+        margin-top: 1rem;
+        text-align: left;
+    }
+    
+    .group-rules ul {
+        margin-left: 1.5rem;
+        margin-top: 0.5rem;
+    }
+    
+    .group-rules li {
+        margin-bottom: 0.25rem;
+    }
+    
+    .info-text {
+        color: #5a6c7d;
+        margin-bottom: 1rem;
+        font-style: italic;
+    }
+    
+    .pending-requests, .request-history {
+        margin-top: 1.5rem;
+    }
+    
+    .pending-requests h4, .request-history h4 {
+        color: #2c3e50;
+        margin-bottom: 1rem;
+        border-bottom: 1px solid #ecf0f1;
+        padding-bottom: 0.5rem;
+    }
+    
+    .warning-text {
+        color: #e74c3c;
+        font-size: 0.9em;
+        margin-top: 0.5rem;
+    }
+    
+    @media (max-width: 768px) {
+        .info-row {
+            flex-direction: column;
+            align-items: flex-start;
+        }
+        
+        .info-row strong {
+            min-width: auto;
+            margin-bottom: 0.25rem;
+        }
+        
+        .invitation-header {
+            flex-direction: column;
+            align-items: flex-start;
+            gap: 0.5rem;
+        }
+        
+        .invite-actions {
+            flex-direction: column;
+        }
+        
+        .request-item {
+            flex-direction: column;
+            align-items: flex-start;
+            gap: 0.5rem;
+        }
+        
+        .marks-grid {
+            grid-template-columns: 1fr;
+        }
+        
+        .total-marks {
+            grid-column: span 1;
+        }
+        
+        .search-container {
+            flex-direction: column;
+        }
+        
+        .notification-header {
+            flex-direction: column;
+            align-items: flex-start;
+            gap: 0.5rem;
+        }
+    }
+`;
+document.head.appendChild(style);
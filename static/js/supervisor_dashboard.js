@@ -0,0 +1,259 @@
+// Initialize dashboard functionality
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('Supervisor dashboard initialized');
+    
+    // Set up supervisor request response buttons; delegated so re-rendered requests keep working
+    document.addEventListener('click', function(e) {
+        const button = e.target.closest('.respond-supervisor-request');
+        if (button) {
+            respondToSupervisorRequest(button.dataset.requestId, button.dataset.action, button);
+        }
+    });
+});
+
+function respondToSupervisorRequest(requestId, action, button) {
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/respond_supervisor_request', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            request_id: requestId,
+            action: action
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(data.message, 'success');
+            applyFragments(data.fragments);
+        } else {
+            showNotification(data.message, 'error');
+            btnText.classList.remove('hidden');
+            btnLoading.classList.add('hidden');
+            button.disabled = false;
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function saveAllMarks(studentIds, button) {
+    const marks = studentIds.map(studentId => ({
+        student_id: studentId,
+        presentation: parseFloat(document.getElementById(`presentation-${studentId}`).value) || 0,
+        documents: parseFloat(document.getElementById(`documents-${studentId}`).value) || 0,
+        collaboration: parseFloat(document.getElementById(`collaboration-${studentId}`).value) || 0
+    }));
+    
+    // Validate marks
+    const invalid = marks.some(entry =>
+        [entry.presentation, entry.documents, entry.collaboration].some(value => value < 0 || value > 10));
+    if (invalid) {
+        showNotification('Marks must be between 0 and 10', 'error');
+        return;
+    }
+    
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/assign_marks_bulk', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ marks: marks })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Update total displays
+            Object.entries(data.totals).forEach(([studentId, total]) => {
+                const totalElement = document.querySelector(`[data-student-total="${studentId}"]`);
+                if (totalElement) {
+                    totalElement.textContent = `${total}/30`;
+                }
+            });
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function assignMarks(studentId) {
+    const presentation = parseFloat(document.getElementById(`presentation-${studentId}`).value) || 0;
+    const documents = parseFloat(document.getElementById(`documents-${studentId}`).value) || 0;
+    const collaboration = parseFloat(document.getElementById(`collaboration-${studentId}`).value) || 0;
+    
+    // Validate marks
+    if (presentation < 0 || presentation > 10 || 
+        documents < 0 || documents > 10 || 
+        collaboration < 0 || collaboration > 10) {
+        showNotification('Marks must be between 0 and 10', 'error');
+        return;
+    }
+    
+    const button = document.querySelector(`button[onclick="assignMarks(${studentId})"]`);
+    const btnText = button.querySelector('.btn-text');
+    const btnLoading = button.querySelector('.btn-loading');
+    
+    // Show loading state
+    btnText.classList.add('hidden');
+    btnLoading.classList.remove('hidden');
+    button.disabled = true;
+    
+    fetch('/assign_marks', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            student_id: studentId,
+            presentation: presentation,
+            documents: documents,
+            collaboration: collaboration
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Hide loading state
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            // Update total display
+            const total = presentation + documents + collaboration;
+            const totalElement = document.querySelector(`[data-student-total="${studentId}"]`);
+            if (totalElement) {
+                totalElement.textContent = `${total}/30`;
+            }
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        btnText.classList.remove('hidden');
+        btnLoading.classList.add('hidden');
+        button.disabled = false;
+        showNotification('Network error occurred', 'error');
+    });
+}
+
+function showNotification(message, type = 'info') {
+    // Remove existing notifications
+    const existingNotifications = document.querySelectorAll('.notification');
+    existingNotifications.forEach(notification => notification.remove());
+    
+    // Create new notification
+    const notification = document.createElement('div');
+    notification.className = `notification alert alert-${type}`;
+    notification.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        z-index: 10000;
+        min-width: 300px;
+        max-width: 500px;
+        animation: slideIn 0.3s ease;
+    `;
+    
+    notification.innerHTML = `
+        <div style="display: flex; justify-content: space-between; align-items: center;">
+            <span>${message}</span>
+            <button onclick="this.parentElement.parentElement.remove()" 
+                    style="background: none; border: none; font-size: 18px; cursor: pointer; color: inherit;">
+                ×
+            </button>
+        </div>
+    `;
+    
+    document.body.appendChild(notification);
+    
+    // Auto remove after 5 seconds
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.remove();
+        }
+    }, 5000);
+}
+
+// Add CSS for animations
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideIn {
+        from { transform: translateX(100%); opacity: 0; }
+        to { transform: translateX(0); opacity: 1; }
+    }
+    
+    .hidden { display: none; }
+    
+    .notification-card {
+        margin-bottom: 1rem;
+        border-left: 4px solid #3498db;
+    }
+    
+    .notification-unread {
+        border-left-color: #e67e22;
+    }
+    
+    .notification-header {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        margin-bottom: 0.5rem;
+    }
+    
+    .notification-date {
+        color: #7f8c8d;
+        font-size: 0.9em;
+    }
+    
+    .info-text {
+        color: #5a6c7d;
+        margin-bottom: 1rem;
+        font-style: italic;
+    }
+    
+    @media (max-width: 768px) {
+        .notification-header {
+            flex-direction: column;
+            align-items: flex-start;
+            gap: 0.5rem;
+        }
+    }
+`;
+document.head.appendChild(style);
@@ -0,0 +1,118 @@
+"""Shared fixtures. Every test gets freshly created tables in a throwaway
+SQLite database, or in TEST_DATABASE_URL when set (its tables are dropped)."""
+import os
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import app as app_module  # noqa: E402
+from app import app, db, User, PROFILE_MODELS, hash_password  # noqa: E402
+from seed_data import PASSWORD  # noqa: E402
+
+
+def _wait_for_sqlite_locks(dbapi_connection, connection_record):
+    # Concurrency tests queue up many writers on SQLite's single write lock
+    dbapi_connection.execute('PRAGMA busy_timeout = 60000')
+
+
+with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', _wait_for_sqlite_locks)
+        db.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """Empty tables and in-process caches for every test"""
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    app_module.user_cache.clear()
+    app_module._notification_feeds.clear()
+    app_module._supervisor_indexes.clear()
+    app_module._marks_analytics.clear()
+    with app.app_context():
+        yield db
+        db.session.remove()
+
+
+SCHOOL = 'School of Computer Science'
+PROFILE_DEFAULTS = {
+    'student': {'year': 'Third', 'school': SCHOOL, 'branch': 'CS'},
+    'supervisor': {'domain': 'ML', 'school': SCHOOL},
+    'fic': {'school': SCHOOL},
+}
+
+
+def create_account(role, email, **profile):
+    """Add a user with PASSWORD and their role profile; returns the profile"""
+    user = User(email=email, password=hash_password(PASSWORD), role=role)
+    values = dict(PROFILE_DEFAULTS[role], name=email.split('@')[0], **profile)
+    if role == 'student':
+        values.setdefault('roll_number', email.split('@')[0])
+    profile = PROFILE_MODELS[role](user=user, **values)
+    db.session.add(profile)
+    db.session.commit()
+    return profile
+
+
+def login(email, password=PASSWORD):
+    """A test client logged in as email"""
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': password})
+    assert response.status_code == 302, f'login as {email} failed with {response.status_code}'
+    return client
+
+
+class QueryCounter:
+    """Counts SQL statements sent to the database while active"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def run_concurrently(fn, args_list):
+    """Call fn(*args) for every args in args_list from its own thread, released together; returns the results"""
+    barrier = threading.Barrier(len(args_list))
+    results = [None] * len(args_list)
+    errors = []
+
+    def worker(index, args):
+        try:
+            barrier.wait()
+            with app.app_context():
+                results[index] = fn(*args)
+                db.session.remove()
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(index, args)) for index, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
@@ -0,0 +1,99 @@
+"""Stress tests for the group size and supervision limits: many requests
+that each take a place are released at once, and exactly as many as there
+are places may succeed."""
+from app import (db, GroupInvite, Student, StudentGroup, Supervisor, SupervisorRequest, SupervisorChangeRequest,
+                 MAX_GROUP_MEMBERS, MAX_SUPERVISED_GROUPS, sync_counters)
+from conftest import create_account, login, run_concurrently
+
+CONTENDERS = 24
+
+
+def make_group(name, *members, supervisor=None):
+    group = StudentGroup(name=name, branch='CS', year='Third', supervisor_id=supervisor and supervisor.id)
+    db.session.add(group)
+    db.session.flush()
+    for member in members:
+        member.group_id = group.id
+    db.session.commit()
+    return group
+
+
+def post_json(client, path, payload):
+    return client.post(path, json=payload).get_json()
+
+
+def test_concurrent_accepts_never_overfill_a_group():
+    sender = create_account('student', 'sender@example.edu')
+    group = make_group('CS01', sender)
+    calls = []
+    for i in range(CONTENDERS):
+        receiver = create_account('student', f'receiver{i}@example.edu')
+        invite = GroupInvite(sender_id=sender.id, receiver_id=receiver.id)
+        db.session.add(invite)
+        db.session.commit()
+        calls.append((login(f'receiver{i}@example.edu'), '/respond_invite', {'invite_id': invite.id, 'action': 'accept'}))
+    sync_counters()
+
+    results = run_concurrently(post_json, calls)
+
+    assert sum(result['success'] for result in results) == MAX_GROUP_MEMBERS - 1
+    assert Student.query.filter_by(group_id=group.id).count() == MAX_GROUP_MEMBERS
+    assert db.session.get(StudentGroup, group.id).member_count == MAX_GROUP_MEMBERS
+
+
+def test_concurrent_accepts_never_exceed_a_supervisors_limit():
+    supervisor = create_account('supervisor', 'supervisor@example.edu')
+    calls = []
+    for i in range(CONTENDERS):
+        group = make_group(f'CS{i + 1:02d}', create_account('student', f'student{i}@example.edu'))
+        supervisor_request = SupervisorRequest(group_id=group.id, supervisor_id=supervisor.id)
+        db.session.add(supervisor_request)
+        db.session.commit()
+        calls.append((login('supervisor@example.edu'), '/respond_supervisor_request',
+                      {'request_id': supervisor_request.id, 'action': 'accept'}))
+    sync_counters()
+
+    results = run_concurrently(post_json, calls)
+
+    assert sum(result['success'] for result in results) == MAX_SUPERVISED_GROUPS
+    assert StudentGroup.query.filter_by(supervisor_id=supervisor.id).count() == MAX_SUPERVISED_GROUPS
+    assert db.session.get(Supervisor, supervisor.id).supervised_count == MAX_SUPERVISED_GROUPS
+
+
+def test_concurrent_change_approvals_keep_counts_exact():
+    create_account('fic', 'fic@example.edu')
+    current = create_account('supervisor', 'current@example.edu')
+    new = create_account('supervisor', 'new@example.edu')
+    change_requests = []
+    for i in range(MAX_SUPERVISED_GROUPS):
+        group = make_group(f'CS{i + 1:02d}', create_account('student', f'student{i}@example.edu'), supervisor=current)
+        # Two FICs may approve the same request, and a group may have asked for two changes
+        for _ in range(2):
+            change_request = SupervisorChangeRequest(group_id=group.id, current_supervisor_id=current.id,
+                                                     new_supervisor_id=new.id)
+            db.session.add(change_request)
+            db.session.commit()
+            change_requests.append(change_request.id)
+    sync_counters()
+    calls = [(login('fic@example.edu'), '/respond_supervisor_change_request', {'request_id': request_id, 'action': 'approve'})
+             for request_id in change_requests for _ in range(CONTENDERS // len(change_requests))]
+
+    results = run_concurrently(post_json, calls)
+
+    assert sum(result['success'] for result in results) == MAX_SUPERVISED_GROUPS
+    assert StudentGroup.query.filter_by(supervisor_id=new.id).count() == MAX_SUPERVISED_GROUPS
+    assert db.session.get(Supervisor, new.id).supervised_count == MAX_SUPERVISED_GROUPS
+    assert db.session.get(Supervisor, current.id).supervised_count == 0
+
+
+def test_leaving_never_deletes_a_group_whose_counter_is_behind():
+    members = [create_account('student', f'student{i}@example.edu') for i in range(3)]
+    group = make_group('CS01', *members)
+    # As on a database upgraded without sync-counters, the counter says the group is empty
+    StudentGroup.query.filter_by(id=group.id).update({'member_count': 0})
+    db.session.commit()
+
+    assert login('student0@example.edu').post('/leave_group').get_json()['success']
+
+    assert db.session.get(StudentGroup, group.id) is not None
+    assert Student.query.filter_by(group_id=group.id).count() == 2
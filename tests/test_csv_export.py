@@ -0,0 +1,79 @@
+import csv
+import gzip
+from io import StringIO
+
+import app as app_module
+from app import db, StudentGroup, school_group_ids
+from conftest import SCHOOL, create_account, login
+
+GROUPS = 23
+
+
+def seed_groups():
+    """GROUPS groups in SCHOOL, some supervised and titled, and one group in another school"""
+    supervisor = create_account('supervisor', 'supervisor@example.edu')
+    supervisor.name = 'Dr. Rao, PhD'  # quoted by the csv writer
+    for i in range(GROUPS):
+        branch = 'CS' if i % 2 else 'IT'
+        group = StudentGroup(name=f'{branch}{i + 1:02d}', branch=branch, year='Third',
+                             supervisor_id=supervisor.id if i % 3 == 0 else None,
+                             project_title=f'Project "{i}"' if i % 4 == 0 else None)
+        db.session.add(group)
+        db.session.flush()
+        for j in range(1 + i % 3):
+            create_account('student', f'student{i}-{j}@example.edu', group_id=group.id, branch=branch)
+    other = StudentGroup(name='CS99', branch='CS', year='Third')
+    db.session.add(other)
+    db.session.flush()
+    create_account('student', 'elsewhere@example.edu', group_id=other.id, school='School of IT')
+    create_account('fic', 'fic@example.edu')
+
+
+def buffered_export(branch=''):
+    """The CSV as the export built it before streaming, all groups loaded at once"""
+    query = StudentGroup.query.filter(StudentGroup.id.in_(school_group_ids(SCHOOL)))
+    if branch:
+        query = query.filter(StudentGroup.branch == branch)
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Group Name', 'Branch', 'Year', 'Project Title', 'Supervisor', 'Member Names', 'Roll Numbers'])
+    for group in query.order_by(StudentGroup.name).all():
+        writer.writerow([
+            group.name,
+            group.branch,
+            group.year,
+            group.project_title or 'Not set',
+            group.supervisor.name if group.supervisor else 'Not assigned',
+            ', '.join([student.name for student in group.students]),
+            ', '.join([student.roll_number for student in group.students])
+        ])
+    return output.getvalue()
+
+
+def test_streamed_export_matches_buffered_output(monkeypatch):
+    # Several yield_per chunks, with the last one partly filled
+    monkeypatch.setattr(app_module, 'CSV_EXPORT_CHUNK_SIZE', 5)
+    seed_groups()
+    client = login('fic@example.edu')
+
+    response = client.get('/download_group_details')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Content-Disposition'] == 'attachment; filename="group_details_School_of_Computer_Science.csv"'
+    body = response.get_data(as_text=True)
+    assert body == buffered_export()
+    assert len(body.splitlines()) == GROUPS + 1
+
+
+def test_gzip_export_decompresses_to_the_same_csv(monkeypatch):
+    monkeypatch.setattr(app_module, 'CSV_EXPORT_CHUNK_SIZE', 5)
+    seed_groups()
+    client = login('fic@example.edu')
+
+    response = client.get('/download_group_details?branch=CS', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(response.get_data()).decode('utf-8') == buffered_export('CS')
@@ -0,0 +1,24 @@
+from app import db
+from conftest import QueryCounter, login
+from seed_data import seed
+
+
+def dashboard_queries(n_students):
+    db.drop_all()
+    db.create_all()
+    counts = seed(n_students, n_schools=1, progress=lambda message: None)
+    # Pending change requests add one query of their own, so both sizes need some
+    assert counts['change_requests'] and counts['panels']
+    client = login('fic1@example.edu')
+    with QueryCounter() as queries:
+        response = client.get('/fic/dashboard')
+    assert response.status_code == 200
+    return counts['groups'], queries.count
+
+
+def test_fic_dashboard_query_count_does_not_grow_with_groups():
+    small_groups, small_queries = dashboard_queries(300)
+    large_groups, large_queries = dashboard_queries(1600)
+
+    assert large_groups >= 4 * small_groups
+    assert large_queries == small_queries
@@ -0,0 +1,29 @@
+from app import db, GroupInvite, StudentGroup, Student
+from conftest import create_account, login, run_concurrently
+
+GROUPS_PER_BRANCH = 100
+
+
+def test_concurrent_accepts_get_unique_group_names():
+    accepts = []
+    for branch in ('CS', 'IT'):
+        for i in range(GROUPS_PER_BRANCH):
+            sender = create_account('student', f'{branch}-sender{i}@example.edu', branch=branch)
+            receiver = create_account('student', f'{branch}-receiver{i}@example.edu', branch=branch)
+            invite = GroupInvite(sender_id=sender.id, receiver_id=receiver.id)
+            db.session.add(invite)
+            db.session.commit()
+            accepts.append((login(f'{branch}-receiver{i}@example.edu'), invite.id))
+
+    def accept(client, invite_id):
+        return client.post('/respond_invite', json={'invite_id': invite_id, 'action': 'accept'}).get_json()
+
+    results = run_concurrently(accept, accepts)
+
+    assert all(result['success'] for result in results), [r for r in results if not r['success']][:3]
+    names = [name for (name,) in db.session.query(StudentGroup.name)]
+    assert len(names) == len(set(names)) == 2 * GROUPS_PER_BRANCH
+    for branch in ('CS', 'IT'):
+        assert {name for name in names if name.startswith(branch)} == \
+            {f'{branch}{number:02d}' for number in range(1, GROUPS_PER_BRANCH + 1)}
+    assert Student.query.filter(Student.group_id.is_(None)).count() == 0
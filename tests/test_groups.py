@@ -0,0 +1,128 @@
+import app as app_module
+from app import (db, GroupInvite, Panel, PanelMember, Student, StudentGroup, Supervisor, SupervisorRequest,
+                 SupervisorChangeRequest)
+from conftest import create_account, login
+
+
+def make_group(name, *members, supervisor=None):
+    group = StudentGroup(name=name, branch='CS', year='Third', member_count=len(members),
+                         supervisor_id=supervisor and supervisor.id)
+    db.session.add(group)
+    db.session.flush()
+    for member in members:
+        member.group_id = group.id
+    if supervisor:
+        supervisor.supervised_count += 1
+    db.session.commit()
+    return group
+
+
+def accept_invite(sender, receiver_email):
+    receiver = Student.query.join(Student.user).filter_by(email=receiver_email).one()
+    invite = GroupInvite(sender_id=sender.id, receiver_id=receiver.id)
+    db.session.add(invite)
+    db.session.commit()
+    response = login(receiver_email).post('/respond_invite', json={'invite_id': invite.id, 'action': 'accept'})
+    return response.get_json()
+
+
+def test_switching_groups_keeps_counts_and_removes_the_emptied_group():
+    fic = create_account('fic', 'fic@example.edu')
+    supervisor = create_account('supervisor', 'supervisor@example.edu')
+    other_supervisor = create_account('supervisor', 'other@example.edu')
+    first = create_account('student', 'first@example.edu')
+    second = create_account('student', 'second@example.edu')
+    group = make_group('CS01', first, second, supervisor=supervisor)
+    db.session.add(SupervisorRequest(group_id=group.id, supervisor_id=supervisor.id, status='accepted'))
+    db.session.add(SupervisorChangeRequest(group_id=group.id, current_supervisor_id=supervisor.id,
+                                           new_supervisor_id=other_supervisor.id))
+    panel = Panel(group_id=group.id, created_by=fic.id)
+    db.session.add(panel)
+    db.session.flush()
+    db.session.add(PanelMember(panel_id=panel.id, supervisor_id=other_supervisor.id))
+    group.has_panel = True
+    db.session.commit()
+
+    # The first member leaves for a new group with a student who had none
+    assert accept_invite(create_account('student', 'third@example.edu'), 'first@example.edu')['success']
+    db.session.expire_all()
+    assert db.session.get(StudentGroup, group.id).member_count == 1
+    assert db.session.get(Supervisor, supervisor.id).supervised_count == 1
+
+    # The last member joins an existing group, which empties the old one
+    fourth, fifth = create_account('student', 'fourth@example.edu'), create_account('student', 'fifth@example.edu')
+    joined = make_group('CS50', fourth, fifth)
+    result = accept_invite(fourth, 'second@example.edu')
+    assert result['success'], result
+
+    db.session.expire_all()
+    assert db.session.get(StudentGroup, group.id) is None
+    assert db.session.get(Supervisor, supervisor.id).supervised_count == 0
+    assert SupervisorRequest.query.filter_by(group_id=group.id).count() == 0
+    assert SupervisorChangeRequest.query.filter_by(group_id=group.id).count() == 0
+    assert Panel.query.count() == 0 and PanelMember.query.count() == 0
+    assert db.session.get(StudentGroup, joined.id).member_count == 3
+    counts = {g.name: (g.member_count, Student.query.filter_by(group_id=g.id).count()) for g in StudentGroup.query}
+    assert all(counter == rows for counter, rows in counts.values()), counts
+
+
+def test_leaving_the_last_member_deletes_the_group():
+    supervisor = create_account('supervisor', 'supervisor@example.edu')
+    only = create_account('student', 'only@example.edu')
+    group = make_group('CS01', only, supervisor=supervisor)
+
+    assert login('only@example.edu').post('/leave_group').get_json()['success']
+
+    db.session.expire_all()
+    assert db.session.get(StudentGroup, group.id) is None
+    assert db.session.get(Supervisor, supervisor.id).supervised_count == 0
+
+
+def move_elsewhere(student, old_group, new_group):
+    """Move student between groups on a connection of its own, as another worker would.
+    
+    This worker's user cache goes on serving the old group until it next checks versions.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(db.update(Student).filter_by(id=student.id).values(group_id=new_group.id))
+        connection.execute(db.update(StudentGroup).filter_by(id=old_group.id).values(member_count=old_group.member_count - 1))
+        connection.execute(db.update(StudentGroup).filter_by(id=new_group.id).values(member_count=new_group.member_count + 1))
+
+
+def test_leave_group_uses_the_database_row_rather_than_the_cached_profile(monkeypatch):
+    monkeypatch.setattr(app_module.user_cache, 'check_interval', 3600)
+    first, second, third = (create_account('student', f'{name}@example.edu') for name in ('first', 'second', 'third'))
+    old_group = make_group('CS01', first, second)
+    new_group = make_group('CS02', third)
+    client = login('first@example.edu')
+    assert b'CS01' in client.get('/student/dashboard').data  # caches the profile
+
+    move_elsewhere(first, old_group, new_group)
+    assert client.post('/leave_group').get_json()['success']
+
+    db.session.expire_all()
+    assert db.session.get(Student, first.id).group_id is None
+    assert db.session.get(StudentGroup, old_group.id).member_count == 1
+    assert db.session.get(StudentGroup, new_group.id).member_count == 1
+
+
+def test_respond_invite_releases_the_group_the_student_is_in_now(monkeypatch):
+    monkeypatch.setattr(app_module.user_cache, 'check_interval', 3600)
+    first, second, third, fourth = (create_account('student', f'{name}@example.edu')
+                                    for name in ('first', 'second', 'third', 'fourth'))
+    old_group = make_group('CS01', first, second)
+    new_group = make_group('CS02', third)
+    invite = GroupInvite(sender_id=fourth.id, receiver_id=first.id)
+    db.session.add(invite)
+    db.session.commit()
+    client = login('first@example.edu')
+    assert b'CS01' in client.get('/student/dashboard').data  # caches the profile
+
+    move_elsewhere(first, old_group, new_group)
+    assert client.post('/respond_invite', json={'invite_id': invite.id, 'action': 'accept'}).get_json()['success']
+
+    db.session.expire_all()
+    assert db.session.get(StudentGroup, old_group.id).member_count == 1
+    assert db.session.get(StudentGroup, new_group.id).member_count == 1
+    counts = {g.name: (g.member_count, Student.query.filter_by(group_id=g.id).count()) for g in StudentGroup.query}
+    assert all(counter == rows for counter, rows in counts.values()), counts
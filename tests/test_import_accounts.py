@@ -0,0 +1,105 @@
+import csv
+from io import BytesIO, StringIO
+
+import app as app_module
+from app import db, import_accounts, verify_password, OutboundEmail, Student, Supervisor, User, UNUSABLE_PASSWORD
+from conftest import SCHOOL, create_account, login
+
+STUDENT_COLUMNS = ('name', 'email', 'roll_number', 'year', 'branch', 'password')
+
+
+def student_csv(*rows):
+    """CSV text for student rows given as (name, email, roll_number, year, branch, password) tuples"""
+    text = StringIO(newline='')
+    writer = csv.writer(text)
+    writer.writerow(STUDENT_COLUMNS)
+    writer.writerows(rows)
+    text.seek(0)
+    return text
+
+
+def student_row(i, password=''):
+    return (f'Student {i}', f'student{i}@example.edu', f'R{i:05d}', 'Third', 'CS', password)
+
+
+def errors_by_line(result):
+    return {error['line']: error['error'] for error in result['errors']}
+
+
+def test_duplicates_in_the_file_and_in_the_database_are_skipped():
+    create_account('student', 'taken@example.edu', roll_number='R-TAKEN')
+    create_account('supervisor', 'staff@example.edu')
+
+    result = import_accounts(student_csv(
+        student_row(1),                                                   # line 2
+        ('Again', 'student1@example.edu', 'R90001', 'Third', 'CS', ''),   # 3: email repeated in file
+        ('Copy', 'copy@example.edu', 'R00001', 'Third', 'CS', ''),        # 4: roll number repeated in file
+        ('Taken', 'taken@example.edu', 'R90002', 'Third', 'CS', ''),      # 5: email of a student
+        ('Staff', 'staff@example.edu', 'R90003', 'Third', 'CS', ''),      # 6: email of a supervisor
+        ('Roll', 'roll@example.edu', 'R-TAKEN', 'Fourth', 'IT', ''),      # 7: roll number of a student
+        student_row(2),                                                   # 8
+    ), 'student', SCHOOL)
+
+    assert result['created'] == 2
+    assert errors_by_line(result) == {
+        3: 'Duplicate email in file',
+        4: 'Duplicate roll number in file',
+        5: 'Email already registered',
+        6: 'Email already registered',
+        7: 'Roll number already registered',
+    }
+    assert Student.query.filter_by(roll_number='R00001').one().name == 'Student 1'
+    assert User.query.count() == 4
+    assert Student.query.count() == 3
+
+
+def test_imports_more_rows_than_one_chunk():
+    rows = [student_row(i, password=f'secret-{i}' if i % 100 == 0 else '') for i in range(2500)]
+    rows.insert(1500, student_row(7))  # a repeat in the second chunk
+    done = []
+
+    result = import_accounts(student_csv(*rows), 'student', SCHOOL, progress=lambda *args: done.append(args))
+
+    assert app_module.IMPORT_CHUNK_SIZE == 1000
+    assert result['created'] == 2500
+    assert result['errors'] == [{'line': 1502, 'email': 'student7@example.edu', 'error': 'Duplicate email in file'}]
+    assert done == [(1000, 2500), (2000, 2500), (2500, 2500)]
+    assert Student.query.filter_by(school=SCHOOL).count() == 2500
+    assert db.session.query(Student.user_id).distinct().count() == 2500
+    assert verify_password(User.query.filter_by(email='student2400@example.edu').one().password, 'secret-2400')
+    assert OutboundEmail.query.count() == 2500 - 25
+
+
+def test_rows_without_a_password_get_an_unusable_one_and_a_welcome_email():
+    result = import_accounts(student_csv(
+        student_row(1),
+        student_row(2, password='chosen-password'),
+    ), 'student', SCHOOL)
+    assert result == {'created': 2, 'errors': []}
+
+    imported = User.query.filter_by(email='student1@example.edu').one()
+    assert imported.password == UNUSABLE_PASSWORD
+    assert not verify_password(imported.password, '')
+    assert verify_password(User.query.filter_by(email='student2@example.edu').one().password, 'chosen-password')
+
+    welcome = OutboundEmail.query.one()
+    assert welcome.recipient == 'student1@example.edu'
+    assert welcome.status == 'pending'
+    assert 'Forgot Password' in welcome.body
+
+    # The unusable password cannot be used to sign in
+    response = app_module.app.test_client().post('/login', data={'email': 'student1@example.edu', 'password': '!'})
+    assert response.status_code != 302
+
+
+def test_upload_imports_supervisors_into_the_fic_school():
+    create_account('fic', 'fic@example.edu', school='School of IT')
+    upload = b'\xef\xbb\xbfname,email,domain\nDr. One,one@example.edu,ML\nDr. Two,,AI\n'
+
+    response = login('fic@example.edu').post('/import_accounts', data={
+        'role': 'supervisor', 'file': (BytesIO(upload), 'supervisors.csv')
+    })
+
+    assert response.get_json()['created'] == 1
+    assert response.get_json()['errors'] == [{'line': 3, 'email': '', 'error': 'Missing email'}]
+    assert Supervisor.query.filter_by(name='Dr. One').one().school == 'School of IT'
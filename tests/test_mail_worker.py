@@ -0,0 +1,171 @@
+import smtplib
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+
+import mail_worker
+from app import app, db, Notification, OutboundEmail, mail_queue_depth, queue_email
+from conftest import create_account
+
+
+def test_failed_notification_fan_out_waits_before_retrying(monkeypatch):
+    fic = create_account('fic', 'fic@example.edu')
+    create_account('student', 'student@example.edu')
+    notification = Notification(title='Deadline', message='Submit by Friday', target_type='all',
+                                created_by=fic.id, email_status='pending', email_total=1)
+    db.session.add(notification)
+    db.session.commit()
+
+    connects = []
+
+    def connect():
+        connects.append(datetime.utcnow())
+        raise smtplib.SMTPConnectError(421, 'Service not available')
+
+    monkeypatch.setattr(mail_worker.mail, 'connect', connect)
+
+    assert mail_worker.deliver_notification_emails() == 0
+    notification = db.session.get(Notification, notification.id)
+    assert notification.email_status == 'pending'
+    assert notification.email_attempts == 1
+    assert (notification.email_next_attempt_at - datetime.utcnow()).total_seconds() > \
+        app.config['MAIL_RETRY_BASE_SECONDS'] - 5
+
+    # The retry is not due yet, so polling again does not touch the server
+    assert mail_worker.deliver_notification_emails() == 0
+    assert len(connects) == 1
+
+    notification.email_next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    mail_worker.deliver_notification_emails()
+    assert len(connects) == 2
+    assert db.session.get(Notification, notification.id).email_attempts == 2
+
+
+class SMTPSink:
+    """aiosmtpd handler that records delivered messages and refuses chosen recipients"""
+
+    def __init__(self):
+        self.messages = []
+        self.refusals = {}  # recipient -> SMTP reply
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refusals:
+            return self.refusals[address]
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        # The peer address identifies the SMTP connection the message came over
+        self.messages.append((session.peer, envelope.rcpt_tos[0], envelope.content.decode()))
+        return '250 Message accepted for delivery'
+
+    def recipients(self):
+        return [recipient for _, recipient, _ in self.messages]
+
+    def connections(self):
+        return {peer for peer, _, _ in self.messages}
+
+
+@pytest.fixture
+def smtp_sink(monkeypatch):
+    """A local SMTP server that the worker's mail connections go to"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    sink = SMTPSink()
+    controller = Controller(sink, hostname='127.0.0.1', port=port)
+    controller.start()
+    state = app.extensions['mail']
+    for name, value in {'server': '127.0.0.1', 'port': port, 'use_tls': False, 'use_ssl': False,
+                        'username': None, 'password': None, 'suppress': False}.items():
+        monkeypatch.setattr(state, name, value)
+    monkeypatch.setitem(app.config, 'MAIL_USERNAME', 'noreply@example.edu')
+    yield sink
+    controller.stop()
+
+
+def queue(*recipients, due=True):
+    emails = [queue_email(f'Message to {recipient}', recipient, 'Hello') for recipient in recipients]
+    for email in emails:
+        email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1) if due else \
+            datetime.utcnow() + timedelta(hours=1)
+    db.session.commit()
+    return [email.id for email in emails]
+
+
+def statuses():
+    return {email.recipient: (email.status, email.attempts) for email in OutboundEmail.query}
+
+
+def test_claim_batch_claims_due_messages_once():
+    due = queue('a@example.edu', 'b@example.edu', 'c@example.edu')
+    queue('later@example.edu', due=False)
+
+    claimed = mail_worker.claim_batch(2)
+
+    assert [email.id for email in claimed] == due[:2]
+    assert all(email.status == 'sending' and email.claimed_at for email in claimed)
+    assert [email.id for email in mail_worker.claim_batch(10)] == due[2:]
+    assert mail_worker.claim_batch(10) == []
+
+
+def test_deliver_batch_sends_over_one_connection(smtp_sink):
+    recipients = [f'student{i}@example.edu' for i in range(5)]
+    queue(*recipients)
+
+    assert mail_worker.deliver_batch() == 5
+
+    assert smtp_sink.recipients() == recipients
+    assert len(smtp_sink.connections()) == 1
+    assert 'Subject: Message to student0@example.edu' in smtp_sink.messages[0][2]
+    assert set(statuses().values()) == {('sent', 0)}
+    assert mail_queue_depth() == {'sent': 5}
+
+
+def test_permanent_refusal_fails_only_that_message(smtp_sink):
+    smtp_sink.refusals['gone@example.edu'] = '550 No such user'
+    queue('a@example.edu', 'gone@example.edu', 'b@example.edu')
+
+    assert mail_worker.deliver_batch() == 2
+
+    assert smtp_sink.recipients() == ['a@example.edu', 'b@example.edu']
+    assert statuses() == {'a@example.edu': ('sent', 0), 'gone@example.edu': ('pending', 1),
+                          'b@example.edu': ('sent', 0)}
+    assert '550' in OutboundEmail.query.filter_by(recipient='gone@example.edu').one().last_error
+
+
+def test_temporary_refusal_backs_off_the_rest_of_the_batch(smtp_sink):
+    smtp_sink.refusals['busy@example.edu'] = '451 Try again later'
+    queue('a@example.edu', 'busy@example.edu', 'b@example.edu')
+
+    assert mail_worker.deliver_batch() == 1
+
+    # The server is treated as unavailable: the remaining messages wait for a retry
+    assert statuses() == {'a@example.edu': ('sent', 0), 'busy@example.edu': ('pending', 1),
+                          'b@example.edu': ('pending', 1)}
+    retry_at = OutboundEmail.query.filter_by(recipient='b@example.edu').one().next_attempt_at
+    assert (retry_at - datetime.utcnow()).total_seconds() > app.config['MAIL_RETRY_BASE_SECONDS'] - 5
+    assert mail_worker.deliver_batch() == 0
+
+    del smtp_sink.refusals['busy@example.edu']
+    OutboundEmail.query.filter_by(status='pending').update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+    assert mail_worker.deliver_batch() == 2
+    assert smtp_sink.recipients() == ['a@example.edu', 'busy@example.edu', 'b@example.edu']
+    assert set(statuses().values()) == {('sent', 0), ('sent', 1)}
+
+
+def test_messages_fail_after_max_attempts(smtp_sink, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAIL_MAX_ATTEMPTS', 2)
+    smtp_sink.refusals['gone@example.edu'] = '550 No such user'
+    queue('gone@example.edu')
+
+    mail_worker.deliver_batch()
+    OutboundEmail.query.update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+    mail_worker.deliver_batch()
+
+    assert statuses() == {'gone@example.edu': ('failed', 2)}
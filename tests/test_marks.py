@@ -0,0 +1,49 @@
+import pytest
+
+from app import db, Marks, StudentGroup
+from conftest import create_account, login
+
+
+@pytest.fixture
+def supervisor_client():
+    supervisor = create_account('supervisor', 'supervisor@example.edu')
+    group = StudentGroup(name='CS01', branch='CS', year='Third', supervisor_id=supervisor.id)
+    db.session.add(group)
+    db.session.flush()
+    student = create_account('student', 'student@example.edu', group_id=group.id)
+    return login('supervisor@example.edu'), student.id
+
+
+@pytest.mark.parametrize('value', ['nan', 'NaN', 'inf', '-inf', '1e999', -1, 10.5])
+def test_bulk_marks_reject_values_that_are_not_finite_or_in_range(supervisor_client, value):
+    client, student_id = supervisor_client
+
+    result = client.post('/assign_marks_bulk', json={'marks': [
+        {'student_id': student_id, 'presentation': value, 'documents': 5, 'collaboration': 5}
+    ]}).get_json()
+
+    assert not result['success']
+    assert Marks.query.count() == 0
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', 11])
+def test_single_marks_reject_values_that_are_not_finite_or_in_range(supervisor_client, value):
+    client, student_id = supervisor_client
+
+    result = client.post('/assign_marks', json={
+        'student_id': student_id, 'presentation': 5, 'documents': value, 'collaboration': 5
+    }).get_json()
+
+    assert not result['success']
+    assert Marks.query.count() == 0
+
+
+def test_bulk_marks_save_valid_values(supervisor_client):
+    client, student_id = supervisor_client
+
+    result = client.post('/assign_marks_bulk', json={'marks': [
+        {'student_id': student_id, 'presentation': '7.5', 'documents': 10, 'collaboration': 0}
+    ]}).get_json()
+
+    assert result['success']
+    assert Marks.query.one().total == 17.5
@@ -0,0 +1,82 @@
+import random
+import statistics
+
+from app import db, Marks, StudentGroup, MARKS_HISTOGRAM_BUCKETS
+from conftest import create_account, login
+
+
+def give_marks(student, supervisor, presentation, documents, collaboration):
+    db.session.add(Marks(student_id=student.id, given_by=supervisor.id, presentation=presentation,
+                         documents=documents, collaboration=collaboration,
+                         total=presentation + documents + collaboration))
+
+
+def analytics():
+    response = login('fic@example.edu').get('/marks_analytics').get_json()
+    assert response['success']
+    return response['analytics']
+
+
+def test_students_marked_by_two_supervisors_count_once():
+    create_account('fic', 'fic@example.edu')
+    old, new = create_account('supervisor', 'old@example.edu'), create_account('supervisor', 'new@example.edu')
+    group = StudentGroup(name='CS01', branch='CS', year='Third', supervisor_id=new.id)
+    db.session.add(group)
+    db.session.flush()
+    changed = create_account('student', 'changed@example.edu', group_id=group.id)
+    other = create_account('student', 'other@example.edu', group_id=group.id)
+    give_marks(changed, old, 10, 10, 10)
+    give_marks(changed, new, 4, 3, 3)
+    give_marks(other, new, 6, 6, 6)
+    db.session.commit()
+
+    result = analytics()
+
+    assert result['overall']['total']['count'] == 2
+    assert result['by_branch']['CS']['total']['count'] == 2
+    assert result['overall']['total']['max'] == 20  # the average of 30 and 10
+    assert [(entry['roll_number'], entry['total'], entry['rank']) for entry in result['ranks']] == \
+        [('changed', 20, 1), ('other', 18, 2)]
+    by_supervisor = {entry['name']: entry['stats']['total']['count'] for entry in result['by_supervisor']}
+    assert by_supervisor == {'old': 1, 'new': 2}
+
+
+def test_distributions_match_a_reference_computation():
+    create_account('fic', 'fic@example.edu')
+    supervisor = create_account('supervisor', 'supervisor@example.edu')
+    rng = random.Random(7)
+    totals = {'CS': [], 'IT': []}
+    for i in range(57):
+        branch = 'CS' if i % 3 else 'IT'
+        student = create_account('student', f'student{i}@example.edu', branch=branch)
+        marks = [rng.choice([0, 2.5, 5, 7, 7, 9.5, 10]) for _ in range(3)]
+        give_marks(student, supervisor, *marks)
+        totals[branch].append(sum(marks))
+    db.session.commit()
+
+    result = analytics()
+
+    for branch, values in totals.items():
+        stats = result['by_branch'][branch]['total']
+        quantiles = statistics.quantiles(values, n=100, method='inclusive')
+        assert stats['count'] == len(values)
+        assert stats['mean'] == round(statistics.mean(values), 2)
+        assert (stats['min'], stats['max']) == (min(values), max(values))
+        assert [stats['p25'], stats['median'], stats['p75'], stats['p90']] == \
+            [round(quantiles[q - 1], 2) for q in (25, 50, 75, 90)]
+        width = 30 / MARKS_HISTOGRAM_BUCKETS
+        assert stats['histogram']['counts'] == [
+            sum(1 for value in values if min(int(value // width), MARKS_HISTOGRAM_BUCKETS - 1) == bucket)
+            for bucket in range(MARKS_HISTOGRAM_BUCKETS)
+        ]
+    all_totals = sorted(totals['CS'] + totals['IT'], reverse=True)
+    assert [entry['rank'] for entry in result['ranks']] == [all_totals.index(total) + 1 for total in all_totals]
+
+
+def test_no_marks():
+    create_account('fic', 'fic@example.edu')
+
+    result = analytics()
+
+    assert result['overall']['total'] == {'count': 0}
+    assert result['ranks'] == []
@@ -0,0 +1,19 @@
+from app import app
+
+
+def test_metrics_are_not_served_without_a_token(monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', '')
+
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_require_the_token(monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'secret')
+    client = app.test_client()
+    client.get('/login')
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert b'outbound_email_messages' in response.data
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from app import db, Notification, NOTIFICATION_FEED_SIZE
+from conftest import create_account, login
+
+
+def add_notifications(fic, count, target_type='students', **columns):
+    now = datetime.utcnow()
+    db.session.add_all(Notification(title=f'Notice {i}', message='Review schedule', target_type=target_type,
+                                    created_by=fic.id, created_at=now - timedelta(minutes=i), **columns)
+                       for i in range(count))
+    db.session.commit()
+
+
+def test_unread_count_is_not_capped_at_the_feed_size():
+    fic = create_account('fic', 'fic@example.edu')
+    create_account('student', 'student@example.edu')
+    add_notifications(fic, NOTIFICATION_FEED_SIZE + 5)
+    add_notifications(fic, 2, target_type='specific_branch', target_branch='CS')
+    add_notifications(fic, 3, target_type='supervisors')
+    client = login('student@example.edu')
+
+    page = client.get('/student/dashboard').get_data(as_text=True)
+    assert f'{NOTIFICATION_FEED_SIZE + 7} new' in page
+
+    assert client.post('/mark_notifications_read').get_json()['success']
+    page = client.get('/student/dashboard').get_data(as_text=True)
+    assert ' new</span>' not in page
@@ -0,0 +1,53 @@
+"""Concurrent panel creation: however automatic and manual assignments
+interleave, every group ends up with exactly one panel."""
+from app import db, Panel, PanelMember, StudentGroup, PANEL_SIZE
+from conftest import create_account, login, run_concurrently
+
+GROUPS = 40
+FICS = 6
+
+
+def post_json(client, path, payload):
+    return client.post(path, json=payload).get_json()
+
+
+def test_concurrent_assignments_create_one_panel_per_group():
+    supervisors = [create_account('supervisor', f'supervisor{i}@example.edu') for i in range(5)]
+    for i in range(GROUPS):
+        group = StudentGroup(name=f'CS{i + 1:02d}', branch='CS', year='Third', supervisor_id=supervisors[i % 5].id)
+        db.session.add(group)
+        db.session.flush()
+        create_account('student', f'student{i}@example.edu', group_id=group.id)
+    for i in range(FICS):
+        create_account('fic', f'fic{i}@example.edu')
+    group_ids = [group.id for group in StudentGroup.query.order_by(StudentGroup.id)]
+    panel = [supervisor.id for supervisor in supervisors[:PANEL_SIZE]]
+
+    calls = [(login(f'fic{i}@example.edu'), '/auto_assign_panels', {}) for i in range(FICS)]
+    calls += [(login(f'fic{i}@example.edu'), '/create_panel', {'group_id': group_ids[i], 'supervisor_ids': panel})
+              for i in range(FICS)]
+    results = run_concurrently(post_json, calls)
+
+    created = sum(result.get('created', 0) for result in results[:FICS])
+    created += sum(result['success'] for result in results[FICS:])
+    assert created == GROUPS
+    panel_group_ids = [row[0] for row in db.session.query(Panel.group_id)]
+    assert sorted(panel_group_ids) == group_ids
+    assert PanelMember.query.count() == GROUPS * PANEL_SIZE
+    assert StudentGroup.query.filter_by(has_panel=False).count() == 0
+
+
+def test_create_panel_rejects_a_second_panel():
+    supervisors = [create_account('supervisor', f'supervisor{i}@example.edu') for i in range(PANEL_SIZE)]
+    group = StudentGroup(name='CS01', branch='CS', year='Third')
+    db.session.add(group)
+    db.session.flush()
+    create_account('student', 'student@example.edu', group_id=group.id)
+    create_account('fic', 'fic@example.edu')
+    client = login('fic@example.edu')
+    payload = {'group_id': group.id, 'supervisor_ids': [supervisor.id for supervisor in supervisors]}
+
+    assert post_json(client, '/create_panel', payload)['success']
+    assert post_json(client, '/create_panel', payload)['message'] == 'Panel already exists for this group'
+    assert post_json(client, '/auto_assign_panels', {})['message'] == 'Every group already has a panel'
+    assert Panel.query.count() == 1
@@ -0,0 +1,50 @@
+import pytest
+
+import app as app_module
+from app import app, RATE_LIMITS, DatabaseRateLimiter, MemoryRateLimiter
+from conftest import create_account
+from seed_data import PASSWORD
+
+
+@pytest.fixture(params=[DatabaseRateLimiter, MemoryRateLimiter], autouse=True)
+def limiter(request, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(app_module, 'rate_limiter', request.param())
+
+
+def test_login_is_limited_per_email():
+    create_account('student', 'student@example.edu')
+    client = app.test_client()
+    capacity = RATE_LIMITS['login']['email'][0]
+    for _ in range(capacity):
+        response = client.post('/login', data={'email': 'student@example.edu', 'password': 'wrong'})
+        assert response.status_code == 200
+
+    response = client.post('/login', data={'email': 'student@example.edu', 'password': 'wrong'})
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert b'Too many attempts' in response.data
+    # Other accounts from the same address can still log in
+    create_account('student', 'other@example.edu')
+    assert client.post('/login', data={'email': 'other@example.edu', 'password': PASSWORD}).status_code == 302
+
+
+def test_send_otp_answers_json_429():
+    client = app.test_client()
+    capacity = RATE_LIMITS['send_otp']['email'][0]
+    for _ in range(capacity):
+        assert client.post('/send_otp', json={'email': 'new@example.edu'}).get_json()['success']
+
+    response = client.post('/send_otp', json={'email': 'NEW@example.edu '})
+
+    assert response.status_code == 429
+    assert response.get_json()['success'] is False
+    assert int(response.headers['Retry-After']) > 0
+
+
+def test_disabled_limiter_lets_everything_through(monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', False)
+    client = app.test_client()
+    for _ in range(RATE_LIMITS['send_otp']['email'][0] + 2):
+        assert client.post('/send_otp', json={'email': 'new@example.edu'}).status_code == 200
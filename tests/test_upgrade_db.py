@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from app import app, db, upgrade_db
+
+# Tables and columns added to the original schema, which upgrade_db must
+# add to a database created before them
+ADDED_TABLES = {'group_name_counter', 'outbound_email', 'cache_version', 'rate_limit_bucket'}
+ADDED_COLUMNS = {
+    ('user', 'notifications_seen_at'),
+    ('student_group', 'member_count'),
+    ('student_group', 'has_panel'),
+    ('supervisor', 'supervised_count'),
+    ('notification', 'email_status'),
+    ('notification', 'email_total'),
+    ('notification', 'email_sent_count'),
+    ('notification', 'email_failed_count'),
+    ('notification', 'email_cursor'),
+    ('notification', 'email_claimed_at'),
+    ('notification', 'email_attempts'),
+    ('notification', 'email_next_attempt_at'),
+}
+
+
+def create_original_schema():
+    """Create the tables as they were before the added columns, indexes and constraints"""
+    original = db.MetaData()
+    for table in db.metadata.sorted_tables:
+        if table.name not in ADDED_TABLES:
+            db.Table(table.name, original, *[
+                column._copy() for column in table.columns if (table.name, column.name) not in ADDED_COLUMNS
+            ])
+    original.create_all(db.engine)
+
+
+def test_upgrade_db_adds_missing_schema_and_is_idempotent():
+    db.drop_all()
+    create_original_schema()
+    expires_at = datetime.utcnow() + timedelta(minutes=10)
+    with db.engine.begin() as connection:
+        connection.execute(db.text(
+            "INSERT INTO otp (email, otp, purpose, expires_at, used) VALUES "
+            "('a@example.edu', '111111', 'registration', :expires_at, false), "
+            "('a@example.edu', '222222', 'registration', :expires_at, false), "
+            "('a@example.edu', '333333', 'password_reset', :expires_at, false)"
+        ), {'expires_at': expires_at})
+        connection.execute(db.text(
+            "INSERT INTO \"user\" (id, email, password, role) VALUES "
+            "(1, 's1@example.edu', '!', 'student'), (2, 's2@example.edu', '!', 'student'), "
+            "(3, 'sup@example.edu', '!', 'supervisor'), (4, 'fic@example.edu', '!', 'fic')"
+        ))
+        connection.execute(db.text(
+            "INSERT INTO supervisor (id, user_id, name, domain, school) VALUES (1, 3, 'Sup', 'ML', 'School of IT')"
+        ))
+        connection.execute(db.text(
+            "INSERT INTO student_group (id, name, supervisor_id, branch, year) VALUES "
+            "(1, 'IT01', 1, 'IT', 'Third'), (2, 'IT02', NULL, 'IT', 'Third')"
+        ))
+        connection.execute(db.text("INSERT INTO fic (id, user_id, name, school) VALUES (1, 4, 'Fic', 'School of IT')"))
+        connection.execute(db.text("INSERT INTO panel (id, group_id, created_by) VALUES (1, 1, 1)"))
+        connection.execute(db.text(
+            "INSERT INTO student (user_id, name, roll_number, year, school, branch, group_id) VALUES "
+            "(1, 'S1', 'R1', 'Third', 'School of IT', 'IT', 1), (2, 'S2', 'R2', 'Third', 'School of IT', 'IT', 1)"
+        ))
+
+    changes = upgrade_db()
+
+    inspector = db.inspect(db.engine)
+    for table, column in ADDED_COLUMNS:
+        assert column in {c['name'] for c in inspector.get_columns(table)}, f'{table}.{column} missing'
+    for table in db.metadata.sorted_tables:
+        names = {index['name'] for index in inspector.get_indexes(table.name)}
+        names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table.name))
+        for index in table.indexes:
+            assert index.name in names, f'{index.name} missing'
+    assert 'added unique constraint uq_otp_email_purpose' in changes
+    otps = db.session.execute(db.text("SELECT otp, purpose FROM otp ORDER BY otp")).all()
+    assert [tuple(row) for row in otps] == [('222222', 'registration'), ('333333', 'password_reset')]
+    # The counters start at 0 when added and must match the rows before the new code runs
+    groups = db.session.execute(db.text("SELECT member_count, has_panel FROM student_group ORDER BY id")).all()
+    assert [(row[0], bool(row[1])) for row in groups] == [(2, True), (0, False)]
+    assert db.session.execute(db.text("SELECT supervised_count FROM supervisor")).scalar() == 1
+
+    assert upgrade_db() == []
+
+
+def test_upgrade_db_command():
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Database is up to date (0 changes), group member, panel and supervisor counts recomputed' in result.output